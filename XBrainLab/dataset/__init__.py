@@ -2,10 +2,12 @@ from .data_splitter import DataSplitter, DataSplittingConfig
 from .dataset import Dataset
 from .dataset_generator import DatasetGenerator
 from .epochs import Epochs
+from .epochs_view import EpochsView
 from .option import SplitByType, SplitUnit, TrainingType, ValSplitByType
 
 __all__ = [
     'Epochs',
+    'EpochsView',
     'DataSplitter',
     'DataSplittingConfig',
     'DatasetGenerator',
@@ -5,6 +5,7 @@ import numpy as np
 from ..utils import validate_type
 from .data_splitter import DataSplittingConfig
 from .epochs import Epochs
+from .epochs_view import EpochsView
 
 
 class Dataset:
@@ -31,6 +32,11 @@ class Dataset:
             Mask for test set
         is_selected: bool
             Whether the dataset is selected
+        tensor_cache: dict[tuple, tuple]
+            Cached :class:`EpochsView` of each split on each device,
+            along with the mask it is built from,
+            shared across repeats of training and evaluation.
+            Views on devices other than CPU hold the split as a device tensor
     """
     SEQ = 0
     def __init__(self, epoch_data: Epochs, config: DataSplittingConfig):
@@ -49,6 +55,18 @@ class Dataset:
         self.val_mask = np.zeros(data_length, dtype=bool)
         self.test_mask = np.zeros(data_length, dtype=bool)
         self.is_selected = True
+        self.tensor_cache = {}
+        epoch_data.register_dataset(self)
+
+    def __getstate__(self) -> dict:
+        # views on devices are not copied or pickled, e.g. to worker processes
+        state = self.__dict__.copy()
+        state['tensor_cache'] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.epoch_data.register_dataset(self)
 
     # data splitting
     ## getter
@@ -116,6 +134,20 @@ class Dataset:
         """Mark all the trials in the mask as discarded."""
         self.remaining_mask &= np.logical_not(mask)
 
+    def append_remaining(self, count: int) -> None:
+        """Append new trials of the epoch data as remaining trials.
+
+        Called by :meth:`Epochs.extend`. The new trials are not assigned to
+        any of the training, validation and test set.
+        """
+        self.remaining_mask = np.concatenate(
+            (self.remaining_mask, np.ones(count, dtype=bool))
+        )
+        for name in ['train_mask', 'val_mask', 'test_mask']:
+            mask = getattr(self, name)
+            setattr(self, name, np.concatenate((mask, np.zeros(count, dtype=bool))))
+        self.clear_tensor_cache()
+
     def set_remaining_by_subject_idx(self, idx: int) -> None:
         """Set the remaining mask to the mask of target subject."""
         self.remaining_mask = self.epoch_data.pick_subject_mask_by_idx(idx)
@@ -125,16 +157,19 @@ class Dataset:
         """Set the mask for test set and update the remaining mask."""
         self.test_mask = mask & self.remaining_mask
         self.remaining_mask &= np.logical_not(mask)
+        self.clear_tensor_cache()
 
     def set_val(self, mask: np.ndarray) -> None:
         """Set the mask for validation set and update the remaining mask."""
         self.val_mask = mask & self.remaining_mask
         self.remaining_mask &= np.logical_not(mask)
+        self.clear_tensor_cache()
 
     def set_remaining_to_train(self) -> None:
         """Set the remaining trials as training set."""
         self.train_mask |= self.remaining_mask
         self.remaining_mask &= False
+        self.clear_tensor_cache()
 
     ## filter
     def intersection_with_subject_by_idx(
@@ -176,6 +211,59 @@ class Dataset:
         y = self.epoch_data.get_label_list()[self.test_mask]
         return X, y
 
+    def get_epochs_view(
+        self, split: str, dev: str, cached: bool = True
+    ) -> EpochsView:
+        """Return a torch dataset view of a split over the shared epoch data.
+
+        The selected trials are not copied,
+        but gathered by index when a batch is requested.
+        The view is cached until the mask of the split changes
+        or :meth:`clear_tensor_cache` is called.
+
+        Args:
+            split: One of 'train', 'val' and 'test'
+            dev: Device of the returned batches
+            cached: Whether to return the cached view. A new view is returned
+                    if False, e.g. for iterating in another thread, since
+                    gathering batches is not thread-safe.
+        """
+        mask = self.get_split_mask(split)
+        if not cached:
+            return EpochsView.from_mask(
+                self.epoch_data.get_data(), self.epoch_data.get_label_list(),
+                mask, dev
+            )
+        key = ('view', split, str(dev))
+        if key in self.tensor_cache:
+            cached_mask, view = self.tensor_cache[key]
+            if np.array_equal(cached_mask, mask):
+                return view
+        view = EpochsView.from_mask(
+            self.epoch_data.get_data(), self.epoch_data.get_label_list(), mask, dev
+        )
+        self.tensor_cache[key] = (mask.copy(), view)
+        return view
+
+    def get_split_mask(self, split: str) -> np.ndarray:
+        """Return the mask of a split.
+
+        Args:
+            split: One of 'train', 'val' and 'test'
+        """
+        masks = {
+            'train': self.train_mask,
+            'val': self.val_mask,
+            'test': self.test_mask
+        }
+        if split not in masks:
+            raise ValueError(f'Invalid split: {split}')
+        return masks[split]
+
+    def clear_tensor_cache(self) -> None:
+        """Release the cached views."""
+        self.tensor_cache = {}
+
     # get data len
     def get_train_len(self) -> int:
         """Return the number of trials in training set."""
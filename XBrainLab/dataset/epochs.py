@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import weakref
 from copy import deepcopy
 from enum import Enum
+from typing import TYPE_CHECKING
 
 import numpy as np
 
 from ..load_data import Raw
-from ..utils import validate_list_type
+from ..utils import validate_list_type, zip_strict
 from .option import SplitUnit
 
+if TYPE_CHECKING: # pragma: no cover
+    from .dataset import Dataset
+
 
 class TrialSelectionSequence(Enum):
     """Utility class for trial selection sequence in dataset splitting."""
@@ -25,6 +30,10 @@ class Epochs:
 
     Parameters:
         preprocessed_data_list: List of preprocessed data.
+        store_path: Path of the `.npy` file for storing the epoch data on disk.
+                    If set, the data is written to the file once and exposed as
+                    read-only :class:`numpy.memmap`. Kept in memory if None.
+        dtype: Data type of the epoch data, e.g. `np.float32` to halve memory usage.
 
     Attributes:
         sfreq: float
@@ -42,27 +51,32 @@ class Epochs:
         channel_position: list | None
             List of channel positions. None if not set.
             Channel format is (x, y, z).
-        subject: np.ndarray
+        subject: np.ndarray of int32
             List of subject index of each epoch.
-        session: np.ndarray
+        session: np.ndarray of int32
             List of session index of each epoch.
-        label: np.ndarray
+        label: np.ndarray of int32
             List of label index of each epoch.
-        idx: np.ndarray
+            Stored as int32 instead of float64 as in earlier versions,
+            cast explicitly if floating point labels are required.
+        idx: np.ndarray of int32
             List of epoch index within each preprocessed data.
+        data: np.ndarray
+            Epoch data of shape (n_epochs, n_channels, n_times).
+            Read-only :class:`numpy.memmap` if `store_path` is set.
+        store_path: str | None
+            Path of the file storing the epoch data. None if kept in memory.
+            The file may hold spare epochs beyond the data after :meth:`extend`.
+        datasets: :class:`weakref.WeakSet` of :class:`Dataset`
+            Datasets to be notified when the epochs are extended.
     """
-    def __init__(self, preprocessed_data_list: list[Raw]):
-        validate_list_type(
-            instance_list=preprocessed_data_list,
-            type_class=Raw,
-            message_name='preprocessed_data_list'
-        )
-        for preprocessed_data in preprocessed_data_list:
-            if preprocessed_data.is_raw():
-                raise ValueError(
-                    "Items of preprocessed_data_list must be "
-                    f"{Raw.__module__}.Raw of type epoch."
-                )
+    def __init__(
+        self,
+        preprocessed_data_list: list[Raw],
+        store_path: str | None = None,
+        dtype: np.dtype | str = np.float64
+    ):
+        self._validate(preprocessed_data_list)
 
         self.sfreq = None
         # maps
@@ -75,17 +89,52 @@ class Epochs:
         self.channel_position = None
 
         # 1D np array
-        self.subject = []
-        self.session = []
-        self.label = []
-        self.idx = []
+        self.subject = np.empty(0, dtype=np.int32)
+        self.session = np.empty(0, dtype=np.int32)
+        self.label = np.empty(0, dtype=np.int32)
+        self.idx = np.empty(0, dtype=np.int32)
+
+        self.data = np.empty(0, dtype=dtype)
+        # storage of data, with spare capacity reserved by extend
+        self._buffer = self.data
+        self.store_path = store_path
+        self.datasets = weakref.WeakSet()
+
+        if store_path is None and len(preprocessed_data_list) == 0:
+            return
+        self._append(preprocessed_data_list, store_path)
+
+    @staticmethod
+    def _validate(preprocessed_data_list: list[Raw]) -> None:
+        """Validate that all preprocessed data are epoched."""
+        validate_list_type(
+            instance_list=preprocessed_data_list,
+            type_class=Raw,
+            message_name='preprocessed_data_list'
+        )
+        for preprocessed_data in preprocessed_data_list:
+            if preprocessed_data.is_raw():
+                raise ValueError(
+                    "Items of preprocessed_data_list must be "
+                    f"{Raw.__module__}.Raw of type epoch."
+                )
 
-        self.data = []
+    def _update_event_id(
+        self, preprocessed_data_list: list[Raw], remap: bool = False
+    ) -> None:
+        """Merge event id of preprocessed data and remap their labels.
 
+        Args:
+            preprocessed_data_list: List of preprocessed data.
+            remap: Whether to remap labels by event name even if the event ids
+                   are already consecutive, e.g. for data appended by
+                   :meth:`extend` with events in a different order.
+        """
         # event_id
         for preprocessed_data in preprocessed_data_list:
             _, event_id = preprocessed_data.get_event_list()
-            self.event_id.update(event_id)
+            for event_name in event_id:
+                self.event_id.setdefault(event_name, None)
         ## fix
         fixed_event_id  = {}
         for event_name in self.event_id:
@@ -101,7 +150,9 @@ class Epochs:
             event_id = old_event_id.copy()
             old_labels = old_events[:, 2].copy()
 
-            if sorted(list(old_event_id.values())) != list(range(len(old_event_id))):
+            if remap or (
+                sorted(old_event_id.values()) != list(range(len(old_event_id)))
+            ):
                 for old_event_name, old_event_label in old_event_id.items():
                     events[:, 2][old_labels == old_event_label] = \
                         fixed_event_id[old_event_name]
@@ -113,38 +164,210 @@ class Epochs:
         for event_name, event_label in self.event_id.items():
             self.label_map[event_label] = event_name
 
-        # info
-        map_subject = {}
-        map_session = {}
+    def _append(
+        self,
+        preprocessed_data_list: list[Raw],
+        store_path: str | None,
+        remap: bool = False,
+        reserve: bool = False
+    ) -> None:
+        """Append epochs of preprocessed data in two passes.
 
+        All arrays are sized in the first pass and filled in the second pass.
+        The epochs are written into the spare capacity of the existing data
+        if it fits, otherwise the existing data is copied once.
+
+        Args:
+            preprocessed_data_list: List of preprocessed data.
+            store_path: Path of the `.npy` file for storing all epoch data,
+                        if new storage has to be allocated.
+                        Kept in memory if None.
+            remap: Whether to always remap labels by event name.
+            reserve: Whether to reserve spare capacity for further epochs
+                     when new storage has to be allocated.
+        """
+        self._update_event_id(preprocessed_data_list, remap=remap)
+
+        # info
+        map_subject = {name: idx for idx, name in self.subject_map.items()}
+        map_session = {name: idx for idx, name in self.session_map.items()}
+        epoch_len_list = []
         for preprocessed_data in preprocessed_data_list:
-            data = preprocessed_data.get_mne()
-            epoch_len = preprocessed_data.get_epochs_length()
             subject_name = preprocessed_data.get_subject_name()
             session_name = preprocessed_data.get_session_name()
             if subject_name not in map_subject:
                 map_subject[subject_name] = len(map_subject)
             if session_name not in map_session:
                 map_session[session_name] = len(map_session)
-            subject_idx = map_subject[subject_name]
-            session_idx = map_session[session_name]
-
-            self.subject = np.concatenate((self.subject, [subject_idx] * epoch_len))
-            self.session = np.concatenate((self.session, [session_idx] * epoch_len))
-            self.label   = np.concatenate((self.label,   data.events[:, 2]))
-            self.idx     = np.concatenate((self.idx,     range(epoch_len)))
-            if len(self.data) == 0:
-                self.data = data.get_data()
+            epoch_len_list.append(preprocessed_data.get_epochs_length())
+        self.session_map = {map_session[i]: i for i in map_session}
+        self.subject_map = {map_subject[i]: i for i in map_subject}
+
+        # allocate
+        offset = self.get_data_length()
+        n_epochs = offset + sum(epoch_len_list)
+        self.subject = self._resize(self.subject, n_epochs)
+        self.session = self._resize(self.session, n_epochs)
+        self.label = self._resize(self.label, n_epochs)
+        self.idx = self._resize(self.idx, n_epochs)
+        if self._fits(n_epochs):
+            store_path = self.store_path
+            if store_path is not None:
+                buffer = np.load(store_path, mmap_mode='r+')
             else:
-                self.data = np.concatenate((self.data,    data.get_data()))
+                buffer = self._buffer
+        else:
+            capacity = n_epochs * 3 // 2 if reserve else n_epochs
+            buffer = self._allocate_data(
+                preprocessed_data_list, capacity, self.data, store_path
+            )
+            if offset > 0:
+                buffer[:offset] = self.data
+
+        # fill
+        for preprocessed_data, epoch_len in zip_strict(
+            preprocessed_data_list, epoch_len_list
+        ):
+            data = preprocessed_data.get_mne()
+            end = offset + epoch_len
+            subject_name = preprocessed_data.get_subject_name()
+            session_name = preprocessed_data.get_session_name()
+            self.subject[offset:end] = map_subject[subject_name]
+            self.session[offset:end] = map_session[session_name]
+            self.label[offset:end] = data.events[:, 2]
+            self.idx[offset:end] = np.arange(epoch_len)
+            epoch_data = data.get_data()
+            if epoch_data.shape[1:] != buffer.shape[1:]:
+                raise ValueError(
+                    'Shape of epochs in preprocessed_data_list must be identical, '
+                    f'got {epoch_data.shape[1:]} and {buffer.shape[1:]}.'
+                )
+            buffer[offset:end] = epoch_data
+            offset = end
             self.sfreq = data.info['sfreq']
             self.ch_names = data.info.ch_names.copy()
 
-        self.session_map = {map_session[i]: i for i in map_session}
-        self.subject_map = {map_subject[i]: i for i in map_subject}
+        if store_path is not None:
+            buffer.flush()
+            del buffer
+            buffer = np.load(store_path, mmap_mode='r')
+        self._buffer = buffer
+        self.data = buffer[:n_epochs]
+        self.store_path = store_path
+
+    def _fits(self, n_epochs: int) -> bool:
+        """Return whether n_epochs fit in the existing data storage."""
+        return self.get_data_length() > 0 and n_epochs <= len(self._buffer)
+
+    @staticmethod
+    def _resize(array: np.ndarray, length: int) -> np.ndarray:
+        """Return a copy of 1D array extended to length."""
+        result = np.empty(length, dtype=array.dtype)
+        result[:len(array)] = array
+        return result
+
+    @staticmethod
+    def _allocate_data(
+        preprocessed_data_list: list[Raw],
+        n_epochs: int,
+        old_data: np.ndarray,
+        store_path: str | None
+    ) -> np.ndarray:
+        """Allocate array sized for n_epochs epochs.
+
+        A writable memmap is created if `store_path` is set.
+        """
+        if len(old_data) > 0:
+            shape = (n_epochs, *old_data.shape[1:])
+        elif len(preprocessed_data_list) > 0:
+            sample = preprocessed_data_list[0].get_mne()
+            shape = (n_epochs, len(sample.info.ch_names), len(sample.times))
+        elif store_path is not None:
+            raise ValueError('No preprocessed data to be stored')
+        else:
+            return old_data
+        if store_path is not None:
+            return np.lib.format.open_memmap(
+                store_path, mode='w+', dtype=old_data.dtype, shape=shape
+            )
+        return np.empty(shape, dtype=old_data.dtype)
+
+    def extend(
+        self, preprocessed_data_list: list[Raw], store_path: str | None = None
+    ) -> None:
+        """Append epochs of new preprocessed data, e.g. newly recorded sessions.
+
+        Subject, session and label maps are extended, and labels of the new data
+        are remapped by event name.
+        Datasets registered by :meth:`register_dataset` are notified, and
+        the new epochs are marked as remaining trials of each dataset.
+
+        The storage is grown in place: new storage with spare capacity is
+        allocated only if the new epochs do not fit in the existing one,
+        so that repeated extending copies the existing data only occasionally.
+
+        Args:
+            preprocessed_data_list: List of new preprocessed data.
+            store_path: Path of the new `.npy` file storing all epoch data,
+                        required if the data is stored on disk and
+                        the new epochs do not fit in the existing file.
+                        The existing file is then left untouched,
+                        since it may still be mapped by copies of the epochs.
+        """
+        self._validate(preprocessed_data_list)
+        old_length = self.get_data_length()
+        n_epochs = old_length + sum(
+            preprocessed_data.get_epochs_length()
+            for preprocessed_data in preprocessed_data_list
+        )
+        if self.store_path is not None and not self._fits(n_epochs) and (
+            store_path is None or store_path == self.store_path
+        ):
+            raise ValueError(
+                'A new store_path is required for extending epochs stored on disk.'
+            )
+        for preprocessed_data in preprocessed_data_list:
+            data = preprocessed_data.get_mne()
+            if self.get_data_length() > 0 and (
+                data.info['sfreq'] != self.sfreq or
+                data.info.ch_names != self.ch_names
+            ):
+                raise ValueError(
+                    'Sampling frequency and channels of new preprocessed data '
+                    'must be identical to the existing epochs.'
+                )
+        self._append(preprocessed_data_list, store_path, remap=True, reserve=True)
+        for dataset in list(self.datasets):
+            dataset.append_remaining(self.get_data_length() - old_length)
+
+    def register_dataset(self, dataset: Dataset) -> None:
+        """Register dataset to be notified when the epochs are extended."""
+        self.datasets.add(dataset)
+
+    def __getstate__(self) -> dict:
+        # memory-mapped data is reopened from file instead of being copied
+        state = self.__dict__.copy()
+        if self.store_path is not None:
+            state['data'] = None
+        # spare capacity is owned by the original object only
+        state['_buffer'] = None
+        # datasets register themselves again when copied
+        state['datasets'] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.datasets = weakref.WeakSet()
+        if self.__dict__.get('store_path') is not None:
+            data = np.load(self.store_path, mmap_mode='r')
+            self.data = data[:len(self.label)]
+        self._buffer = self.data
 
     def copy(self) -> Epochs:
-        """Return a copy of the object."""
+        """Return a copy of the object.
+
+        Memory-mapped data is shared instead of copied.
+        """
         return deepcopy(self)
 
     # data splitting
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import numpy as np
+import torch
+import torch.utils.data as Data
+
+
+class EpochsView(Data.Dataset):
+    """Torch dataset view of selected epochs, without copying the epoch data
+
+    Trials are gathered from the shared data array by index only when a batch
+    is requested, so all splits and folds share a single copy of the data.
+    Indexing with a list of positions returns a whole batch, and is used with
+    :class:`torch.utils.data.BatchSampler` as sampler of the data loader.
+
+    For devices other than CPU, the selected trials are transferred to the
+    device once on first use, and batches are indexed on the device.
+
+    Attributes:
+        data: np.ndarray of shape (n_epochs, n_channels, n_times)
+            Shared epoch data
+        index: np.ndarray of shape (n,)
+            Index of the selected epochs in the epoch data
+        label: :class:`torch.Tensor` of shape (n,)
+            Label of the selected epochs, on the target device
+        dev: str
+            Device of the returned tensors
+        tensor: :class:`torch.Tensor` | None
+            Selected epochs on the target device, None until first used
+            or if the device is CPU
+    """
+    def __init__(
+        self, data: np.ndarray, label: np.ndarray, index: np.ndarray, dev: str = 'cpu'
+    ):
+        self.data = data
+        self.index = np.asarray(index, dtype=np.intp)
+        self.dev = dev
+        self.label = torch.as_tensor(
+            np.take(label, self.index), dtype=torch.int64, device=dev
+        )
+        self.tensor = None
+
+    @classmethod
+    def from_mask(
+        cls, data: np.ndarray, label: np.ndarray, mask: np.ndarray, dev: str = 'cpu'
+    ) -> EpochsView:
+        """Create view of the epochs selected by boolean mask"""
+        return cls(data, label, np.flatnonzero(mask), dev)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getstate__(self) -> dict:
+        # tensors on device are not copied
+        state = self.__dict__.copy()
+        state['tensor'] = None
+        return state
+
+    def _gather(self, index: np.ndarray) -> torch.Tensor:
+        """Gather trials from the epoch data as float32 tensor on CPU"""
+        out = np.empty((len(index), *self.data.shape[1:]), dtype=np.float32)
+        np.take(self.data, index, axis=0, out=out)
+        return torch.from_numpy(out)
+
+    def get_tensor(self) -> torch.Tensor:
+        """Return the selected epochs on the device, transferred on first call"""
+        if self.tensor is None:
+            self.tensor = self._gather(self.index).to(self.dev)
+        return self.tensor
+
+    def __getitem__(self, idx):
+        """Return (X, y) of a trial, or of a batch if idx is a sequence"""
+        on_cpu = torch.device(self.dev).type == 'cpu'
+        if np.ndim(idx) == 0:
+            if not on_cpu:
+                return self.get_tensor()[idx], self.label[idx]
+            X = torch.as_tensor(self.data[self.index[idx]], dtype=torch.float32)
+            return X, self.label[idx]
+        idx = np.asarray(idx, dtype=np.intp)
+        if on_cpu:
+            X = self._gather(self.index[idx])
+        else:
+            X = self.get_tensor()[torch.as_tensor(idx, device=self.dev)]
+        return X, self.label[torch.as_tensor(idx, device=self.label.device)]
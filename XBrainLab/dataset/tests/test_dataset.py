@@ -1,3 +1,5 @@
+from copy import deepcopy
+
 import numpy as np
 import pytest
 
@@ -163,3 +165,55 @@ def test_dataset_get_data(
 
 
 
+
+def test_dataset_get_epochs_view(
+    epochs, # noqa: F811
+):
+    config = DataSplittingConfig(TrainingType.IND, False, [], [])
+    dataset = Dataset(epochs, config)
+    mask = np.zeros(epochs.get_data_length(), dtype=bool)
+    mask[:subject_count] = True
+    dataset.set_test(mask)
+    dataset.set_remaining_to_train()
+
+    view = dataset.get_epochs_view('test', 'cpu')
+    assert view.data is epochs.get_data()
+    assert np.array_equal(view.index, np.flatnonzero(mask))
+    assert dataset.get_epochs_view('test', 'cpu') is view
+    assert len(dataset.get_epochs_view('val', 'cpu')) == 0
+    with pytest.raises(ValueError):
+        dataset.get_epochs_view('unknown', 'cpu')
+
+    # invalidated by mask change
+    dataset.test_mask[0] = False
+    assert len(dataset.get_epochs_view('test', 'cpu')) == subject_count - 1
+    train_view = dataset.get_epochs_view('train', 'cpu')
+    dataset.set_val(mask)
+    assert dataset.tensor_cache == {}
+    assert dataset.get_epochs_view('train', 'cpu') is not train_view
+
+    # not copied
+    assert deepcopy(dataset).tensor_cache == {}
+    dataset.clear_tensor_cache()
+    assert dataset.tensor_cache == {}
+
+def test_dataset_append_remaining(
+    epochs, # noqa: F811
+):
+    config = DataSplittingConfig(TrainingType.IND, False, [], [])
+    dataset = Dataset(epochs, config)
+    assert dataset in epochs.datasets
+    length = epochs.get_data_length()
+    mask = np.zeros(length, dtype=bool)
+    mask[:subject_count] = True
+    dataset.set_test(mask)
+    dataset.get_epochs_view('test', 'cpu')
+
+    dataset.append_remaining(3)
+    assert dataset.tensor_cache == {}
+    assert np.array_equal(
+        dataset.get_remaining_mask(), np.concatenate((~mask, [True] * 3))
+    )
+    assert np.array_equal(dataset.test_mask, np.concatenate((mask, [False] * 3)))
+    assert len(dataset.train_mask) == length + 3
+    assert len(dataset.val_mask) == length + 3
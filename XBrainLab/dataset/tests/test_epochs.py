@@ -1,8 +1,17 @@
+import pickle
+from copy import deepcopy
+
 import mne
 import numpy as np
 import pytest
 
-from XBrainLab.dataset import Epochs, SplitUnit
+from XBrainLab.dataset import (
+    Dataset,
+    DataSplittingConfig,
+    Epochs,
+    SplitUnit,
+    TrainingType,
+)
 from XBrainLab.load_data import Raw
 
 epoch_duration = 3
@@ -56,7 +65,7 @@ def test_epochs_args_error():
     info = mne.create_info(ch_names=ch_names, sfreq=fs, ch_types='eeg')
     data = np.zeros((2, 5))
     raw = Raw('test/sub-01_ses-01_task-rest_eeg.fif', mne.io.RawArray(data, info))
-    with pytest.raises(ValueError, match=".*of type epoch."):
+    with pytest.raises(ValueError, match=r".*of type epoch."):
         Epochs([raw])
 
 def test_epochs_subject_attributes(epochs):
@@ -102,6 +111,184 @@ def test_epochs_copy(epochs):
     epochs_copy.sfreq = -1
     assert epochs.sfreq == old_sfreq
 
+def test_epochs_dtype(preprocessed_data_list, epochs):
+    for array in [
+        epochs.get_subject_list(), epochs.get_session_list(),
+        epochs.get_label_list(), epochs.idx
+    ]:
+        assert array.dtype == np.int32
+    assert epochs.get_data().dtype == np.float64
+    n_blocks = len(subject_list) * len(session_list)
+    assert np.array_equal(epochs.idx, np.tile(np.arange(block_size), n_blocks))
+
+    float_epochs = Epochs(preprocessed_data_list, dtype=np.float32)
+    assert float_epochs.get_data().dtype == np.float32
+    assert np.allclose(float_epochs.get_data(), epochs.get_data())
+
+def test_epochs_shape_mismatch(preprocessed_data_list):
+    info = mne.create_info(ch_names=ch_names, sfreq=fs, ch_types='eeg')
+    events = np.zeros((2, 3), dtype=int)
+    events[:, 0] = np.arange(2)
+    mne_data = mne.EpochsArray(np.zeros((2, len(ch_names), 2)), info, events=events)
+    raw = Raw('test/sub-9_ses-1.fif', mne_data)
+    with pytest.raises(ValueError, match=r'.*must be identical.*'):
+        Epochs([*preprocessed_data_list, raw])
+
+def test_epochs_store(tmp_path, preprocessed_data_list, epochs):
+    store_path = str(tmp_path / 'epochs.npy')
+    stored_epochs = Epochs(preprocessed_data_list, store_path=store_path)
+    assert stored_epochs.store_path == store_path
+    assert isinstance(stored_epochs.get_data(), np.memmap)
+    assert not stored_epochs.get_data().flags.writeable
+    assert np.array_equal(stored_epochs.get_data(), epochs.get_data())
+    assert np.array_equal(stored_epochs.get_label_list(), epochs.get_label_list())
+    assert np.array_equal(stored_epochs.get_subject_list(), epochs.get_subject_list())
+    assert stored_epochs.get_model_args() == epochs.get_model_args()
+    assert np.array_equal(np.load(store_path), epochs.get_data())
+
+    epochs_copy = stored_epochs.copy()
+    assert isinstance(epochs_copy.get_data(), np.memmap)
+    assert epochs_copy.get_data().filename == stored_epochs.get_data().filename
+    assert np.array_equal(epochs_copy.get_data(), epochs.get_data())
+
+    epochs_copy = pickle.loads(pickle.dumps(stored_epochs))
+    assert isinstance(epochs_copy.get_data(), np.memmap)
+    assert np.array_equal(epochs_copy.get_data(), epochs.get_data())
+
+    config = DataSplittingConfig(TrainingType.IND, False, [], [])
+    dataset = Dataset(stored_epochs, config)
+    dataset.set_remaining_to_train()
+    X, y = dataset.get_epochs_view('train', 'cpu')[[0, 5]]
+    assert np.array_equal(X.numpy(), epochs.get_data()[[0, 5]].astype(np.float32))
+    assert np.array_equal(y.numpy(), epochs.get_label_list()[[0, 5]])
+
+def test_epochs_store_empty(tmp_path):
+    with pytest.raises(ValueError):
+        Epochs([], store_path=str(tmp_path / 'epochs.npy'))
+
+def test_epochs_extend(preprocessed_data_list, epochs):
+    n_old = 4
+    partial_epochs = Epochs(preprocessed_data_list[:n_old])
+    config = DataSplittingConfig(TrainingType.IND, False, [], [])
+    dataset = Dataset(partial_epochs, config)
+    mask = np.zeros(partial_epochs.get_data_length(), dtype=bool)
+    mask[:block_size] = True
+    dataset.set_test(mask)
+    dataset_copy = deepcopy(dataset)
+
+    partial_epochs.extend(preprocessed_data_list[n_old:])
+    assert np.array_equal(partial_epochs.get_data(), epochs.get_data())
+    assert np.array_equal(partial_epochs.get_subject_list(), epochs.get_subject_list())
+    assert np.array_equal(partial_epochs.get_session_list(), epochs.get_session_list())
+    assert np.array_equal(partial_epochs.get_label_list(), epochs.get_label_list())
+    assert np.array_equal(partial_epochs.idx, epochs.idx)
+    assert partial_epochs.get_subject_map() == epochs.get_subject_map()
+    assert partial_epochs.get_session_map() == epochs.get_session_map()
+    assert partial_epochs.event_id == epochs.event_id
+    assert partial_epochs.get_subject_list().dtype == np.int32
+
+    n_new = block_size * (len(preprocessed_data_list) - n_old)
+    assert len(dataset.remaining_mask) == epochs.get_data_length()
+    assert dataset.remaining_mask[-n_new:].all()
+    assert not dataset.train_mask[-n_new:].any()
+    assert not dataset.val_mask[-n_new:].any()
+    assert not dataset.test_mask[-n_new:].any()
+    assert dataset.test_mask[:block_size].all()
+
+    # copied dataset holds its own copy of epochs
+    epochs_copy = dataset_copy.get_epoch_data()
+    assert epochs_copy.get_data_length() == n_old * block_size
+    assert len(dataset_copy.remaining_mask) == n_old * block_size
+    epochs_copy.extend(preprocessed_data_list[n_old:])
+    assert len(dataset_copy.remaining_mask) == epochs.get_data_length()
+    assert dataset_copy.remaining_mask[-n_new:].all()
+
+def test_epochs_extend_new_event(preprocessed_data_list):
+    epochs = Epochs(preprocessed_data_list[:1])
+    info = mne.create_info(ch_names=ch_names, sfreq=fs, ch_types='eeg')
+    events = np.zeros((2, 3), dtype=int)
+    events[:, 0] = np.arange(2)
+    events[:, 2] = [1, 2]
+    mne_data = mne.EpochsArray(
+        np.zeros((2, len(ch_names), epoch_duration * fs)), info,
+        events=events, event_id={'c2': 1, 'c3': 2}
+    )
+    raw = Raw('test/sub-9_ses-1.fif', mne_data)
+    raw.set_subject_name('9')
+    raw.set_session_name('1')
+    epochs.extend([raw])
+    assert epochs.event_id == {'c1': 0, 'c2': 1, 'c3': 2}
+    assert epochs.get_label_map() == {0: 'c1', 1: 'c2', 2: 'c3'}
+    assert np.array_equal(epochs.get_label_list()[-2:], [1, 2])
+    assert epochs.get_subject_map() == {0: '1', 1: '9'}
+    assert np.array_equal(epochs.get_subject_list()[-2:], [1, 1])
+
+def test_epochs_extend_swapped_event_id(preprocessed_data_list):
+    epochs = Epochs(preprocessed_data_list[:1])
+    info = mne.create_info(ch_names=ch_names, sfreq=fs, ch_types='eeg')
+    events = np.zeros((2, 3), dtype=int)
+    events[:, 0] = np.arange(2)
+    events[:, 2] = [0, 1]
+    mne_data = mne.EpochsArray(
+        np.zeros((2, len(ch_names), epoch_duration * fs)), info,
+        events=events, event_id={'c2': 0, 'c1': 1}
+    )
+    raw = Raw('test/sub-9_ses-1.fif', mne_data)
+    epochs.extend([raw])
+    assert epochs.event_id == event_id
+    assert np.array_equal(epochs.get_label_list()[-2:], [1, 0])
+    assert raw.get_event_list()[1] == {'c2': 1, 'c1': 0}
+
+def test_epochs_extend_in_place(tmp_path, preprocessed_data_list, epochs):
+    partial_epochs = Epochs(preprocessed_data_list[:2])
+    partial_epochs.extend(preprocessed_data_list[2:3])
+    data = partial_epochs.get_data()
+    epochs_copy = partial_epochs.copy()
+    partial_epochs.extend(preprocessed_data_list[3:4])
+    assert np.shares_memory(data, partial_epochs.get_data())
+    partial_epochs.extend(preprocessed_data_list[4:])
+    assert np.array_equal(partial_epochs.get_data(), epochs.get_data())
+    # spare capacity is not shared with copies
+    epochs_copy.extend(preprocessed_data_list[5:])
+    assert not np.shares_memory(data, epochs_copy.get_data())
+    assert np.array_equal(partial_epochs.get_data(), epochs.get_data())
+
+    store_path = str(tmp_path / 'epochs.npy')
+    new_store_path = str(tmp_path / 'epochs-1.npy')
+    stored_epochs = Epochs(preprocessed_data_list[:2], store_path=store_path)
+    stored_epochs.extend(preprocessed_data_list[2:3], store_path=new_store_path)
+    epochs_copy = stored_epochs.copy()
+    stored_epochs.extend(preprocessed_data_list[3:4])
+    assert stored_epochs.store_path == new_store_path
+    assert isinstance(stored_epochs.get_data(), np.memmap)
+    assert not stored_epochs.get_data().flags.writeable
+    assert np.array_equal(
+        stored_epochs.get_data(), epochs.get_data()[:block_size * 4]
+    )
+    with pytest.raises(ValueError, match=r'.*store_path is required.*'):
+        epochs_copy.extend(preprocessed_data_list[3:4])
+    assert epochs_copy.get_data_length() == block_size * 3
+    assert pickle.loads(pickle.dumps(stored_epochs)).get_data_length() == \
+        block_size * 4
+
+def test_epochs_extend_error(tmp_path, preprocessed_data_list):
+    epochs = Epochs(preprocessed_data_list[:1])
+    info = mne.create_info(ch_names=ch_names, sfreq=fs * 2, ch_types='eeg')
+    mne_data = mne.EpochsArray(np.zeros((1, len(ch_names), epoch_duration * fs)), info)
+    with pytest.raises(ValueError, match=r'.*must be identical.*'):
+        epochs.extend([Raw('test/sub-9_ses-1.fif', mne_data)])
+
+    store_path = str(tmp_path / 'epochs.npy')
+    epochs = Epochs(preprocessed_data_list[:1], store_path=store_path)
+    with pytest.raises(ValueError, match=r'.*store_path is required.*'):
+        epochs.extend(preprocessed_data_list[1:])
+    new_store_path = str(tmp_path / 'epochs-1.npy')
+    epochs.extend(preprocessed_data_list[1:], store_path=new_store_path)
+    assert epochs.store_path == new_store_path
+    assert isinstance(epochs.get_data(), np.memmap)
+    assert epochs.get_data_length() == block_size * len(preprocessed_data_list)
+    assert len(np.load(store_path)) == block_size
+
 def test_epochs_get_by_mask(epochs):
     mask = np.zeros(block_size * len(subject_list) * len(session_list), dtype=bool)
     mask[block_size:block_size * 2] = True
@@ -0,0 +1,81 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+import torch
+
+from XBrainLab.dataset import EpochsView
+from XBrainLab.utils import zip_strict
+
+
+@pytest.fixture
+def data():
+    return np.arange(10 * 2 * 3, dtype=np.float64).reshape(10, 2, 3)
+
+@pytest.fixture
+def label():
+    return np.arange(10) % 3
+
+@pytest.fixture
+def mask():
+    mask = np.zeros(10, dtype=bool)
+    mask[[1, 4, 5, 8]] = True
+    return mask
+
+def test_epochs_view(data, label, mask):
+    view = EpochsView.from_mask(data, label, mask)
+    assert len(view) == 4
+    assert view.data is data
+    assert np.array_equal(view.index, [1, 4, 5, 8])
+
+    X, y = view[1]
+    assert X.dtype == torch.float32
+    assert torch.equal(X, torch.tensor(data[4], dtype=torch.float32))
+    assert y == label[4]
+
+    X, y = view[[3, 0, 2]]
+    assert X.shape == (3, 2, 3)
+    assert X.dtype == torch.float32
+    assert y.dtype == torch.int64
+    assert np.array_equal(X.numpy(), data[[8, 1, 5]].astype(np.float32))
+    assert np.array_equal(y.numpy(), label[[8, 1, 5]])
+
+def test_epochs_view_batch_not_shared(data, label, mask):
+    view = EpochsView.from_mask(data, label, mask)
+    X, _ = view[[0, 1]]
+    view[[2, 3]]
+    assert np.array_equal(X.numpy(), data[[1, 4]].astype(np.float32))
+    assert view.tensor is None
+
+def test_epochs_view_device_tensor(data, label, mask):
+    # transferred to the device once, and indexed on the device
+    view = EpochsView.from_mask(data, label, mask, 'meta')
+    X, y = view[[3, 0, 2]]
+    assert X.is_meta
+    assert y.is_meta
+    assert X.shape == (3, 2, 3)
+    tensor = view.tensor
+    assert tensor.shape == (4, 2, 3)
+    assert tensor.dtype == torch.float32
+    view[[1, 2]]
+    X, _ = view[1]
+    assert X.shape == (2, 3)
+    assert view.tensor is tensor
+    assert view.get_tensor() is tensor
+
+def test_epochs_view_copy(data, label, mask):
+    view = EpochsView.from_mask(data, label, mask)
+    view.get_tensor()
+    copied = deepcopy(view)
+    assert copied.tensor is None
+    assert np.array_equal(copied.index, view.index)
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason='CUDA is not available')
+def test_epochs_view_cuda(data, label, mask):
+    view = EpochsView.from_mask(data, label, mask, 'cuda')
+    batches = [view[[0, 1]], view[[2, 3]], view[[1, 2]]]
+    for (X, y), idx in zip_strict(batches, [[1, 4], [5, 8], [4, 5]]):
+        assert X.is_cuda
+        assert y.is_cuda
+        assert np.array_equal(X.cpu().numpy(), data[idx].astype(np.float32))
+    assert view.tensor.is_cuda
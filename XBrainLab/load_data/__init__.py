@@ -1,9 +1,16 @@
+from .array_file import ArrayDict, load_array_dict, load_npy
 from .data_loader import RawDataLoader
 from .event_loader import EventLoader
-from .raw import Raw
+from .file_reader import ConcurrentFileReader
+from .raw import Raw, RawMetadata
 
 __all__ = [
     'Raw',
+    'RawMetadata',
     'RawDataLoader',
-    'EventLoader'
+    'EventLoader',
+    'ConcurrentFileReader',
+    'ArrayDict',
+    'load_array_dict',
+    'load_npy'
 ]
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import os
+import struct
+import zipfile
+from collections.abc import Iterator, Mapping
+
+import h5py
+import numpy as np
+import scipy.io
+
+# size of zip local file header before the file name and extra field
+ZIP_LOCAL_HEADER_SIZE = 30
+# MATLAB v7.3 files are HDF5 files
+MAT_HDF5_VERSION = 2
+
+
+def _read_npy_header(f) -> tuple[tuple[int, ...], bool, np.dtype]:
+    """Read (shape, fortran order, dtype) from the header of a ``.npy`` stream."""
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(f)
+    return np.lib.format.read_array_header_2_0(f)
+
+def load_npy(filepath: str) -> np.ndarray:
+    """Memory-map array from ``.npy`` file.
+
+    The returned array is read-only, and read from disk on access.
+    """
+    return np.load(filepath, mmap_mode='r')
+
+
+class ArrayDict(Mapping):
+    """Base class for reading variables of array files on demand.
+
+    Unlike loading the whole file, only the accessed variable is read,
+    and shapes of variables are read from the file header.
+    Variables stored contiguously without compression are memory-mapped.
+
+    Attributes:
+        filepath: str
+            Path of the file.
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._get_keys())
+
+    def __len__(self) -> int:
+        return len(self._get_keys())
+
+    def __contains__(self, key: object) -> bool:
+        # without reading the data
+        return key in self._get_keys()
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key not in self._get_keys():
+            raise KeyError(key)
+        return self._read(key)
+
+    def get_shape(self, key: str) -> tuple[int, ...]:
+        """Return the shape of the variable without reading its data."""
+        return self._get_keys()[key]
+
+    def _get_keys(self) -> dict[str, tuple[int, ...]]: # for overriding
+        """Return dict of variable names and their shapes."""
+        raise NotImplementedError
+
+    def _read(self, key: str) -> np.ndarray: # for overriding
+        raise NotImplementedError
+
+
+class NpzArrayDict(ArrayDict):
+    """Class for reading variables of ``.npz`` files on demand.
+
+    Variables saved by :func:`numpy.savez` are memory-mapped,
+    while compressed variables are decompressed on access.
+
+    Attributes:
+        members: dict[str, zipfile.ZipInfo]
+            Zip member of each variable.
+        headers: dict[str, tuple[tuple[int, ...], bool, numpy.dtype]]
+            (shape, fortran order, dtype) of each variable.
+    """
+    def __init__(self, filepath: str):
+        super().__init__(filepath)
+        self.members = {}
+        self.headers = {}
+        with zipfile.ZipFile(filepath) as zf:
+            for member in zf.infolist():
+                if not member.filename.endswith('.npy'):
+                    continue
+                key = member.filename[:-len('.npy')]
+                with zf.open(member) as f:
+                    self.headers[key] = _read_npy_header(f)
+                self.members[key] = member
+
+    def _get_keys(self) -> dict[str, tuple[int, ...]]:
+        return {key: header[0] for key, header in self.headers.items()}
+
+    def _get_data_offset(self, member: zipfile.ZipInfo) -> int:
+        """Return the offset of the array data of an uncompressed member."""
+        with open(self.filepath, 'rb') as f:
+            f.seek(member.header_offset)
+            local_header = f.read(ZIP_LOCAL_HEADER_SIZE)
+            name_len, extra_len = struct.unpack('<HH', local_header[26:30])
+            f.seek(member.header_offset + ZIP_LOCAL_HEADER_SIZE + name_len + extra_len)
+            _read_npy_header(f)
+            return f.tell()
+
+    def _read(self, key: str) -> np.ndarray:
+        member = self.members[key]
+        shape, fortran_order, dtype = self.headers[key]
+        if member.compress_type != zipfile.ZIP_STORED or dtype.hasobject:
+            with np.load(self.filepath) as npz:
+                return npz[key]
+        return np.memmap(
+            self.filepath, dtype=dtype, mode='r', shape=shape,
+            order='F' if fortran_order else 'C',
+            offset=self._get_data_offset(member)
+        )
+
+
+class MatArrayDict(ArrayDict):
+    """Class for reading variables of MATLAB ``.mat`` files before v7.3 on demand.
+
+    Attributes:
+        shapes: dict[str, tuple[int, ...]]
+            Shape of each variable.
+    """
+    def __init__(self, filepath: str):
+        super().__init__(filepath)
+        self.shapes = {
+            name: tuple(shape) for name, shape, _ in scipy.io.whosmat(filepath)
+        }
+
+    def _get_keys(self) -> dict[str, tuple[int, ...]]:
+        return self.shapes
+
+    def _read(self, key: str) -> np.ndarray:
+        return scipy.io.loadmat(self.filepath, variable_names=[key])[key]
+
+
+class HDF5MatArrayDict(ArrayDict):
+    """Class for reading variables of MATLAB v7.3 ``.mat`` (HDF5) files on demand.
+
+    MATLAB stores arrays in column-major order, so variables are returned
+    as transposed views, with the same shape as in MATLAB.
+    Contiguous datasets without compression are memory-mapped.
+
+    Attributes:
+        shapes: dict[str, tuple[int, ...]]
+            Shape of each variable.
+    """
+    def __init__(self, filepath: str):
+        super().__init__(filepath)
+        self.shapes = {}
+        with h5py.File(filepath, 'r') as f:
+            for name, dataset in f.items():
+                # skip groups, e.g. struct and #refs#
+                if isinstance(dataset, h5py.Dataset):
+                    self.shapes[name] = dataset.shape[::-1]
+
+    def _get_keys(self) -> dict[str, tuple[int, ...]]:
+        return self.shapes
+
+    def _read(self, key: str) -> np.ndarray:
+        with h5py.File(self.filepath, 'r') as f:
+            dataset = f[key]
+            offset = dataset.id.get_offset()
+            # chunked datasets, e.g. compressed, are not contiguous on disk
+            if offset is None or dataset.chunks is not None or dataset.dtype.hasobject:
+                return dataset[()].T
+            return np.memmap(
+                self.filepath, dtype=dataset.dtype, mode='r',
+                shape=dataset.shape, offset=offset
+            ).T
+
+
+def load_array_dict(filepath: str) -> ArrayDict:
+    """Open ``.npz`` or ``.mat`` file for reading its variables on demand.
+
+    Args:
+        filepath: Path of the file.
+
+    Raises:
+        ValueError: If the file type is not supported.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.npz':
+        return NpzArrayDict(filepath)
+    if ext == '.mat':
+        if scipy.io.matlab.matfile_version(filepath)[0] == MAT_HDF5_VERSION:
+            return HDF5MatArrayDict(filepath)
+        return MatArrayDict(filepath)
+    raise ValueError(f"Unsupported file type: {ext}")
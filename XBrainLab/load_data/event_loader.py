@@ -1,11 +1,31 @@
 from __future__ import annotations
 
+import re
+from typing import TextIO
+
 import numpy as np
 import scipy.io
 
 from ..utils import validate_type
 from .raw import Raw
 
+# size of text chunks parsed at once when reading label files
+TXT_CHUNK_SIZE = 1 << 20
+# last token of a text chunk, which may continue in the next chunk
+TRAILING_TOKEN = re.compile(r'\S*\Z')
+
+
+def _parse_labels(text: str) -> np.ndarray:
+    """Parse event codes separated by whitespace.
+
+    Raises:
+        ValueError: If the text contains tokens other than integers.
+    """
+    try:
+        return np.asarray(text.split(), dtype=np.int64)
+    except ValueError as e:
+        raise ValueError("Event codes should be integers.") from e
+
 
 class EventLoader:
     """Helper class for loading event data.
@@ -13,8 +33,8 @@ class EventLoader:
     Attributes:
         raw: :class:`Raw`
             Raw data.
-        label_list: List[int] | None
-            List of event codes.
+        label_list: numpy.ndarray | None
+            Array of event codes.
         events: list[list[int]] | None
             Event array. Same as `mne` format.
         event_id: dict[str, int] | None
@@ -28,26 +48,48 @@ class EventLoader:
         self.events = None
         self.event_id = None
 
-    def read_txt(self, selected_file: str) -> list:
+    def read_txt(
+        self, selected_file: str | TextIO, chunk_size: int = TXT_CHUNK_SIZE
+    ) -> np.ndarray:
         """Read and set event data from txt file.
 
         The txt file should contain a list of event codes, separated by space.
+        The file is parsed in chunks, so large or streamed files are
+        not held in memory as text.
 
         Args:
-            selected_file: Path to the txt file.
+            selected_file: Path to the txt file, or opened text stream.
+            chunk_size: Number of characters parsed at once.
 
         Returns:
-            List of event codes.
+            Array of event codes.
         """
-        label_list = []
-        with open(selected_file, encoding='utf-8') as fp:
-            for line in fp.readlines():
-                # for both (n,1) and (1,n) of labels
-                label_list += [int(segment.rstrip()) for segment in line.split(' ')]
-            fp.close()
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if hasattr(selected_file, 'read'):
+            label_list = self._read_txt_stream(selected_file, chunk_size)
+        else:
+            with open(selected_file, encoding='utf-8') as fp:
+                label_list = self._read_txt_stream(fp, chunk_size)
         self.label_list = label_list
         return label_list
 
+    def _read_txt_stream(self, fp: TextIO, chunk_size: int) -> np.ndarray:
+        """Parse event codes from text stream chunk by chunk."""
+        label_chunks = []
+        remainder = ''
+        while True:
+            text = fp.read(chunk_size)
+            if not text:
+                break
+            text = remainder + text
+            # for both (n,1) and (1,n) of labels
+            split_idx = TRAILING_TOKEN.search(text).start()
+            label_chunks.append(_parse_labels(text[:split_idx]))
+            remainder = text[split_idx:]
+        label_chunks.append(_parse_labels(remainder))
+        return np.concatenate(label_chunks)
+
     def read_mat(self, selected_file: str) -> list:
         """Read event data from mat file..
 
@@ -59,27 +101,27 @@ class EventLoader:
         """
         mat_content = scipy.io.loadmat(selected_file)
         return mat_content
-    def from_mat(self, label_list) -> list:
+    def from_mat(self, label_list) -> np.ndarray:
         """Set event data from mat file..
 
         Args:
             label_list: content from mat under selected variable
         """
-        label_list = label_list.astype(np.int32)
+        label_list = np.asarray(label_list)
         # for (n,1) and (1,n) of labels
         if len(label_list.shape) == 2:
             if label_list.shape[0] == 1:
-                self.label_list = label_list[0].tolist()
+                self.label_list = label_list[0].astype(np.int32)
             elif label_list.shape[1] == 1:
-                self.label_list = label_list[:, 0].tolist()
+                self.label_list = label_list[:, 0].astype(np.int32)
         # (n, 3)
         # according to https://mne.tools/stable/documentation/glossary.html#term-events
             else:
-                assert label_list.shape[1] == 3, "Event array should have 3 columns." 
-                self.label_list = label_list[:, -1].tolist()
+                assert label_list.shape[1] == 3, "Event array should have 3 columns."
+                self.label_list = label_list[:, -1].astype(np.int32)
         # (n,)
         elif len(label_list.shape) == 1:
-            self.label_list = label_list.tolist()
+            self.label_list = label_list.astype(np.int32)
         else:
             raise ValueError("Either 1d or 2d array is expected.")
         return self.label_list
@@ -99,7 +141,7 @@ class EventLoader:
                 if not event_name_map[e].strip():
                     raise ValueError("Event name cannot be empty.")
 
-            self.label_list = np.array(self.label_list)
+            self.label_list = np.asarray(self.label_list)
             # label_list in (n,3) format
             if len(self.label_list.shape) > 1:
                 # get new event id mapping
@@ -112,9 +154,9 @@ class EventLoader:
             else:
                 # get new event id mapping
                 event_id = {event_name_map[i]: i for i in np.unique(self.label_list)}
-                # create new event array
-                events = np.zeros((len(self.label_list), 3))
-                events[:, 0] = range(len(self.label_list))
+                # create new event array, integer as required by mne
+                events = np.zeros((len(self.label_list), 3), dtype=np.int64)
+                events[:, 0] = np.arange(len(self.label_list))
                 events[:, -1] = self.label_list
                 print(
                     'UserWarning: Event array created without onset timesample. '
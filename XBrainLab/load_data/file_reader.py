@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+
+class ConcurrentFileReader:
+    """Helper class for reading files on a pool of worker threads.
+
+    Reading starts on creation. Results are collected in the order of the
+    given files as soon as they are available, so they can be handled
+    incrementally while keeping the order of reading files one by one.
+    The read function should not access the UI, since it runs on worker threads.
+
+    Attributes:
+        filepaths: list[str]
+            Files to be read.
+        executor: :class:`concurrent.futures.ThreadPoolExecutor`
+            Worker pool reading the files.
+        futures: list[:class:`concurrent.futures.Future`]
+            Futures of reading each file.
+        next_idx: int
+            Index of the next file to be collected.
+        cancelled: bool
+            Whether reading has been cancelled.
+    """
+    def __init__(
+        self,
+        read_func: Callable[[str], Any],
+        filepaths: list[str],
+        num_workers: int | None = None
+    ):
+        self.filepaths = list(filepaths)
+        self.executor = ThreadPoolExecutor(max_workers=num_workers)
+        self.futures: list[Future] = [
+            self.executor.submit(read_func, filepath) for filepath in self.filepaths
+        ]
+        self.next_idx = 0
+        self.cancelled = False
+
+    def iter_ready(self) -> Iterator[tuple[str, Any]]:
+        """Yield (filepath, result) of files read so far, in the given order.
+
+        Stops at the first file still being read.
+
+        Raises:
+            Exception: The error raised when reading the next file.
+                       The remaining files are cancelled.
+        """
+        while not self.is_finished() and self.futures[self.next_idx].done():
+            future = self.futures[self.next_idx]
+            filepath = self.filepaths[self.next_idx]
+            self.next_idx += 1
+            try:
+                result = future.result()
+            except Exception:
+                self.cancel()
+                raise
+            yield filepath, result
+
+    def get_progress(self) -> tuple[int, int]:
+        """Return the number of files read and the total number of files."""
+        return sum(future.done() for future in self.futures), len(self.futures)
+
+    def is_finished(self) -> bool:
+        """Return whether all results are collected or reading is cancelled."""
+        return self.cancelled or self.next_idx >= len(self.futures)
+
+    def cancel(self) -> None:
+        """Cancel files not yet read and release the worker pool.
+
+        Results of files being read are discarded.
+        """
+        self.cancelled = True
+        for future in self.futures:
+            future.cancel()
+        self.executor.shutdown(wait=False)
@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 import re
 import traceback
+from copy import deepcopy
 from enum import Enum
 
 import mne
@@ -18,6 +19,47 @@ class FilenameGroupKey(Enum):
     SUBJECT = 'subject'
     SESSION = 'session'
 
+class RawMetadata:
+    """Class for storing header information of :class:`Raw`.
+
+    Read from the info and times of the mne data, without loading the data.
+
+    Attributes:
+        n_times: int
+            Number of samples of the raw data, or of each epoch.
+        n_epochs: int
+            Number of epochs. 1 for unsegmented raw data.
+        nchan: int
+            Number of channels.
+        sfreq: float
+            Sample frequency.
+        dtype: :class:`numpy.dtype`
+            Data type of the loaded data. float64 if the data is not loaded,
+            same as the data type of data loaded by `mne`.
+    """
+
+    def __init__(
+        self, n_times: int, n_epochs: int, nchan: int, sfreq: float, dtype: np.dtype
+    ):
+        self.n_times = n_times
+        self.n_epochs = n_epochs
+        self.nchan = nchan
+        self.sfreq = sfreq
+        self.dtype = dtype
+
+    @classmethod
+    def from_mne(cls, mne_data: mne.io.BaseRaw | mne.BaseEpochs) -> RawMetadata:
+        """Create metadata from the header of mne data."""
+        is_raw = isinstance(mne_data, mne.io.BaseRaw)
+        data = getattr(mne_data, '_data', None)
+        return cls(
+            n_times=len(mne_data.times),
+            n_epochs=1 if is_raw else len(mne_data.events),
+            nchan=mne_data.info['nchan'],
+            sfreq=mne_data.info['sfreq'],
+            dtype=data.dtype if isinstance(data, np.ndarray) else np.dtype(np.float64)
+        )
+
 class Raw:
     """Class for storing raw data.
 
@@ -40,6 +82,16 @@ class Raw:
             Subject name.
         session: str
             Session name.
+        cache_key: str | None
+            Key of the current data in :class:`XBrainLab.preprocessor.PreprocessCache`.
+            None if the data are not preprocessed with cache.
+        metadata: :class:`RawMetadata` | None
+            Header information of :attr:`mne_data`.
+            Computed on first access and refreshed when :attr:`mne_data` is set.
+        raw_event_list: tuple[list[list[int]], dict[str, int]] | None
+            Events extracted from :attr:`mne_data`.
+            Computed on first access and refreshed when :attr:`mne_data`
+            or the events are set.
     """
 
     def __init__(self, filepath: str, mne_data: mne.io.BaseRaw | mne.BaseEpochs):
@@ -52,6 +104,11 @@ class Raw:
         self.raw_event_id = None
         self.subject = 0
         self.session = 0
+        self.cache_key = None
+        self.metadata = None
+        self.raw_event_list = None
+        # whether the data array is shared with copies
+        self._shares_data = False
 
     def get_filepath(self) -> str:
         """Return the filepath of the raw data."""
@@ -121,6 +178,7 @@ class Raw:
             self.mne_data.event_id = event_id
         self.raw_events = events
         self.raw_event_id = event_id
+        self.raw_event_list = None
 
     def set_mne(self, data: mne.io.BaseRaw | mne.BaseEpochs) -> None:
         """Set new mne data.
@@ -144,6 +202,10 @@ class Raw:
             self.raw_events = None
             self.raw_event_id = None
         self.mne_data = data
+        self._shares_data = False
+        self.cache_key = None
+        self.metadata = None
+        self.raw_event_list = None
 
     def set_mne_and_wipe_events(self, data: mne.io.BaseRaw | mne.BaseEpochs) -> None:
         """Set new mne data and wipe loaded event.
@@ -154,12 +216,62 @@ class Raw:
         self.raw_events = None
         self.raw_event_id = None
         self.mne_data = data
+        self._shares_data = False
+        self.cache_key = None
+        self.metadata = None
+        self.raw_event_list = None
+
+    def copy(self) -> Raw:
+        """Return a copy sharing the signal data until it is modified.
+
+        Metadata, such as info, events and preprocess history, are copied,
+        while the copy holds a read-only view of the preloaded data array.
+        The data array of this instance is left writable.
+        Modifying the data of either instance in place requires calling
+        :meth:`ensure_writable` first, which copies the data array of that
+        instance only.
+        """
+        memo = {}
+        data = getattr(self.mne_data, '_data', None)
+        if isinstance(data, np.ndarray):
+            view = data.view()
+            view.flags.writeable = False
+            memo[id(data)] = view
+            self._shares_data = True
+        return deepcopy(self, memo)
+
+    def ensure_writable(self) -> None:
+        """Copy the preloaded data array if it is shared or read-only.
+
+        Should be called before modifying the data of :attr:`mne_data` in place.
+        """
+        data = getattr(self.mne_data, '_data', None)
+        if isinstance(data, np.ndarray) and (
+            getattr(self, '_shares_data', False) or not data.flags.writeable
+        ):
+            self.mne_data._data = np.array(data)
+        self._shares_data = False
 
     # mne related functions
     def get_mne(self) -> mne.io.BaseRaw | mne.BaseEpochs:
         """Return the loaded data from MNE."""
         return self.mne_data
 
+    def get_metadata(self) -> RawMetadata:
+        """Return the header information of :attr:`mne_data`."""
+        if self.metadata is None:
+            self.metadata = RawMetadata.from_mne(self.mne_data)
+        return self.metadata
+
+    def update_metadata(self) -> None:
+        """Refresh the header information and the extracted events.
+
+        Should be called after modifying :attr:`mne_data` in place,
+        e.g. picking channels.
+        """
+        self.metadata = None
+        self.raw_event_list = None
+
     def get_tmin(self) -> float:
         """Return the tmin of :attr:`mne_data`."""
         if self.is_raw():
@@ -168,11 +280,11 @@ class Raw:
 
     def get_nchan(self) -> int:
         """Return the number of channels of :attr:`mne_data`."""
-        return self.mne_data.info['nchan']
+        return self.get_metadata().nchan
 
     def get_sfreq(self) -> float:
         """Return the sample frequency of :attr:`mne_data`."""
-        return self.mne_data.info['sfreq']
+        return self.get_metadata().sfreq
 
     def get_filter_range(self) -> tuple[float, float]:
         """Return the filter range of :attr:`mne_data`."""
@@ -180,13 +292,18 @@ class Raw:
 
     def get_epochs_length(self) -> int:
         """Return the number of epochs."""
-        if self.is_raw():
-            return 1
-        return len(self.mne_data.events)
+        return self.get_metadata().n_epochs
 
     def get_epoch_duration(self) -> int:
-        """Return the duration of each epoch in samples."""
-        return self.mne_data.get_data().shape[-1]
+        """Return the duration of each epoch in samples.
+
+        Read from the header, without loading the data.
+        """
+        return self.get_metadata().n_times
+
+    def get_dtype(self) -> np.dtype:
+        """Return the data type of the data."""
+        return self.get_metadata().dtype
 
     def is_raw(self) -> bool:
         """Return whether the data is unsegmented raw data."""
@@ -197,9 +314,17 @@ class Raw:
         """Return the event list and event id of the raw data
            directly from the :attr:`mne_data`.
 
+        Extracted once and cached, should not be modified in place.
+
         Returns:
             (events, event_id)
         """
+        if self.raw_event_list is None:
+            self.raw_event_list = self._extract_raw_event_list()
+        return self.raw_event_list
+
+    def _extract_raw_event_list(self) -> tuple[list[list[int]], dict[str, int]]:
+        """Extract events from epochs, stim channel or annotations."""
         # epoch data
         try:
             if self.mne_data.event_id:
@@ -0,0 +1,101 @@
+import h5py
+import mne
+import numpy as np
+import pytest
+import scipy.io
+
+from XBrainLab.load_data import load_array_dict, load_npy
+from XBrainLab.load_data.array_file import (
+    HDF5MatArrayDict,
+    MatArrayDict,
+    NpzArrayDict,
+)
+
+
+@pytest.fixture
+def data():
+    return np.random.RandomState(0).randn(4, 3, 10)
+
+@pytest.fixture
+def label():
+    return np.arange(4)
+
+def _save_mat_v73(filepath, variables):
+    # HDF5 file with MATLAB header in the user block, arrays in column-major order
+    with h5py.File(filepath, 'w', userblock_size=512) as f:
+        for key, value in variables.items():
+            f.create_dataset(key, data=value.T, **(
+                {'compression': 'gzip'} if key.startswith('compressed') else {}
+            ))
+    header = b'MATLAB 7.3 MAT-file'.ljust(116) + b'\0' * 8 + b'\x00\x02IM'
+    with open(filepath, 'r+b') as f:
+        f.write(header)
+
+def test_load_npy(tmp_path, data):
+    filepath = str(tmp_path / 'data.npy')
+    np.save(filepath, data)
+    result = load_npy(filepath)
+    assert isinstance(result, np.memmap)
+    assert not result.flags.writeable
+    assert np.array_equal(result, data)
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_load_npz(tmp_path, data, label, compressed):
+    filepath = str(tmp_path / 'data.npz')
+    save = np.savez_compressed if compressed else np.savez
+    save(filepath, data=data, label=label, fortran=np.asfortranarray(data))
+    result = load_array_dict(filepath)
+    assert isinstance(result, NpzArrayDict)
+    assert set(result) == {'data', 'label', 'fortran'}
+    assert 'data' in result
+    assert 'other' not in result
+    assert result.get_shape('data') == data.shape
+    assert result.get_shape('label') == label.shape
+    assert isinstance(result['data'], np.memmap) != compressed
+    assert np.array_equal(result['data'], data)
+    assert np.array_equal(result['fortran'], data)
+    assert np.array_equal(result['label'], label)
+    with pytest.raises(KeyError):
+        result['other']
+
+def test_load_mat(tmp_path, data, label, mocker):
+    filepath = str(tmp_path / 'data.mat')
+    scipy.io.savemat(filepath, {'data': data, 'label': label})
+    loadmat = mocker.spy(scipy.io, 'loadmat')
+    result = load_array_dict(filepath)
+    assert isinstance(result, MatArrayDict)
+    assert set(result) == {'data', 'label'}
+    assert result.get_shape('data') == data.shape
+    assert result.get_shape('label') == (1, len(label))
+    loadmat.assert_not_called()
+    assert np.array_equal(result['label'].squeeze(), label)
+    assert loadmat.call_args.kwargs['variable_names'] == ['label']
+
+def test_load_mat_v73(tmp_path, data, label):
+    filepath = str(tmp_path / 'data.mat')
+    _save_mat_v73(
+        filepath,
+        {'data': data, 'label': label[None], 'compressed_data': data}
+    )
+    result = load_array_dict(filepath)
+    assert isinstance(result, HDF5MatArrayDict)
+    assert set(result) == {'data', 'label', 'compressed_data'}
+    assert result.get_shape('data') == data.shape
+    assert result.get_shape('label') == (1, len(label))
+    assert isinstance(result['data'], np.memmap)
+    assert np.array_equal(result['data'], data)
+    assert not isinstance(result['compressed_data'], np.memmap)
+    assert np.array_equal(result['compressed_data'], data)
+    assert np.array_equal(result['label'].squeeze(), label)
+
+def test_load_array_dict_unsupported(tmp_path):
+    with pytest.raises(ValueError, match='Unsupported file type'):
+        load_array_dict(str(tmp_path / 'data.txt'))
+
+def test_epochs_array_shares_memory(tmp_path, data):
+    filepath = str(tmp_path / 'data.npz')
+    np.savez(filepath, data=data)
+    array = load_array_dict(filepath)['data']
+    info = mne.create_info(data.shape[1], 100, 'eeg')
+    epochs = mne.EpochsArray(array, info)
+    assert np.shares_memory(epochs._data, array)
@@ -3,7 +3,7 @@ import numpy as np
 import pytest
 
 from XBrainLab import Study
-from XBrainLab.load_data import Raw, RawDataLoader
+from XBrainLab.load_data import Raw, RawDataLoader, RawMetadata
 
 from .test_raw import _generate_mne, _set_event
 
@@ -98,3 +98,40 @@ def test_apply():
 
     lab = Study()
     RawDataLoader([raw]).apply(lab)
+
+def test_raw_data_loader_lazy(tmp_path, mocker):
+    raw_list = []
+    for i in range(2):
+        path = str(tmp_path / f'sub-0{i}_raw.fif')
+        _generate_mne(500, ['Fp1', 'Fp2', 'F3', 'F4'], 'eeg').save(path)
+        raw = Raw(path, mne.io.read_raw_fif(path, preload=False))
+        _set_event(raw)
+        raw_list.append(raw)
+    load_data = mocker.spy(mne.io.BaseRaw, 'load_data')
+    data_loader = RawDataLoader(raw_list[:1])
+    data_loader.append(raw_list[1])
+    data_loader.validate()
+    for raw in raw_list:
+        assert raw.get_row_info()[3:] == (4, 500, 1, 'yes')
+        assert not raw.get_mne().preload
+    load_data.assert_not_called()
+
+    study = Study()
+    data_loader.apply(study)
+    assert not study.preprocessed_data_list[0].get_mne().preload
+
+def test_raw_data_loader_validate_header_only(mocker):
+    raw_list = []
+    for i in range(3):
+        raw_mne = _generate_mne(500, ['Fp1', 'Fp2', 'F3', 'F4'], 'eeg')
+        raw = _generate_epoch(str(i), raw_mne, 0.1)
+        _set_event(raw)
+        raw_list.append(raw)
+    get_data = mocker.spy(mne.BaseEpochs, 'get_data')
+    data_loader = RawDataLoader(raw_list)
+    data_loader.validate()
+    get_data.assert_not_called()
+    # metadata computed once for each file
+    from_mne = mocker.spy(RawMetadata, 'from_mne')
+    data_loader.validate()
+    from_mne.assert_not_called()
@@ -1,3 +1,6 @@
+import io
+import re
+
 import numpy as np
 import pytest
 
@@ -23,7 +26,7 @@ def test_event_loader(raw): # noqa: F811
     _set_event(raw)
     event_loader = EventLoader(raw)
 
-    with pytest.raises(ValueError, match='No label has been loaded.'):
+    with pytest.raises(ValueError, match=re.escape('No label has been loaded.')):
         event_loader.create_event({})
 
     with pytest.raises(AssertionError):
@@ -32,7 +35,7 @@ def test_event_loader(raw): # noqa: F811
 def _create_event(event_loader, raw): # noqa: F811
     with pytest.raises(AssertionError):
         event_loader.apply()
-    with pytest.raises(ValueError, match='Event name cannot be empty.'):
+    with pytest.raises(ValueError, match=re.escape('Event name cannot be empty.')):
         event_loader.create_event({0: ''})
 
     event_loader.create_event({1: 'new 1', 2: 'new 2', 3: 'new 3', 4: 'new 4'})
@@ -51,6 +54,58 @@ def test_load_txt(raw, mock_txt): # noqa: F811
     event_loader.read_txt('tests/0.txt')
     _create_event(event_loader, raw)
 
+@pytest.mark.parametrize('chunk_size', [1, 3, 1024])
+@pytest.mark.parametrize('text', [
+    '1 2 3 4', '1\n2\n3\n4\n', '1 2\n3 4', '  1  2 \t 3\r\n4\n\n'
+])
+def test_load_txt_chunked(raw, tmp_path, text, chunk_size): # noqa: F811
+    filepath = tmp_path / 'label.txt'
+    filepath.write_text(text, encoding='utf-8')
+    event_loader = EventLoader(raw)
+    label_list = event_loader.read_txt(str(filepath), chunk_size=chunk_size)
+    assert np.array_equal(label_list, [1, 2, 3, 4])
+    _create_event(event_loader, raw)
+
+def test_load_txt_stream(raw): # noqa: F811
+    label_list = np.random.RandomState(0).randint(0, 100, 10000)
+    stream = io.StringIO('\n'.join(map(str, label_list)))
+    event_loader = EventLoader(raw)
+    result = event_loader.read_txt(stream, chunk_size=1000)
+    assert np.array_equal(result, label_list)
+    assert event_loader.label_list is result
+
+@pytest.mark.parametrize('text', [
+    '1 2 a 4', '1 2.5', '1,2,3', '1e3', '0x10', '1-2', '3 -', '1 2\n3 4a'
+])
+@pytest.mark.parametrize('chunk_size', [None, 2])
+def test_load_txt_invalid(raw, tmp_path, text, chunk_size): # noqa: F811
+    filepath = tmp_path / 'label.txt'
+    filepath.write_text(text, encoding='utf-8')
+    event_loader = EventLoader(raw)
+    message = re.escape('Event codes should be integers.')
+    with pytest.raises(ValueError, match=message):
+        if chunk_size is None:
+            event_loader.read_txt(str(filepath))
+        else:
+            event_loader.read_txt(str(filepath), chunk_size=chunk_size)
+    with pytest.raises(ValueError, match='chunk_size must be positive'):
+        event_loader.read_txt(str(filepath), chunk_size=0)
+
+@pytest.mark.parametrize('data', [
+    np.array([1, 2, 3, 4]),
+    np.array([[1, 2, 3, 4]]),
+    np.array([[1], [2], [3], [4]]),
+    np.array([[0, 0, 1], [1, 0, 2], [2, 0, 3], [3, 0, 4]]),
+])
+def test_from_mat(raw, data): # noqa: F811
+    event_loader = EventLoader(raw)
+    label_list = event_loader.from_mat(data)
+    assert isinstance(label_list, np.ndarray)
+    assert np.array_equal(label_list, [1, 2, 3, 4])
+    _create_event(event_loader, raw)
+    events, _ = raw.get_event_list()
+    assert events.dtype.kind == 'i'
+
 @pytest.fixture
 def mock_mat(mocker):
     def mock_mat_generator(return_value):
@@ -102,7 +157,9 @@ def test_mat_malformed(raw, mock_mat): # noqa: F811
     mock_mat({
         'label': np.array([[[0]]])
     })
-    with pytest.raises(ValueError, match='Either 1d or 2d array is expected.'):
+    with pytest.raises(
+        ValueError, match=re.escape('Either 1d or 2d array is expected.')
+    ):
         event_loader.read_mat('tests/0.mat')
 
 
@@ -113,7 +170,7 @@ def test_mat_multi_key(raw, mock_mat): # noqa: F811
         'error': True
     })
     with pytest.raises(
-        ValueError, match='Mat file should contain exactly one variable.'
+        ValueError, match=re.escape('Mat file should contain exactly one variable.')
     ):
         event_loader.read_mat('tests/0.mat')
 
@@ -126,7 +183,7 @@ def test_create_event_inconsistent(
         'label': np.array([[0, 0, 1]])
     })
     event_loader.read_mat('tests/0.mat')
-    with pytest.raises(ValueError, match='Inconsistent number of events.*'):
+    with pytest.raises(ValueError, match=r'Inconsistent number of events.*'):
         event_loader.create_event({0: 'new 1',
                                    1: 'new 2'})
 
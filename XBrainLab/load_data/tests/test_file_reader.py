@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from XBrainLab.load_data import ConcurrentFileReader
+
+
+def _collect(reader):
+    result = []
+    while not reader.is_finished():
+        result += list(reader.iter_ready())
+        time.sleep(0.01)
+    return result
+
+def test_file_reader_order():
+    delays = {'a': 0.1, 'b': 0, 'c': 0.05, 'd': 0}
+
+    def read(filepath):
+        time.sleep(delays[filepath])
+        return filepath.upper()
+
+    reader = ConcurrentFileReader(read, list(delays), num_workers=4)
+    assert _collect(reader) == [('a', 'A'), ('b', 'B'), ('c', 'C'), ('d', 'D')]
+    assert reader.get_progress() == (4, 4)
+    assert reader.is_finished()
+
+def test_file_reader_progress():
+    event = threading.Event()
+
+    def read(filepath):
+        if filepath == 'a':
+            event.wait(5)
+        return filepath
+
+    reader = ConcurrentFileReader(read, ['a', 'b'], num_workers=2)
+    while reader.get_progress()[0] < 1:
+        time.sleep(0.01)
+    # b is read, but a is still being read
+    assert reader.get_progress() == (1, 2)
+    assert list(reader.iter_ready()) == []
+    assert not reader.is_finished()
+    event.set()
+    assert _collect(reader) == [('a', 'a'), ('b', 'b')]
+
+def test_file_reader_error():
+    read_files = []
+
+    def read(filepath):
+        if filepath == 'b':
+            raise ValueError('broken file')
+        read_files.append(filepath)
+        return filepath
+
+    reader = ConcurrentFileReader(read, ['a', 'b', 'c', 'd'], num_workers=1)
+    with pytest.raises(ValueError, match='broken file'):
+        _collect(reader)
+    assert reader.is_finished()
+    assert list(reader.iter_ready()) == []
+    assert 'a' in read_files
+
+def test_file_reader_cancel():
+    event = threading.Event()
+
+    def read(filepath):
+        event.wait(5)
+        return filepath
+
+    reader = ConcurrentFileReader(read, ['a', 'b', 'c'], num_workers=1)
+    reader.cancel()
+    event.set()
+    assert reader.is_finished()
+    assert list(reader.iter_ready()) == []
+    assert all(future.cancelled() for future in reader.futures[1:])
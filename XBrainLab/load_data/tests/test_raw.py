@@ -166,6 +166,30 @@ def test_raw_set_event_on_stim_event(stim_raw):
     assert len(events) == 3
     assert len(event_id) == 3
 
+@pytest.mark.parametrize('target', ['stim_raw', 'annot_raw', 'epoch'])
+def test_raw_event_list_cached(target, mocker, request):
+    target = request.getfixturevalue(target)
+    extract = mocker.spy(Raw, '_extract_raw_event_list')
+    result = target.get_raw_event_list()
+    target.has_event()
+    target.get_row_info()
+    target.get_event_name_list_str()
+    assert target.get_raw_event_list() is result
+    assert extract.call_count == 1
+
+    # refreshed on set_event
+    test_set_event(target)
+    target.get_raw_event_list()
+    assert extract.call_count == 2
+    # refreshed on set_mne
+    target.set_mne(target.get_mne().copy())
+    target.get_raw_event_list()
+    assert extract.call_count == 3
+    # refreshed on in place modification
+    target.update_metadata()
+    target.get_raw_event_list()
+    assert extract.call_count == 4
+
 # raw with annotation event
 @pytest.fixture
 def mne_raw_annot():
@@ -305,3 +329,71 @@ def test_set_mne_and_wipe_events_2(mne_epoch, target, request):
     target = request.getfixturevalue(target)
     target.set_mne_and_wipe_events(mne_epoch)
     test_mne_epoch_info(mne_epoch, target)
+
+# metadata
+@pytest.mark.parametrize('target', ['raw', 'epoch'])
+def test_metadata(target, mocker, request):
+    target = request.getfixturevalue(target)
+    get_data = mocker.patch.object(target.get_mne(), 'get_data')
+    metadata = target.get_metadata()
+    assert metadata.nchan == target.get_mne().info['nchan']
+    assert metadata.sfreq == base_fs
+    assert metadata.n_times == len(target.get_mne().times)
+    assert metadata.n_epochs == (1 if target.is_raw() else 4)
+    assert metadata.dtype == np.float64
+    assert target.get_dtype() == np.float64
+    # computed once
+    assert target.get_metadata() is metadata
+    target.get_row_info()
+    get_data.assert_not_called()
+
+@pytest.mark.parametrize('target', ['raw', 'epoch'])
+def test_metadata_refresh(mne_raw_2, target, request):
+    target = request.getfixturevalue(target)
+    metadata = target.get_metadata()
+    target.set_mne(mne_raw_2)
+    assert target.get_metadata() is not metadata
+    assert target.get_nchan() == 2
+
+    metadata = target.get_metadata()
+    target.set_mne_and_wipe_events(mne_raw_2.copy().pick_channels(['O1']))
+    assert target.get_metadata() is not metadata
+    assert target.get_nchan() == 1
+
+    target.get_mne().resample(base_fs * 2)
+    assert target.get_sfreq() == base_fs
+    target.update_metadata()
+    assert target.get_sfreq() == base_fs * 2
+
+# copy on write
+@pytest.mark.parametrize('target', ['raw', 'epoch'])
+def test_copy(target, request):
+    target = request.getfixturevalue(target)
+    target.add_preprocess('test')
+    data = target.get_mne()._data
+    copied = target.copy()
+    assert copied.get_mne() is not target.get_mne()
+    assert copied.get_mne().info is not target.get_mne().info
+    assert np.shares_memory(copied.get_mne()._data, data)
+    assert not copied.get_mne()._data.flags.writeable
+    assert data.flags.writeable
+    copied.add_preprocess('copied')
+    assert target.get_preprocess_history() == ['test']
+
+    copied.ensure_writable()
+    copied_data = copied.get_mne()._data
+    assert copied_data.flags.writeable
+    assert not np.shares_memory(copied_data, data)
+    copied_data[:] = 0
+    assert np.any(target.get_mne()._data != 0)
+    copied.ensure_writable()
+    assert copied.get_mne()._data is copied_data
+
+    # the source copies its data before it is modified in place
+    other = target.copy()
+    target.ensure_writable()
+    assert target.get_mne()._data is not data
+    target.get_mne()._data[:] = 0
+    assert np.array_equal(other.get_mne()._data, data)
+    target.ensure_writable()
+    assert target.get_mne()._data.flags.writeable
@@ -1,9 +1,11 @@
 from .base import PreprocessBase
+from .cache import PreprocessCache
 from .channel_selection import ChannelSelection
 from .edit_event import EditEventId, EditEventName
 from .export import Export
 from .filtering import Filtering
 from .normalize import Normalize
+from .pipeline import PreprocessPipeline
 from .resample import Resample
 from .time_epoch import TimeEpoch
 from .window_epoch import WindowEpoch
@@ -18,5 +20,7 @@ __all__ = [
     'WindowEpoch',
     'EditEventName',
     'EditEventId',
-    'Export'
+    'Export',
+    'PreprocessPipeline',
+    'PreprocessCache'
 ]
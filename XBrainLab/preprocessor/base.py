@@ -1,21 +1,105 @@
-from copy import deepcopy
-from typing import List
+import inspect
+from concurrent.futures import (
+    FIRST_EXCEPTION,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import List, Optional, Type
 
 from ..load_data import Raw
-from ..utils import validate_list_type
+from ..utils import validate_list_type, zip_strict
+from .cache import PreprocessCache
+
+EXECUTOR_BACKENDS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor
+}
+
+
+def _preprocess_in_worker(
+    preprocessor_cls: Type['PreprocessBase'],
+    preprocessed_data: Raw,
+    args: tuple,
+    kargs: dict,
+    cache: Optional[PreprocessCache] = None
+) -> Raw:
+    """Preprocess a single data in worker process and return the result
+
+    The preprocessor is created for the single data, to avoid sending the whole
+    data list to every worker.
+    """
+    preprocessor = preprocessor_cls.create_without_copy([preprocessed_data], cache)
+    preprocessor._preprocess_one(preprocessed_data, *args, **kargs)
+    return preprocessed_data
 
 
 class PreprocessBase:
     """Base class for preprocessors.
 
+    Data are preprocessed file by file, either sequentially or concurrently
+    with a pool of workers. Threads suit MNE and scipy routines releasing
+    the GIL, e.g. filtering and resampling, while processes suit pure python
+    preprocessing. The order of the data and of the preprocess history
+    is preserved in both cases.
+
+    With :class:`PreprocessCache`, the result of each file is loaded from
+    disk if the same file has been preprocessed with the same steps before.
+    Subclasses only modifying metadata set :attr:`cacheable` to False,
+    since loading from disk is slower than preprocessing.
+
     Attributes:
         preprocessed_data_list: List[:class:`XBrainLab.preprocessor.Raw`]
             List of preprocessed data.
+        num_workers: int
+            Number of workers preprocessing files concurrently.
+            Preprocess sequentially if less than 2.
+        backend: str
+            Type of the workers, "thread" or "process".
+        cache: :class:`PreprocessCache` | None
+            Disk cache of preprocessed data. Not cached if None.
+        cacheable: bool
+            Whether results of the preprocessor are stored in cache.
     """
-    def __init__(self, preprocessed_data_list: List[Raw]):
-        self.preprocessed_data_list = deepcopy(preprocessed_data_list)
+    cacheable = True
+
+    def __init__(
+        self,
+        preprocessed_data_list: List[Raw],
+        num_workers: int = 0,
+        backend: str = 'thread',
+        cache: Optional[PreprocessCache] = None
+    ):
+        if backend not in EXECUTOR_BACKENDS:
+            raise ValueError(f"Unknown executor backend: {backend}")
+        validate_list_type(preprocessed_data_list, Raw, 'preprocessed_data_list')
+        # signal data are shared until modified by the preprocessor
+        self.preprocessed_data_list = [data.copy() for data in preprocessed_data_list]
+        self.num_workers = num_workers
+        self.backend = backend
+        self.cache = cache
         self.check_data()
 
+    @classmethod
+    def create_without_copy(
+        cls,
+        preprocessed_data_list: List[Raw],
+        cache: Optional[PreprocessCache] = None
+    ) -> 'PreprocessBase':
+        """Create sequential preprocessor modifying the given data in place.
+
+        Used for preprocessing data already owned by the caller,
+        e.g. in worker processes or within :class:`PreprocessPipeline`.
+        The data are not validated by :meth:`check_data`.
+        """
+        preprocessor = cls.__new__(cls)
+        preprocessor.preprocessed_data_list = preprocessed_data_list
+        preprocessor.num_workers = 0
+        preprocessor.backend = 'thread'
+        preprocessor.cache = cache
+        return preprocessor
+
     def check_data(self) -> None:
         """Check if the data is valid.
 
@@ -36,11 +120,107 @@ class PreprocessBase:
         raise NotImplementedError
 
     def data_preprocess(self, *args, **kargs) -> List[Raw]:
-        """Wrapper for :meth:`_data_preprocess`."""
+        """Wrapper for :meth:`_data_preprocess`.
+
+        Raises:
+            Exception: Error of the same type as the one raised by the first
+                       failed data in the list, naming its file path.
+                       The original error is chained as the cause.
+        """
+        if self.num_workers > 1 and len(self.preprocessed_data_list) > 1:
+            self._data_preprocess_concurrently(*args, **kargs)
+        else:
+            for preprocessed_data in self.preprocessed_data_list:
+                try:
+                    self._preprocess_one(preprocessed_data, *args, **kargs)
+                except Exception as e:
+                    raise self._wrap_error(e, preprocessed_data) from e
+        self._add_preprocess_desc(*args, **kargs)
+        return self.preprocessed_data_list
+
+    def _add_preprocess_desc(self, *args, **kargs) -> None:
+        """Add description of the preprocess to the history of all data."""
+        desc = self.get_preprocess_desc(*args, **kargs)
         for preprocessed_data in self.preprocessed_data_list:
+            preprocessed_data.add_preprocess(desc)
+
+    def _create_executor(self) -> Executor:
+        """Return executor of the configured backend."""
+        max_workers = min(self.num_workers, len(self.preprocessed_data_list))
+        return EXECUTOR_BACKENDS[self.backend](max_workers=max_workers)
+
+    def _data_preprocess_concurrently(self, *args, **kargs) -> None:
+        """Preprocess each data concurrently with a pool of workers.
+
+        Pending files are cancelled once any file fails.
+        """
+        with self._create_executor() as executor:
+            if self.backend == 'process':
+                futures = [
+                    executor.submit(
+                        _preprocess_in_worker, type(self), preprocessed_data,
+                        args, kargs, self.cache
+                    )
+                    for preprocessed_data in self.preprocessed_data_list
+                ]
+            else:
+                futures = [
+                    executor.submit(
+                        self._preprocess_one, preprocessed_data, *args, **kargs
+                    )
+                    for preprocessed_data in self.preprocessed_data_list
+                ]
+            _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+        # report the error of the first failed data in order
+        for future, preprocessed_data in zip_strict(
+            futures, self.preprocessed_data_list
+        ):
+            if future.cancelled():
+                continue
+            e = future.exception()
+            if e is not None:
+                raise self._wrap_error(e, preprocessed_data) from e
+        if self.backend == 'process':
+            self.preprocessed_data_list = [future.result() for future in futures]
+
+    @staticmethod
+    def _wrap_error(e: Exception, preprocessed_data: Raw) -> Exception:
+        """Return error of the same type naming the file path of the failed data.
+
+        RuntimeError is returned instead
+        if the type cannot be created from a single message.
+        """
+        message = f"{e} (while preprocessing {preprocessed_data.get_filepath()})"
+        try:
+            return type(e)(message)
+        except TypeError:
+            return RuntimeError(message)
+
+    def _preprocess_one(self, preprocessed_data: Raw, *args, **kargs) -> None:
+        """Preprocess a single data, through cache if available."""
+        if self.cache is None:
             self._data_preprocess(preprocessed_data, *args, **kargs)
-            preprocessed_data.add_preprocess(self.get_preprocess_desc(*args, **kargs))
-        return self.preprocessed_data_list
+            # origin of the data cannot be tracked without cache
+            preprocessed_data.cache_key = None
+            return
+        # parameters are bound to names, so positional and keyword calls match
+        params = inspect.signature(self._data_preprocess).bind(
+            preprocessed_data, *args, **kargs
+        )
+        params.apply_defaults()
+        step = (
+            f"{type(self).__module__}.{type(self).__qualname__}"
+            f"{list(params.arguments.items())[1:]!r}"
+        )
+        key = self.cache.get_key(preprocessed_data, step)
+        if key is None or not self.cacheable:
+            self._data_preprocess(preprocessed_data, *args, **kargs)
+        elif not self.cache.load(key, preprocessed_data):
+            self._data_preprocess(preprocessed_data, *args, **kargs)
+            self.cache.store(key, preprocessed_data)
+        preprocessed_data.cache_key = key
 
     def _data_preprocess(self, preprocessed_data: Raw, *args, **kargs) -> None:
         """Preprocess the data."""
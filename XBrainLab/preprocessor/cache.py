@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from importlib import metadata
+
+import mne
+import numpy as np
+
+from ..load_data import Raw
+
+# size of blocks read for hashing source files
+HASH_BLOCK_SIZE = 1 << 20
+# number of evenly spaced samples of the loaded data included in the source key
+SOURCE_SAMPLE_NUM = 1024
+
+
+def _get_version() -> str:
+    """Return the installed version of XBrainLab."""
+    try:
+        return metadata.version('XBrainLab')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+class PreprocessCache:
+    """Content-addressed disk cache of preprocessed data.
+
+    Each result is keyed by the content hash of the source file together with
+    the header and samples of the data read from it, the ordered
+    preprocessing steps applied with their parameters, the events of the data,
+    and the versions of XBrainLab and MNE. The key of the previous state is
+    kept in :attr:`XBrainLab.load_data.Raw.cache_key`, so the chain of keys
+    covers the whole preprocess history. Data without a known origin,
+    e.g. modified by preprocessors without cache, are never cached.
+
+    Each entry is a directory holding the data array as ``.npy`` file, and
+    the mne object without data and the events as pickle file. The least
+    recently used entries are evicted once the total size exceeds
+    :attr:`max_size`.
+
+    Since the pickle files are loaded as they are, the cache directory must be
+    trusted, i.e. writable only by the user, like any other pickle file.
+
+    Attributes:
+        cache_dir: str
+            Directory of the cache entries
+        max_size: int
+            Maximum total size of the entries in bytes
+        hits: int
+            Number of results loaded from cache in this process
+        misses: int
+            Number of results not found in cache in this process
+        file_hashes: dict[tuple[str, int, int], str]
+            Content hash of source files,
+            keyed by (absolute path, size, modification time)
+        lock: :class:`threading.Lock`
+            Lock for updating statistics and evicting entries
+    """
+    DATA_FILE = 'data.npy'
+    META_FILE = 'meta.pkl'
+
+    def __init__(self, cache_dir: str, max_size: int = 10 * 1024 ** 3):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.file_hashes = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def hash_file(self, filepath: str) -> str | None:
+        """Return content hash of the file, or None if the file does not exist."""
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        file_key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+        if file_key not in self.file_hashes:
+            file_hash = hashlib.blake2b()
+            with open(filepath, 'rb') as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                    file_hash.update(block)
+            self.file_hashes[file_key] = file_hash.hexdigest()
+        return self.file_hashes[file_key]
+
+    def get_source_key(self, preprocessed_data: Raw) -> str | None:
+        """Return the key of data not preprocessed yet.
+
+        The same file may be read into different data, e.g. different variables
+        of a .npz or .mat file, or with different sampling frequency and channels
+        set on loading. Thus the key covers the header and a fixed number of
+        evenly spaced samples of the preloaded data,
+        besides the content hash of the source file.
+
+        Returns:
+            The key, or None if the source file does not exist.
+        """
+        file_hash = self.hash_file(preprocessed_data.get_filepath())
+        if file_hash is None:
+            return None
+        mne_data = preprocessed_data.get_mne()
+        n_epochs = 1 if preprocessed_data.is_raw() else len(mne_data.events)
+        key = hashlib.blake2b()
+        key.update(file_hash.encode())
+        key.update(repr((
+            mne_data.info['sfreq'], mne_data.info.ch_names,
+            mne_data.get_channel_types(), len(mne_data.times), n_epochs
+        )).encode())
+        data = getattr(mne_data, '_data', None)
+        if isinstance(data, np.ndarray):
+            key.update(repr((data.dtype.str, data.shape)).encode())
+            if data.size > 0:
+                index = np.linspace(0, data.size - 1, SOURCE_SAMPLE_NUM, dtype=np.intp)
+                key.update(data.flat[index].tobytes())
+        return key.hexdigest()
+
+    def get_key(self, preprocessed_data: Raw, step: str) -> str | None:
+        """Return the key of applying a preprocessing step to the data.
+
+        Args:
+            preprocessed_data: Data before preprocessing.
+            step: Description of the step including its parameters.
+
+        Returns:
+            The key, or None if the origin of the data is unknown.
+        """
+        previous_key = preprocessed_data.cache_key
+        if previous_key is None:
+            if preprocessed_data.get_preprocess_history():
+                return None
+            previous_key = self.get_source_key(preprocessed_data)
+            if previous_key is None:
+                return None
+        key = hashlib.blake2b()
+        for item in (previous_key, step, _get_version(), mne.__version__):
+            key.update(item.encode())
+            key.update(b'\0')
+        if preprocessed_data.raw_events is not None:
+            key.update(np.ascontiguousarray(preprocessed_data.raw_events).tobytes())
+            key.update(repr(preprocessed_data.raw_event_id).encode())
+        return key.hexdigest()
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key: str, preprocessed_data: Raw) -> bool:
+        """Replace the data with the cached result.
+
+        Returns:
+            Whether the result is found in cache.
+        """
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(os.path.join(entry_path, self.META_FILE), 'rb') as f:
+                meta = pickle.load(f)
+            data = np.load(os.path.join(entry_path, self.DATA_FILE))
+            now = time.time()
+            os.utime(entry_path, (now, now))
+        except Exception:
+            with self.lock:
+                self.misses += 1
+            return False
+        mne_data = meta['mne_data']
+        mne_data._data = data
+        preprocessed_data.set_mne_and_wipe_events(mne_data)
+        preprocessed_data.raw_events = meta['raw_events']
+        preprocessed_data.raw_event_id = meta['raw_event_id']
+        with self.lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: str, preprocessed_data: Raw) -> None:
+        """Store the preprocessed data and evict entries exceeding the size limit.
+
+        Data not loaded into memory are not stored.
+        """
+        mne_data = preprocessed_data.get_mne()
+        data = getattr(mne_data, '_data', None)
+        entry_path = self._get_entry_path(key)
+        if not isinstance(data, np.ndarray) or os.path.exists(entry_path):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # written to temporary directory first, so entries are always complete
+        temp_path = tempfile.mkdtemp(prefix='.tmp-', dir=self.cache_dir)
+        try:
+            np.save(os.path.join(temp_path, self.DATA_FILE), data)
+            meta_mne_data = copy.copy(mne_data)
+            meta_mne_data._data = None
+            with open(os.path.join(temp_path, self.META_FILE), 'wb') as f:
+                pickle.dump({
+                    'mne_data': meta_mne_data,
+                    'raw_events': preprocessed_data.raw_events,
+                    'raw_event_id': preprocessed_data.raw_event_id
+                }, f)
+            os.rename(temp_path, entry_path)
+        except OSError:
+            # e.g. stored concurrently by other worker
+            shutil.rmtree(temp_path, ignore_errors=True)
+        self.evict()
+
+    def _get_entries(self) -> list[tuple[str, float, int]]:
+        """Return (path, last access time, size) of entries."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for name in os.listdir(self.cache_dir):
+            entry_path = os.path.join(self.cache_dir, name)
+            if name.startswith('.') or not os.path.isdir(entry_path):
+                continue
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(entry_path, file_name))
+                    for file_name in os.listdir(entry_path)
+                )
+                entries.append((entry_path, os.path.getmtime(entry_path), size))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self) -> None:
+        """Remove least recently used entries until within the size limit."""
+        with self.lock:
+            entries = sorted(self._get_entries(), key=lambda entry: entry[1])
+            total_size = sum(size for _, _, size in entries)
+            for entry_path, _, size in entries:
+                if total_size <= self.max_size:
+                    break
+                shutil.rmtree(entry_path, ignore_errors=True)
+                total_size -= size
+
+    def clear(self) -> None:
+        """Remove all entries and reset statistics."""
+        with self.lock:
+            for entry_path, _, _ in self._get_entries():
+                shutil.rmtree(entry_path, ignore_errors=True)
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> dict[str, int]:
+        """Return statistics of the cache.
+
+        Returns:
+            Dict of number of hits and misses in this process,
+            number of entries, total size and maximum size in bytes.
+        """
+        entries = self._get_entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'size': sum(size for _, _, size in entries),
+            'max_size': self.max_size
+        }
@@ -7,9 +7,13 @@ from .base import PreprocessBase
 class ChannelSelection(PreprocessBase):
     """Preprocessing class for selecting channels.
 
+    Only the selected channels of preloaded data are copied.
+
     Input:
         selected_channels: List of names of selected channels.
     """
+    # cheaper than loading from cache
+    cacheable = False
 
     def get_preprocess_desc(self, selected_channels: List[str]):
         return f"Select {len(selected_channels)} Channel"
@@ -18,4 +22,6 @@ class ChannelSelection(PreprocessBase):
         # Check if channel is selected
         if len(selected_channels) == 0:
             raise ValueError("No Channel is Selected")
-        preprocessed_data.get_mne().pick_channels(selected_channels)
+        # pick copies the selected channels, the shared data is left untouched
+        preprocessed_data.get_mne().pick(selected_channels)
+        preprocessed_data.update_metadata()
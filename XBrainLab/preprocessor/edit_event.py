@@ -12,6 +12,8 @@ class EditEventName(PreprocessBase):
     Input:
         new_event_name: Mapping of old event name to new event name.
     """
+    # only events are modified, not worth caching
+    cacheable = False
 
     def check_data(self):
         super().check_data()
@@ -48,6 +50,7 @@ class EditEventId(PreprocessBase):
     Input:
         new_event_ids: Dict of new event id.
     """
+    cacheable = False
 
     def check_data(self):
         super().check_data()
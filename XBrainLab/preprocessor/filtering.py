@@ -15,5 +15,7 @@ class Filtering(PreprocessBase):
 
     def _data_preprocess(self, preprocessed_data: Raw, l_freq: float, h_freq: float):
         preprocessed_data.get_mne().load_data()
+        # filtered in place
+        preprocessed_data.ensure_writable()
         new_mne = preprocessed_data.get_mne().filter(l_freq=l_freq, h_freq=h_freq)
         preprocessed_data.set_mne(new_mne)
@@ -1,63 +1,77 @@
+from __future__ import annotations
+
 import numpy as np
 
+from ..load_data import Raw
 from .base import PreprocessBase
 
 
+def _z_score(data: np.ndarray) -> None:
+    """Normalize data to zero mean and unit variance along the last axis in place"""
+    mean = data.mean(axis=-1, keepdims=True)
+    np.subtract(data, mean, out=data)
+    # variance of centered data, without allocating squared data
+    var = np.einsum('...i,...i->...', data, data)[..., None]
+    var /= data.shape[-1]
+    np.sqrt(var, out=var)
+    np.divide(data, var, out=data)
+
+def _minmax(data: np.ndarray) -> None:
+    """Scale data to [0, 1] along the last axis in place"""
+    data_min = data.min(axis=-1, keepdims=True)
+    data_range = data.max(axis=-1, keepdims=True)
+    data_range -= data_min
+    data_range += 1e-12
+    np.subtract(data, data_min, out=data)
+    np.divide(data, data_range, out=data)
+
+NORMALIZE_KERNELS = {
+    'z score': _z_score,
+    'minmax': _minmax
+}
+
+
 class Normalize(PreprocessBase):
     """Preprocessing class for normalizing data.
 
+    Each channel of raw data, or each channel of each epoch of epoched data,
+    is normalized along time in place.
+
     Input:
         norm: Normalization method. Can be "z score" or "minmax".
-
+        dtype: Working data type, e.g. "float32". Normalized in the
+               data type of the data if None. The result is stored
+               in the data type of the data.
+        chunk_size: Number of epochs, or channels of raw data,
+                    normalized at once. Bounds the size of temporary arrays,
+                    e.g. for memory-mapped data. Normalized at once if None.
     """
-    def get_preprocess_desc(self, norm: str):
+    def get_preprocess_desc(
+        self, norm: str, dtype: str | None = None, chunk_size: int | None = None
+    ):
         return f"{norm} normalization"
 
-    def _data_preprocess(self, preprocessed_data, norm: str):
+    def _data_preprocess(
+        self,
+        preprocessed_data: Raw,
+        norm: str,
+        dtype: str | None = None,
+        chunk_size: int | None = None
+    ):
+        if norm not in NORMALIZE_KERNELS:
+            raise ValueError(f"Unknown normalization method: {norm}")
+        if chunk_size is not None and chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        kernel = NORMALIZE_KERNELS[norm]
         preprocessed_data.get_mne().load_data()
-        if norm == "z score":
-            if preprocessed_data.is_raw():
-                arrdata =  preprocessed_data.get_mne()._data.copy() 
-                preprocessed_data.get_mne()._data = (arrdata - np.multiply(
-                    arrdata.mean(axis=-1)[:, None], np.ones_like(arrdata)
-                )) / np.multiply(
-                    arrdata.std(axis=-1)[:, None], np.ones_like(arrdata)
-                )
-            else:
-                arrdata =  preprocessed_data.get_mne()._data.copy()
-                for ep in range(preprocessed_data.get_epochs_length()):
-                    trial_mean, trial_std = arrdata[ep, :, :].mean(axis=-1), arrdata[ep, :, :].std(axis=-1)
-                    arrdata[ep, :, :] =  (
-                        arrdata[ep, :, :] - np.multiply(trial_mean[:, None], np.ones_like(arrdata[ep, :, :]))) \
-                                          / np.multiply( trial_std[:, None], np.ones_like(arrdata[ep, :, :]))
-                preprocessed_data.get_mne()._data = arrdata
-        elif norm== "minmax":
-            if preprocessed_data.is_raw():
-                arrdata =  preprocessed_data.get_mne()._data.copy()
-                ch_min, ch_max = (
-                    np.multiply(
-                        arrdata.min(axis=-1)[:, None],
-                        np.ones_like(arrdata)),
-                    np.multiply(
-                        arrdata.max(axis=-1)[:, None],
-                        np.ones_like(arrdata)
-                    )
-                )
-                arrdata = (arrdata-ch_min)/(ch_max-ch_min+1e-12)
-                preprocessed_data.get_mne()._data = arrdata
+        preprocessed_data.ensure_writable()
+        data = preprocessed_data.get_mne()._data
+        chunk_size = chunk_size or len(data)
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start: start + chunk_size]
+            if dtype is None or chunk.dtype == np.dtype(dtype):
+                kernel(chunk)
             else:
-                arrdata =  preprocessed_data.get_mne()._data.copy()
-                for ep in range(preprocessed_data.get_epochs_length()):
-                    ch_min = np.multiply(
-                        arrdata[ep, :, :].min(axis=-1)[:, None],
-                        np.ones_like(arrdata[ep, :, :])
-                    )
-                    ch_max = np.multiply(
-                        arrdata[ep, :, :].max(axis=-1)[:, None],
-                        np.ones_like(arrdata[ep, :, :])
-                    )
-                    arrdata[ep, :, :] = (
-                        (arrdata[ep, :, :]-ch_min) /
-                        (ch_max-ch_min+1e-12)
-                    )
-                preprocessed_data.get_mne()._data = arrdata
+                work = chunk.astype(dtype)
+                kernel(work)
+                chunk[...] = work
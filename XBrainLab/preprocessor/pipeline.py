@@ -0,0 +1,80 @@
+from typing import List, Tuple, Type
+
+from ..load_data import Raw
+from ..utils import validate_issubclass, validate_type
+from .base import PreprocessBase
+
+PipelineStep = Tuple[Type[PreprocessBase], dict]
+
+
+class PreprocessPipeline(PreprocessBase):
+    """Preprocessing class for applying a sequence of preprocessors.
+
+    Each file is streamed through all steps before the next file is
+    preprocessed, so only the final result of each file is kept in memory,
+    instead of the intermediate result of every file after each step.
+    The description of each step is added to the preprocess history,
+    same as applying the steps one by one.
+
+    Input:
+        steps: List of (preprocessor class, kwargs of the preprocessor),
+               e.g. [(Filtering, {'l_freq': 1, 'h_freq': 40}),
+               (Resample, {'sfreq': 128})].
+    """
+
+    @staticmethod
+    def validate_steps(steps: List[PipelineStep]) -> None:
+        """Validate the pipeline steps.
+
+        Raises:
+            ValueError: If the steps are empty or a step cannot be streamed,
+                        e.g. :class:`XBrainLab.preprocessor.Export`.
+        """
+        validate_type(steps, list, 'steps')
+        if not steps:
+            raise ValueError("No preprocessing step is given")
+        for step in steps:
+            validate_type(step, (list, tuple), 'step')
+            if len(step) != 2:
+                raise ValueError(
+                    f"Step should be (preprocessor class, kwargs), got {step}"
+                )
+            preprocessor_cls, kargs = step
+            validate_issubclass(preprocessor_cls, PreprocessBase, 'preprocessor')
+            validate_type(kargs, dict, 'kwargs')
+            if (
+                issubclass(preprocessor_cls, PreprocessPipeline) or
+                preprocessor_cls._data_preprocess is PreprocessBase._data_preprocess
+            ):
+                raise ValueError(
+                    f"{preprocessor_cls.__name__} cannot be used in pipeline"
+                )
+
+    def get_preprocess_desc(self, steps: List[PipelineStep]):
+        return ', '.join(
+            preprocessor_cls.create_without_copy([]).get_preprocess_desc(**kargs)
+            for preprocessor_cls, kargs in steps
+        )
+
+    def data_preprocess(self, steps: List[PipelineStep]) -> List[Raw]:
+        self.validate_steps(steps)
+        return super().data_preprocess(steps)
+
+    def _add_preprocess_desc(self, steps: List[PipelineStep]) -> None:
+        # added by each step in _data_preprocess
+        pass
+
+    def _preprocess_one(self, preprocessed_data: Raw, steps: List[PipelineStep]):
+        # cached by each step
+        self._data_preprocess(preprocessed_data, steps)
+
+    def _data_preprocess(self, preprocessed_data: Raw, steps: List[PipelineStep]):
+        for preprocessor_cls, kargs in steps:
+            preprocessor = preprocessor_cls.create_without_copy(
+                [preprocessed_data], self.cache
+            )
+            preprocessor.check_data()
+            preprocessor._preprocess_one(preprocessed_data, **kargs)
+            preprocessed_data.add_preprocess(
+                preprocessor.get_preprocess_desc(**kargs)
+            )
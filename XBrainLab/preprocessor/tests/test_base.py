@@ -51,3 +51,82 @@ def test_inherit(raw):
 
     assert result.get_subject_name() == "test_inherit"
     assert result.get_preprocess_history() == ["test desc 1"]
+
+
+class SubjectPreprocessor(PreprocessBase):
+    def get_preprocess_desc(self, prefix):
+        return "subject " + prefix
+
+    def _data_preprocess(self, preprocessed_data, prefix):
+        name = preprocessed_data.get_session_name()
+        if name.startswith('fail'):
+            raise ValueError(f"Failed {name}")
+        preprocessed_data.set_subject_name(prefix + name)
+
+def _create_raw_list(session_list):
+    raw_list = []
+    for session in session_list:
+        mne_raw = _generate_mne(base_fs, ['Fp1', 'Fp2'], 'eeg', length=1)
+        data = Raw(f'tests/test_data/sub-01_ses-{session}_task-rest_eeg.fif', mne_raw)
+        data.set_session_name(session)
+        raw_list.append(data)
+    return raw_list
+
+
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_concurrent(backend):
+    session_list = [str(i) for i in range(5)]
+    preprocessor = SubjectPreprocessor(
+        _create_raw_list(session_list), num_workers=2, backend=backend
+    )
+    result = preprocessor.data_preprocess('sub')
+    assert result is preprocessor.get_preprocessed_data_list()
+    assert [data.get_subject_name() for data in result] == [
+        'sub' + session for session in session_list
+    ]
+    for data in result:
+        assert data.get_preprocess_history() == ["subject sub"]
+
+
+@pytest.mark.parametrize('num_workers, backend', [
+    (0, 'thread'), (2, 'thread'), (2, 'process')
+])
+def test_concurrent_error(num_workers, backend):
+    preprocessor = SubjectPreprocessor(
+        _create_raw_list(['0', 'fail1', '2', 'fail3']),
+        num_workers=num_workers, backend=backend
+    )
+    with pytest.raises(ValueError, match="Failed fail1") as e:
+        preprocessor.data_preprocess('sub')
+    assert str(e.value) == (
+        'Failed fail1 (while preprocessing '
+        'tests/test_data/sub-01_ses-fail1_task-rest_eeg.fif)'
+    )
+    assert isinstance(e.value.__cause__, ValueError)
+    assert str(e.value.__cause__) == 'Failed fail1'
+    for data in preprocessor.get_preprocessed_data_list():
+        assert data.get_preprocess_history() == []
+
+
+class PairError(Exception):
+    def __init__(self, first, second):
+        super().__init__(first, second)
+
+class PairErrorPreprocessor(PreprocessBase):
+    def get_preprocess_desc(self):
+        return "pair"
+
+    def _data_preprocess(self, preprocessed_data):
+        raise PairError('a', 'b')
+
+def test_error_not_recreatable(raw):
+    preprocessor = PairErrorPreprocessor([raw])
+    with pytest.raises(RuntimeError, match="while preprocessing") as e:
+        preprocessor.data_preprocess()
+    assert raw.get_filepath() in str(e.value)
+    assert isinstance(e.value.__cause__, PairError)
+
+
+def test_invalid_backend(raw):
+    with pytest.raises(ValueError, match="Unknown executor backend"):
+        PreprocessBase([raw], num_workers=2, backend='unknown')
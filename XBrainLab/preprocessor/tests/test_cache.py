@@ -0,0 +1,203 @@
+import os
+import time
+
+import mne
+import numpy as np
+import pytest
+
+from XBrainLab import preprocessor
+from XBrainLab.load_data import Raw
+from XBrainLab.preprocessor import PreprocessCache
+from XBrainLab.utils import zip_strict
+
+from .test_base import _generate_mne, base_fs
+
+
+def _save_raw(path, seed=0):
+    mne_raw = _generate_mne(base_fs, ['Fp1', 'Fp2', 'F3', 'F4'], 'eeg')
+    mne_raw._data = np.random.RandomState(seed).randn(*mne_raw._data.shape)
+    mne_raw.save(path, overwrite=True, fmt='double')
+
+def _load_raw(path):
+    raw = Raw(str(path), mne.io.read_raw_fif(path, preload=True))
+    events = np.array([[base_fs * k, 0, 1 + k % 2] for k in range(1, 9)])
+    raw.set_event(events, {'a': 1, 'b': 2})
+    return raw
+
+@pytest.fixture
+def raw_list(tmp_path):
+    raw_list = []
+    for i in range(2):
+        path = str(tmp_path / f'sub-0{i}_ses-01_raw.fif')
+        _save_raw(path, seed=i)
+        raw_list.append(_load_raw(path))
+    return raw_list
+
+@pytest.fixture
+def cache(tmp_path):
+    return PreprocessCache(str(tmp_path / 'cache'))
+
+EPOCH_ARGS = {
+    'baseline': None, 'selected_event_names': ['a', 'b'], 'tmin': 0, 'tmax': 0.5
+}
+
+
+def _preprocess(raw_list, cache, **kargs):
+    result = preprocessor.Filtering(raw_list, cache=cache, **kargs).data_preprocess(
+        1, 40
+    )
+    result = preprocessor.Resample(result, cache=cache, **kargs).data_preprocess(
+        250
+    )
+    return preprocessor.TimeEpoch(result, cache=cache, **kargs).data_preprocess(
+        **EPOCH_ARGS
+    )
+
+def _assert_same_result(result, expected):
+    for data, expected_data in zip_strict(result, expected):
+        assert data.get_preprocess_history() == expected_data.get_preprocess_history()
+        assert np.array_equal(
+            data.get_mne().get_data(), expected_data.get_mne().get_data()
+        )
+        assert np.array_equal(data.get_mne().events, expected_data.get_mne().events)
+        assert data.get_mne().event_id == expected_data.get_mne().event_id
+        assert data.get_sfreq() == expected_data.get_sfreq()
+        assert data.get_filter_range() == expected_data.get_filter_range()
+        assert data.cache_key == expected_data.cache_key
+
+
+def test_cache_hit(raw_list, cache, mocker):
+    expected = _preprocess(raw_list, None)
+    result = _preprocess(raw_list, cache)
+    assert cache.get_stats() == {
+        'hits': 0, 'misses': 6, 'entries': 6,
+        'size': cache.get_stats()['size'], 'max_size': cache.max_size
+    }
+    for data, expected_data in zip_strict(result, expected):
+        assert data.get_preprocess_history() == expected_data.get_preprocess_history()
+        assert np.array_equal(
+            data.get_mne().get_data(), expected_data.get_mne().get_data()
+        )
+
+    spy = mocker.spy(preprocessor.Filtering, '_data_preprocess')
+    cached_result = _preprocess(raw_list, cache)
+    spy.assert_not_called()
+    assert cache.get_stats()['hits'] == 6
+    assert cache.get_stats()['entries'] == 6
+    _assert_same_result(cached_result, result)
+
+@pytest.mark.parametrize('num_workers, backend', [(2, 'thread'), (2, 'process')])
+def test_cache_concurrent(raw_list, cache, num_workers, backend):
+    result = _preprocess(raw_list, cache)
+    cached_result = _preprocess(
+        raw_list, cache, num_workers=num_workers, backend=backend
+    )
+    _assert_same_result(cached_result, result)
+    assert cache.get_stats()['entries'] == 6
+
+def test_cache_pipeline(raw_list, cache):
+    result = _preprocess(raw_list, cache)
+    steps = [
+        (preprocessor.Filtering, {'l_freq': 1, 'h_freq': 40}),
+        (preprocessor.Resample, {'sfreq': 250}),
+        (preprocessor.TimeEpoch, EPOCH_ARGS)
+    ]
+    pipeline = preprocessor.PreprocessPipeline(raw_list, cache=cache)
+    _assert_same_result(pipeline.data_preprocess(steps), result)
+    assert cache.get_stats()['hits'] == 6
+
+def test_cache_key(raw_list, cache):
+    raw = raw_list[0]
+    keys = set()
+    for l_freq in [1, 2]:
+        result = preprocessor.Filtering([raw], cache=cache).data_preprocess(l_freq, 40)
+        keys.add(result[0].cache_key)
+    # file content changed
+    _save_raw(raw.get_filepath(), seed=2)
+    new_raw = _load_raw(raw.get_filepath())
+    result = preprocessor.Filtering([new_raw], cache=cache).data_preprocess(1, 40)
+    keys.add(result[0].cache_key)
+    # events changed
+    new_raw.set_event(new_raw.get_event_list()[0][:4], {'a': 1, 'b': 2})
+    result = preprocessor.Filtering([new_raw], cache=cache).data_preprocess(1, 40)
+    keys.add(result[0].cache_key)
+    assert len(keys) == 4
+    assert cache.get_stats()['entries'] == 4
+    assert cache.get_stats()['hits'] == 0
+
+def test_cache_key_same_file(tmp_path, cache):
+    # variables of one file set with different sampling frequency
+    path = str(tmp_path / 'sub-01_ses-01.npz')
+    rng = np.random.RandomState(0)
+    arrays = {'a': rng.randn(4, base_fs * 10), 'b': rng.randn(4, base_fs * 10)}
+    np.savez(path, **arrays)
+    raw_list = [
+        Raw(path, mne.io.RawArray(
+            arrays[name], mne.create_info(4, sfreq, 'eeg'), verbose=False
+        ))
+        for name, sfreq in [('a', 250), ('b', 500), ('b', 250)]
+    ]
+    expected = preprocessor.Filtering(raw_list).data_preprocess(1, 40)
+    result = preprocessor.Filtering(raw_list, cache=cache).data_preprocess(1, 40)
+    for data, expected_data in zip_strict(result, expected):
+        assert np.array_equal(
+            data.get_mne().get_data(), expected_data.get_mne().get_data()
+        )
+    assert len({data.cache_key for data in result}) == 3
+    assert cache.get_stats()['hits'] == 0
+
+def test_cache_not_cacheable(raw_list, cache):
+    keys = []
+    for selected_channels in [['Fp1', 'Fp2'], ['F3', 'F4']]:
+        result = preprocessor.ChannelSelection(
+            raw_list[:1], cache=cache
+        ).data_preprocess(selected_channels)
+        assert result[0].cache_key is not None
+        result = preprocessor.Filtering(result, cache=cache).data_preprocess(1, 40)
+        keys.append(result[0].cache_key)
+    assert keys[0] != keys[1]
+    # only filtering results are stored
+    assert cache.get_stats()['entries'] == 2
+
+def test_cache_unknown_origin(raw_list, cache):
+    # preprocessed without cache
+    result = preprocessor.ChannelSelection(raw_list).data_preprocess(['Fp1'])
+    result = preprocessor.Filtering(result, cache=cache).data_preprocess(1, 40)
+    # not loaded from file
+    raw = Raw('not_exist.fif', _generate_mne(base_fs, ['Fp1'], 'eeg'))
+    result += preprocessor.Filtering([raw], cache=cache).data_preprocess(1, 40)
+    for data in result:
+        assert data.cache_key is None
+    assert cache.get_stats()['entries'] == 0
+
+def test_cache_eviction(raw_list, cache):
+    preprocessor.Filtering(raw_list[:1], cache=cache).data_preprocess(1, 40)
+    entry_size = cache.get_stats()['size']
+    cache.max_size = int(entry_size * 2.5)
+    preprocessor.Filtering(raw_list[1:], cache=cache).data_preprocess(1, 40)
+    # make the modification time distinguishable
+    time.sleep(0.01)
+    # refresh the first entry
+    preprocessor.Filtering(raw_list[:1], cache=cache).data_preprocess(1, 40)
+    assert cache.get_stats()['hits'] == 1
+    preprocessor.Filtering(raw_list[:1], cache=cache).data_preprocess(2, 40)
+    stats = cache.get_stats()
+    assert stats['entries'] == 2
+    assert stats['size'] <= cache.max_size
+    preprocessor.Filtering(raw_list[:1], cache=cache).data_preprocess(1, 40)
+    assert cache.get_stats()['hits'] == 2
+    preprocessor.Filtering(raw_list[1:], cache=cache).data_preprocess(1, 40)
+    assert cache.get_stats()['hits'] == 2
+
+def test_cache_clear(raw_list, cache):
+    preprocessor.Filtering(raw_list, cache=cache).data_preprocess(1, 40)
+    preprocessor.Filtering(raw_list, cache=cache).data_preprocess(1, 40)
+    cache.clear()
+    assert cache.get_stats() == {
+        'hits': 0, 'misses': 0, 'entries': 0, 'size': 0, 'max_size': cache.max_size
+    }
+    assert os.path.isdir(cache.cache_dir)
+
+def test_cache_invalid_size(tmp_path):
+    with pytest.raises(ValueError):
+        PreprocessCache(str(tmp_path), max_size=0)
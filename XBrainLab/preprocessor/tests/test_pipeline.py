@@ -0,0 +1,80 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from XBrainLab import preprocessor
+from XBrainLab.load_data import Raw
+from XBrainLab.utils import zip_strict
+
+from .test_base import _generate_mne, base_fs
+
+
+@pytest.fixture
+def raw_list():
+    raw_list = []
+    for i in range(3):
+        mne_raw = _generate_mne(base_fs, ['Fp1', 'Fp2', 'F3', 'F4'], 'eeg')
+        raw = Raw(f'tests/test_data/sub-0{i}_ses-01_task-rest_eeg.fif', mne_raw)
+        events = np.array([[base_fs * k, 0, 1 + k % 2] for k in range(1, 9)])
+        raw.set_event(events, {'a': 1, 'b': 2})
+        raw_list.append(raw)
+    return raw_list
+
+STEPS = [
+    (preprocessor.ChannelSelection, {'selected_channels': ['Fp1', 'Fp2', 'F3']}),
+    (preprocessor.Filtering, {'l_freq': 1, 'h_freq': 40}),
+    (preprocessor.Resample, {'sfreq': 250}),
+    (preprocessor.TimeEpoch, {
+        'baseline': None, 'selected_event_names': ['a', 'b'], 'tmin': 0, 'tmax': 0.5
+    }),
+    (preprocessor.Normalize, {'norm': 'minmax'})
+]
+
+
+@pytest.mark.parametrize('num_workers, backend', [
+    (0, 'thread'), (2, 'thread'), (2, 'process')
+])
+def test_pipeline(raw_list, num_workers, backend):
+    expected = raw_list
+    for preprocessor_cls, kargs in STEPS:
+        expected = preprocessor_cls(expected).data_preprocess(**kargs)
+
+    pipeline = preprocessor.PreprocessPipeline(
+        raw_list, num_workers=num_workers, backend=backend
+    )
+    result = pipeline.data_preprocess(deepcopy(STEPS))
+    assert len(result) == len(expected)
+    for data, expected_data in zip_strict(result, expected):
+        assert not data.is_raw()
+        assert data.get_filepath() == expected_data.get_filepath()
+        assert np.allclose(
+            data.get_mne().get_data(), expected_data.get_mne().get_data()
+        )
+        assert data.get_preprocess_history() == expected_data.get_preprocess_history()
+    for raw in raw_list:
+        assert raw.is_raw()
+        assert raw.get_preprocess_history() == []
+
+def test_pipeline_desc(raw_list):
+    pipeline = preprocessor.PreprocessPipeline(raw_list)
+    assert pipeline.get_preprocess_desc(STEPS[1:3]) == (
+        'Filtering 1 ~ 40, Resample to 250'
+    )
+
+@pytest.mark.parametrize('steps', [
+    [],
+    [(preprocessor.Filtering, )],
+    [(preprocessor.Export, {'filepath': 'test'})],
+    [(preprocessor.PreprocessPipeline, {'steps': STEPS})]
+])
+def test_pipeline_invalid_steps(raw_list, steps):
+    pipeline = preprocessor.PreprocessPipeline(raw_list)
+    with pytest.raises(ValueError):
+        pipeline.data_preprocess(steps)
+
+def test_pipeline_step_check_data(raw_list):
+    # epoching twice is rejected by check data of the second step
+    pipeline = preprocessor.PreprocessPipeline(raw_list)
+    with pytest.raises(ValueError, match='Only raw data can be epoched'):
+        pipeline.data_preprocess([STEPS[3], STEPS[3]])
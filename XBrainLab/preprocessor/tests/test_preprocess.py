@@ -1,9 +1,12 @@
+from copy import deepcopy
+
 import mne
 import numpy as np
 import pytest
 
 from XBrainLab import preprocessor
 from XBrainLab.load_data import Raw
+from XBrainLab.utils import zip_strict
 
 from .test_base import (
     _generate_mne,
@@ -33,6 +36,8 @@ def epoch(mne_epoch):
 @pytest.mark.parametrize('target', ['raw', 'epoch'])
 def test_channel_selection(target, request):
     target = request.getfixturevalue(target)
+    # metadata computed before copying
+    assert target.get_nchan() == 4
     processor = preprocessor.ChannelSelection([target])
 
     with pytest.raises(ValueError):
@@ -44,6 +49,24 @@ def test_channel_selection(target, request):
     assert result.get_nchan() == 2
     assert result.get_preprocess_history()[0] == 'Select 2 Channel'
 
+@pytest.mark.parametrize('target', ['raw', 'epoch'])
+@pytest.mark.parametrize('selected_channels', [
+    ['Fp2', 'F3'], ['F4', 'Fp2'], ['F3', 'Fp1', 'Fp2']
+])
+def test_channel_selection_copy(target, selected_channels, request):
+    target = request.getfixturevalue(target)
+    data = target.get_mne().get_data()
+    processor = preprocessor.ChannelSelection([target])
+    result = processor.data_preprocess(selected_channels)[0]
+    picks = [target.get_mne().ch_names.index(ch) for ch in selected_channels]
+    assert result.get_mne().ch_names == selected_channels
+    assert target.get_mne().ch_names == ['Fp1', 'Fp2', 'F3', 'F4']
+    assert np.array_equal(result.get_mne().get_data(), data[..., picks, :])
+    assert np.array_equal(target.get_mne().get_data(), data)
+    assert not np.shares_memory(
+        result.get_mne()._data, target.get_mne()._data
+    )
+
 def test_edit_event_name_raw(raw): # noqa: F811
     with pytest.raises(
         ValueError, match="Event name can only be edited for epoched data"
@@ -106,6 +129,58 @@ def test_filtering(target_str, request):
     assert result.get_filter_range() == (1, fs)
     assert result.get_preprocess_history()[0] == 'Filtering 1 ~ ' + str(fs)
 
+@pytest.mark.parametrize('processor_cls, args', [
+    (preprocessor.Filtering, (1, 40)),
+    (preprocessor.Normalize, ('z score', )),
+    (preprocessor.Resample, (100, ))
+])
+@pytest.mark.parametrize('target_str', ['raw', 'epoch'])
+def test_copy_on_write(processor_cls, args, target_str, request):
+    target = request.getfixturevalue(target_str)
+    data = target.get_mne().get_data()
+    processor = processor_cls([target])
+    assert np.shares_memory(
+        processor.get_preprocessed_data_list()[0].get_mne()._data,
+        target.get_mne()._data
+    )
+    result = processor.data_preprocess(*args)[0]
+    assert not np.shares_memory(result.get_mne()._data, target.get_mne()._data)
+    assert np.array_equal(target.get_mne().get_data(), data)
+
+@pytest.mark.parametrize('processor_cls, args', [
+    (preprocessor.Filtering, (1, 40)),
+    (preprocessor.Resample, (100, )),
+    (preprocessor.Normalize, ('minmax', )),
+    (preprocessor.ChannelSelection, (['Fp2', 'F3'], )),
+    (preprocessor.WindowEpoch, (1, 0))
+])
+def test_lazy_raw(processor_cls, args, raw, tmp_path): # noqa: F811
+    path = str(tmp_path / 'sub-01_ses-01_raw.fif')
+    raw.get_mne().save(path, fmt='double')
+    lazy_raw = Raw(path, mne.io.read_raw_fif(path, preload=False))
+    lazy_raw.set_event(np.array([[1, 0, 1]]), {'a': 1})
+    raw.set_event(np.array([[1, 0, 1]]), {'a': 1})
+    expected = processor_cls([raw]).data_preprocess(*args)[0]
+    result = processor_cls([lazy_raw]).data_preprocess(*args)[0]
+    assert not lazy_raw.get_mne().preload
+    assert np.array_equal(
+        result.get_mne().get_data(), expected.get_mne().get_data()
+    )
+
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_filtering_concurrent(backend, raw): # noqa: F811
+    data_list = [deepcopy(raw) for _ in range(3)]
+    expected = preprocessor.Filtering(data_list).data_preprocess(1, 40)
+    processor = preprocessor.Filtering(data_list, num_workers=2, backend=backend)
+    result = processor.data_preprocess(1, 40)
+    assert len(result) == len(expected)
+    for data, expected_data in zip_strict(result, expected):
+        assert np.array_equal(
+            data.get_mne().get_data(), expected_data.get_mne().get_data()
+        )
+        assert data.get_filter_range() == (1, 40)
+        assert data.get_preprocess_history() == ['Filtering 1 ~ 40']
+
 # resample
 @pytest.mark.parametrize('target_str', ['raw', 'epoch'])
 def test_resample(target_str, request):
@@ -242,3 +317,39 @@ def test_normalization_zero_min():
 @pytest.mark.xfail
 def test_normalization_zero_min_minmax():
     raise NotImplementedError
+
+# normalize
+def _normalize_reference(data, norm):
+    if norm == 'z score':
+        return (data - data.mean(axis=-1, keepdims=True)) / data.std(
+            axis=-1, keepdims=True
+        )
+    data_min = data.min(axis=-1, keepdims=True)
+    data_max = data.max(axis=-1, keepdims=True)
+    return (data - data_min) / (data_max - data_min + 1e-12)
+
+@pytest.mark.parametrize('target_str', ['raw', 'epoch'])
+@pytest.mark.parametrize('norm', ['z score', 'minmax'])
+@pytest.mark.parametrize('dtype, chunk_size, tol', [
+    (None, None, 1e-12),
+    (None, 3, 1e-12),
+    ('float32', 2, 1e-5)
+])
+def test_normalize(target_str, norm, dtype, chunk_size, tol, request):
+    target = request.getfixturevalue(target_str)
+    original = target.get_mne().get_data().copy()
+    processor = preprocessor.Normalize([target])
+    processor.data_preprocess(norm, dtype=dtype, chunk_size=chunk_size)
+    result = processor.get_preprocessed_data_list()[0]
+    data = result.get_mne().get_data()
+    assert np.array_equal(target.get_mne().get_data(), original)
+    assert data.dtype == original.dtype
+    assert np.allclose(data, _normalize_reference(original, norm), atol=tol)
+    assert result.get_preprocess_history()[-1] == f'{norm} normalization'
+
+def test_normalize_invalid(epoch):
+    processor = preprocessor.Normalize([epoch])
+    with pytest.raises(ValueError, match='Unknown normalization method'):
+        processor.data_preprocess('unknown')
+    with pytest.raises(ValueError, match='chunk_size'):
+        processor.data_preprocess('minmax', chunk_size=0)
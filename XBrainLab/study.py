@@ -1,10 +1,20 @@
-from copy import deepcopy
-from typing import List, Type
+import contextlib
+import os
+import tempfile
+from typing import List, Optional, Tuple, Type, Union
+
+import numpy as np
 
 from .dataset import Dataset, DatasetGenerator, DataSplittingConfig, Epochs
 from .load_data import Raw, RawDataLoader
-from .preprocessor import PreprocessBase
-from .training import ModelHolder, Trainer, TrainingOption, TrainingPlanHolder
+from .preprocessor import PreprocessBase, PreprocessCache, PreprocessPipeline
+from .training import (
+    ModelHolder,
+    SaliencyStorage,
+    Trainer,
+    TrainingOption,
+    TrainingPlanHolder,
+)
 from .utils import validate_issubclass, validate_list_type, validate_type
 
 
@@ -19,6 +29,13 @@ class Study:
                 sequences of :class:`XBrainLab.preprocessor.base.PreprocessBase`.
         epoch_data: :class:`XBrainLab.dataset.Epochs` or None.
             The epoch data generated from list of :class:`XBrainLab.load_data.Raw`.
+        epoch_store_dir: str or None.
+            The directory for storing epoch data as memory-mapped files.
+            Epoch data is kept in memory if None.
+        epoch_dtype: numpy dtype.
+            The data type of epoch data, e.g. `np.float32` to halve memory usage.
+        preprocess_cache: :class:`XBrainLab.preprocessor.PreprocessCache` or None.
+            The disk cache of preprocessed data. Not cached if None.
         datasets: list[:class:`XBrainLab.dataset.Dataset`].
             The datasets generated from :class:`XBrainLab.dataset.DatasetGenerator`.
         model_holder: :class:`XBrainLab.training.ModelHolder` or None.
@@ -27,12 +44,19 @@ class Study:
             The training option.
         trainer: :class:`XBrainLab.training.Trainer` or None.
             The model trainer.
+        saliency_params: dict or None.
+            The saliency parameters.
+        saliency_storage: :class:`XBrainLab.training.SaliencyStorage`.
+            The storage mode of per-trial saliency maps.
     """
     def __init__(self) -> None:
          # raw data
         self.loaded_data_list = []
         self.preprocessed_data_list = []
         self.epoch_data = None
+        self.epoch_store_dir = None
+        self.epoch_dtype = np.float64
+        self.preprocess_cache = None
         # datasets
         self.datasets = []
         # training
@@ -41,6 +65,7 @@ class Study:
         self.trainer = None
         # visulaization
         self.saliency_params = None
+        self.saliency_storage = SaliencyStorage.FULL
 
     # step 1 - load data
     def get_raw_data_loader(self) -> RawDataLoader:
@@ -66,7 +91,7 @@ class Study:
         validate_list_type(loaded_data_list, Raw, 'loaded_data_list')
         self.clean_raw_data(force_update)
         self.set_preprocessed_data_list(
-            preprocessed_data_list=deepcopy(loaded_data_list),
+            preprocessed_data_list=[data.copy() for data in loaded_data_list],
             force_update=force_update
         )
         self.loaded_data_list = loaded_data_list
@@ -92,9 +117,150 @@ class Study:
         for preprocessed_data in preprocessed_data_list:
             # skip generating epoch data if data is still raw data
             if preprocessed_data.is_raw():
-                self.epoch_data = None
+                self._set_epoch_data(None)
                 return
-        self.epoch_data = Epochs(preprocessed_data_list)
+        store_path = self._create_epoch_store_path()
+        try:
+            epoch_data = Epochs(
+                preprocessed_data_list, store_path=store_path, dtype=self.epoch_dtype
+            )
+        except Exception:
+            self._remove_epoch_store(store_path)
+            raise
+        self._set_epoch_data(epoch_data)
+
+    def extend_preprocessed_data_list(
+        self,
+        preprocessed_data_list: List[Raw],
+        force_update: bool = False
+    ) -> None:
+        """Append newly preprocessed data, e.g. newly recorded sessions.
+
+        Unlike :meth:`set_preprocessed_data_list`, the epoch data is extended
+        in place, and the existing datasets and trainer are kept.
+        The new epochs are marked as remaining trials of the existing datasets.
+        If the new data contains new event names, the number of classes changes,
+        and the trainer built for the existing classes has to be cleaned.
+
+        Args:
+            preprocessed_data_list: The new preprocessed data.
+            force_update: Whether to force override and
+                          clear the trainer if the number of classes changes.
+
+        Raises:
+            RuntimeError: If training is still in progress.
+            ValueError: If the number of classes changes while a trainer
+                        is generated and :attr:`force_update` is False.
+        """
+        validate_list_type(preprocessed_data_list, Raw, 'preprocessed_data_list')
+        if self.is_training():
+            raise RuntimeError('Training still in progress')
+        if self.epoch_data is None:
+            self.set_preprocessed_data_list(
+                self.preprocessed_data_list + preprocessed_data_list,
+                force_update=force_update
+            )
+            return
+        event_names = {
+            event_name
+            for preprocessed_data in preprocessed_data_list
+            for event_name in preprocessed_data.get_event_list()[1]
+        }
+        if not event_names.issubset(self.epoch_data.get_label_map().values()):
+            self.clean_trainer(force_update=force_update)
+        old_store_path = self.epoch_data.store_path
+        store_path = self._create_epoch_store_path()
+        try:
+            self.epoch_data.extend(preprocessed_data_list, store_path=store_path)
+        except Exception:
+            self._remove_epoch_store(store_path)
+            raise
+        # the new file is only used if the epochs do not fit in the old one
+        if self.epoch_data.store_path == store_path:
+            self._remove_epoch_store(old_store_path)
+        else:
+            self._remove_epoch_store(store_path)
+        self.preprocessed_data_list = (
+            self.preprocessed_data_list + preprocessed_data_list
+        )
+
+    def _create_epoch_store_path(self) -> Optional[str]:
+        """Return a new file path in the epoch store directory, if set."""
+        if self.epoch_store_dir is None:
+            return None
+        os.makedirs(self.epoch_store_dir, exist_ok=True)
+        fd, store_path = tempfile.mkstemp(
+            suffix='.npy', prefix='epochs-', dir=self.epoch_store_dir
+        )
+        os.close(fd)
+        return store_path
+
+    @staticmethod
+    def _remove_epoch_store(store_path: Optional[str]) -> None:
+        """Remove a superseded epoch store file, if any.
+
+        The file is left in place if it cannot be removed,
+        e.g. while it is still memory-mapped on Windows.
+        """
+        if store_path is None:
+            return
+        with contextlib.suppress(OSError):
+            os.remove(store_path)
+
+    def _set_epoch_data(self, epoch_data: Optional[Epochs]) -> None:
+        """Replace the epoch data and remove the store file of the old one."""
+        old_epoch_data = self.epoch_data
+        self.epoch_data = epoch_data
+        if old_epoch_data is not None and old_epoch_data is not epoch_data:
+            self._remove_epoch_store(old_epoch_data.store_path)
+
+    def set_epoch_store_dir(self, epoch_store_dir: Optional[str]) -> None:
+        """Set the directory for storing epoch data on disk.
+
+        Epoch data generated afterwards is written to a new file in the directory
+        and memory-mapped, instead of being kept in memory.
+        The file is removed when the epoch data is regenerated or cleaned.
+
+        Args:
+            epoch_store_dir: The directory. Epoch data is kept in memory if None.
+        """
+        self.epoch_store_dir = epoch_store_dir
+
+    def set_epoch_dtype(self, epoch_dtype: Union[np.dtype, str]) -> None:
+        """Set the data type of epoch data.
+
+        Epoch data generated afterwards is converted to the data type.
+        Existing epoch data is kept unchanged, call :meth:`reset_preprocess`
+        or preprocess again to apply it.
+
+        Args:
+            epoch_dtype: The floating point data type, e.g. `np.float32`.
+        """
+        epoch_dtype = np.dtype(epoch_dtype)
+        if not np.issubdtype(epoch_dtype, np.floating):
+            raise ValueError(
+                f'Epoch data type must be a floating point type, got {epoch_dtype}.'
+            )
+        self.epoch_dtype = epoch_dtype
+
+    def set_preprocess_cache_dir(
+        self, cache_dir: Optional[str], max_size: int = 10 * 1024 ** 3
+    ) -> None:
+        """Set the directory for caching preprocessed data on disk.
+
+        Preprocessing steps applied afterwards load the result from the cache,
+        if the same files have been preprocessed with the same steps before.
+        Cached results are loaded with pickle, so the directory must be trusted.
+
+        Args:
+            cache_dir: The directory. Preprocessed data is not cached if None.
+            max_size: Maximum total size of the cache in bytes.
+                      Least recently used results are evicted when exceeded.
+        """
+        if cache_dir is None:
+            self.preprocess_cache = None
+        else:
+            self.preprocess_cache = PreprocessCache(cache_dir, max_size)
 
     def reset_preprocess(self, force_update=False) -> None:
         """Discard all preprocessed data and reset to loaded data.
@@ -105,20 +271,41 @@ class Study:
         """
         if self.loaded_data_list:
             self.set_preprocessed_data_list(
-                deepcopy(self.loaded_data_list), force_update=force_update
+                [data.copy() for data in self.loaded_data_list],
+                force_update=force_update
             )
 
-    def preprocess(self, preprocessor: Type[PreprocessBase], **kargs: dict) -> None:
+    def preprocess(
+        self,
+        preprocessor: Union[
+            Type[PreprocessBase], List[Tuple[Type[PreprocessBase], dict]]
+        ],
+        num_workers: int = 0,
+        backend: str = 'thread',
+        **kargs: dict
+    ) -> None:
         """Preprocess data.
 
         Args:
             preprocessor: The preprocessor class.
                           Should be subclass of
                           :class:`XBrainLab.preprocessor.base.PreprocessBase`.
+                          Or list of (preprocessor class, kwargs) applied to
+                          each file in one pass by
+                          :class:`XBrainLab.preprocessor.PreprocessPipeline`.
+            num_workers: Number of workers preprocessing files concurrently.
+                         If less than 2, the files are preprocessed sequentially.
+            backend: Type of the workers, "thread" or "process".
             **kargs: The parameters for preprocessor.
         """
+        if isinstance(preprocessor, list):
+            kargs = {'steps': preprocessor}
+            preprocessor = PreprocessPipeline
         validate_issubclass(preprocessor, PreprocessBase, 'preprocessor')
-        preprocessor = preprocessor(self.preprocessed_data_list)
+        preprocessor = preprocessor(
+            self.preprocessed_data_list, num_workers=num_workers, backend=backend,
+            cache=self.preprocess_cache
+        )
         preprocessor.check_data()
         preprocessed_data_list = preprocessor.data_preprocess(**kargs)
         self.set_preprocessed_data_list(preprocessed_data_list)
@@ -212,18 +399,36 @@ class Study:
         model_holder = self.model_holder
         datasets = self.datasets
         training_plan_holders = [
-            TrainingPlanHolder(model_holder, dataset, option, self.saliency_params)
+            TrainingPlanHolder(
+                model_holder, dataset, option, self.saliency_params,
+                saliency_storage=self.saliency_storage
+            )
             for dataset in datasets
         ]
         self.trainer = Trainer(training_plan_holders)
 
     # step 5 - training
-    def train(self, interact: bool = False) -> None:
+    def train(
+        self,
+        interact: bool = False,
+        num_workers: int = 0,
+        num_threads: Optional[int] = None,
+        split_repeat: bool = False,
+        ensemble: bool = False
+    ) -> None:
         """Start training.
 
         Args:
             interact: Whether to run in interactive mode.
                       If True, the training will run in a new thread.
+            num_workers: Number of worker processes for training plans in parallel.
+                         If less than 2, the plans are trained sequentially.
+            num_threads: Number of torch threads of each worker process.
+                         If None, the cpu count is evenly divided among workers.
+            split_repeat: Whether to distribute each repeat of a plan
+                          to workers individually.
+            ensemble: Whether to train the repeats of a plan together
+                      as a vectorized ensemble of models.
 
         Raises:
             ValueError: If no valid trainer has been generated.
@@ -231,7 +436,11 @@ class Study:
         if not self.trainer:
             raise ValueError('No valid trainer is generated')
 
-        self.trainer.run(interact=interact)
+        self.trainer.run(
+            interact=interact, num_workers=num_workers,
+            num_threads=num_threads, split_repeat=split_repeat,
+            ensemble=ensemble
+        )
 
     def stop_training(self) -> None:
         """Stop training.
@@ -300,16 +509,36 @@ class Study:
                 self.saliency_params = self.trainer.get_training_plan_holders()[0].get_saliency_params()
         return self.saliency_params
     
-    def set_saliency_params(self, saliency_params) -> None:
+    def set_saliency_params(self, saliency_params, interact: bool = False) -> None:
         """Set saliency parameters for saliency computation.
 
+        Only computed saliency maps whose parameters changed are recomputed.
+        Progress is reported by the progress text of the trainer.
+
         Args:
             saliency_params: The saliency parameters. Nest dictionary of {'method', {'param', value}}
+            interact: Whether to run in interactive mode.
+                      If True, the saliency maps are recomputed in a new thread.
         """
         self.saliency_params = saliency_params
         if self.trainer:
-            for training_plan_holder in self.trainer.get_training_plan_holders():
-                training_plan_holder.set_saliency_params(saliency_params)
+            self.trainer.set_saliency_params(saliency_params, interact=interact)
+
+    def set_saliency_storage(self, saliency_storage: SaliencyStorage) -> None:
+        """Set storage mode of per-trial saliency maps.
+
+        Saliency maps already computed are converted to the given mode.
+
+        Args:
+            saliency_storage: The storage mode.
+                              Only per-class aggregates are kept in AGGREGATE mode,
+                              and per-trial maps are recomputed when requested.
+        """
+        validate_type(saliency_storage, SaliencyStorage, 'saliency_storage')
+        self.saliency_storage = saliency_storage
+        if self.trainer:
+            for plan_holder in self.trainer.get_training_plan_holders():
+                plan_holder.set_saliency_storage(saliency_storage)
 
     """clean work flow
     ########################################
@@ -345,7 +574,7 @@ class Study:
             self.should_clean_raw_data(interact=True)
         self.loaded_data_list = []
         self.preprocessed_data_list = []
-        self.epoch_data = None
+        self._set_epoch_data(None)
 
     # stage 2
     def should_clean_datasets(self, interact: bool = True) -> bool:
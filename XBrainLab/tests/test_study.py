@@ -1,4 +1,7 @@
+import os
+
 import mne
+import numpy as np
 import pytest
 
 from XBrainLab import Study
@@ -10,7 +13,13 @@ from XBrainLab.dataset import (
 )
 from XBrainLab.load_data import Raw, RawDataLoader
 from XBrainLab.preprocessor import PreprocessBase
-from XBrainLab.training import TRAINING_EVALUATION, ModelHolder, TrainingOption
+from XBrainLab.training import (
+    TRAINING_EVALUATION,
+    ModelHolder,
+    SaliencyStorage,
+    TrainingOption,
+)
+from XBrainLab.utils import zip_strict
 
 
 def test_study_load_data():
@@ -88,6 +97,168 @@ def test_study_set_preprocessed_data_list(
     assert study.preprocessed_data_list[0].get_filepath() == 'test'
     test_hook(study, loaded_data_list, force_update)
 
+def test_study_reset_preprocess_shares_data(loaded_data_list):
+    study = Study()
+    study.set_loaded_data_list(loaded_data_list)
+    study.reset_preprocess()
+    for loaded_data, data in zip_strict(
+        loaded_data_list, study.preprocessed_data_list
+    ):
+        assert data is not loaded_data
+        assert np.shares_memory(data.get_mne()._data, loaded_data.get_mne()._data)
+        assert not data.get_mne()._data.flags.writeable
+        assert loaded_data.get_mne()._data.flags.writeable
+
+def test_study_preprocess_concurrently(loaded_data_list):
+    study = Study()
+    study.set_loaded_data_list(loaded_data_list)
+    study.preprocess(FakePreprocessBase, num_workers=2)
+    assert all(
+        data.get_filepath() == 'new' for data in study.preprocessed_data_list
+    )
+    assert study.preprocessed_data_list[0].get_preprocess_history() == ['test']
+
+def test_study_preprocess_pipeline(loaded_data_list):
+    study = Study()
+    study.set_loaded_data_list(loaded_data_list)
+    study.preprocess([(FakePreprocessBase, {}), (FakePreprocessBase, {})])
+    for data in study.preprocessed_data_list:
+        assert data.get_filepath() == 'new'
+        assert data.get_preprocess_history() == ['test', 'test']
+
+def test_study_set_preprocess_cache_dir(tmp_path, loaded_data_list, mocker):
+    study = Study()
+    study.set_preprocess_cache_dir(str(tmp_path), max_size=1024)
+    assert study.preprocess_cache.cache_dir == str(tmp_path)
+    assert study.preprocess_cache.max_size == 1024
+    study.set_loaded_data_list(loaded_data_list)
+    init = mocker.spy(FakePreprocessBase, '__init__')
+    study.preprocess(FakePreprocessBase)
+    assert init.call_args.kwargs['cache'] is study.preprocess_cache
+    study.set_preprocess_cache_dir(None)
+    assert study.preprocess_cache is None
+
+def test_study_set_epoch_store_dir(tmp_path, loaded_epoch_data_list):
+    study = Study()
+    study.set_epoch_store_dir(str(tmp_path / 'store'))
+    study.set_loaded_data_list(loaded_epoch_data_list)
+    store_path = study.epoch_data.store_path
+    assert os.path.dirname(store_path) == str(tmp_path / 'store')
+    assert isinstance(study.epoch_data.get_data(), np.memmap)
+
+    study.reset_preprocess()
+    assert study.epoch_data.store_path != store_path
+    assert not os.path.exists(store_path)
+    store_path = study.epoch_data.store_path
+    study.set_epoch_store_dir(None)
+    study.reset_preprocess()
+    assert study.epoch_data.store_path is None
+    assert not os.path.exists(store_path)
+
+    study.set_epoch_store_dir(str(tmp_path / 'store'))
+    study.reset_preprocess()
+    study.clean_raw_data()
+    assert os.listdir(tmp_path / 'store') == []
+
+def test_study_extend_preprocessed_data_list_store(
+    tmp_path, loaded_epoch_data_list
+):
+    study = Study()
+    study.set_epoch_store_dir(str(tmp_path))
+    study.set_loaded_data_list(loaded_epoch_data_list)
+    mne_data = mne.EpochsArray([[[1]], [[2]]], mne.create_info(['test'], 100))
+    study.extend_preprocessed_data_list([Raw('new', mne_data)])
+    store_path = study.epoch_data.store_path
+    assert os.listdir(tmp_path) == [os.path.basename(store_path)]
+    # grown in place
+    mne_data = mne.EpochsArray([[[3]]], mne.create_info(['test'], 100))
+    study.extend_preprocessed_data_list([Raw('new', mne_data)])
+    assert study.epoch_data.store_path == store_path
+    assert os.listdir(tmp_path) == [os.path.basename(store_path)]
+
+    mne_data = mne.EpochsArray([[[1, 2]]], mne.create_info(['test'], 100))
+    with pytest.raises(ValueError):
+        study.extend_preprocessed_data_list([Raw('new', mne_data)])
+    assert os.listdir(tmp_path) == [os.path.basename(study.epoch_data.store_path)]
+
+def test_study_set_epoch_dtype(loaded_epoch_data_list):
+    study = Study()
+    study.set_loaded_data_list(loaded_epoch_data_list)
+    assert study.epoch_data.get_data().dtype == np.float64
+    study.set_epoch_dtype('float32')
+    assert study.epoch_dtype == np.float32
+    study.reset_preprocess()
+    assert study.epoch_data.get_data().dtype == np.float32
+    assert study.epoch_data.get_label_list().dtype == np.int32
+    with pytest.raises(ValueError):
+        study.set_epoch_dtype(np.int32)
+
+def test_study_extend_preprocessed_data_list(loaded_epoch_data_list):
+    config = DataSplittingConfig(
+        TrainingType.FULL, is_cross_validation=False,
+        val_splitter_list=[], test_splitter_list=[]
+    )
+    study = Study()
+    study.set_loaded_data_list(loaded_epoch_data_list)
+    epoch_data = study.epoch_data
+    dataset = Dataset(epoch_data, config)
+    study.set_datasets([dataset])
+
+    mne_data = mne.EpochsArray([[[1]], [[2]]], mne.create_info(['test'], 100))
+    new_data = Raw('new', mne_data)
+    study.extend_preprocessed_data_list([new_data])
+    assert study.epoch_data is epoch_data
+    assert study.datasets == [dataset]
+    assert epoch_data.get_data_length() == 3
+    assert study.preprocessed_data_list[-1] is new_data
+    assert np.array_equal(dataset.get_remaining_mask(), [True, True, True])
+
+def test_study_extend_preprocessed_data_list_training(loaded_epoch_data_list):
+    study = Study()
+    study.set_loaded_data_list(loaded_epoch_data_list)
+    study.trainer = FakeTrainer()
+    study.train()
+    mne_data = mne.EpochsArray([[[1]]], mne.create_info(['test'], 100))
+    with pytest.raises(RuntimeError):
+        study.extend_preprocessed_data_list([Raw('new', mne_data)])
+    assert study.epoch_data.get_data_length() == 1
+
+@pytest.mark.parametrize('force_update', [True, False])
+def test_study_extend_preprocessed_data_list_new_class(
+    loaded_epoch_data_list, force_update
+):
+    study = Study()
+    study.set_loaded_data_list(loaded_epoch_data_list)
+    trainer = FakeTrainer()
+    study.trainer = trainer
+    # same classes, trainer is kept
+    mne_data = mne.EpochsArray([[[1]]], mne.create_info(['test'], 100))
+    study.extend_preprocessed_data_list([Raw('new', mne_data)])
+    assert study.trainer is trainer
+    assert study.epoch_data.get_label_number() == 1
+
+    mne_data = mne.EpochsArray(
+        [[[2]]], mne.create_info(['test'], 100), event_id={'new': 1}
+    )
+    new_data = Raw('new', mne_data)
+    if not force_update:
+        with pytest.raises(ValueError):
+            study.extend_preprocessed_data_list([new_data])
+        assert study.trainer is trainer
+        assert study.epoch_data.get_data_length() == 2
+        study.clean_trainer()
+    study.extend_preprocessed_data_list([new_data], force_update=force_update)
+    assert study.trainer is None
+    assert study.epoch_data.get_data_length() == 3
+    assert study.epoch_data.get_label_number() == 2
+
+def test_study_extend_preprocessed_data_list_raw(loaded_data_list):
+    study = Study()
+    study.set_loaded_data_list(loaded_data_list)
+    study.extend_preprocessed_data_list(loaded_data_list)
+    assert len(study.preprocessed_data_list) == 2
+    assert study.epoch_data is None
+
 def test_study_get_datasets_generator(loaded_epoch_data_list):
     config = DataSplittingConfig(
         TrainingType.FULL, is_cross_validation=False,
@@ -150,15 +321,25 @@ class FakePlan:
     def get_eval_record(self): # pragma: no cover
         pass
 
+class FakeHolder:
+    def set_saliency_storage(self, saliency_storage):
+        self.saliency_storage = saliency_storage
+
 class FakeTrainer:
     def __init__(self):
         self.running = False
         self.interact = None
         self.interrupt = False
         self.return_plan = False
-    def run(self, interact=False):
+        self.holders = [FakeHolder(), FakeHolder()]
+    def get_training_plan_holders(self):
+        return self.holders
+    def run(self, interact=False, **kwargs):
         self.running = True
         self.interact = interact
+    def set_saliency_params(self, saliency_params, interact=False):
+        self.saliency_params = saliency_params
+        self.interact = interact
     def set_interrupt(self):
         self.interrupt = True
     def is_running(self):
@@ -228,6 +409,9 @@ def test_study_generate_plan(mocker, trainer_study, force_update):
         assert called_args[0] == 3
         assert called_args[1] == (i + 1)
         assert called_args[2] == 2
+        assert holder_mock.call_args_list[i][1] == {
+            'saliency_storage': SaliencyStorage.FULL
+        }
 
     trainer_mock.assert_called_once()
 
@@ -256,6 +440,22 @@ def test_study_training(trainer_study):
     trainer_study.stop_training()
     assert trainer_study.trainer.interrupt
 
+def test_study_set_saliency_params(trainer_study):
+    saliency_params = {'SmoothGrad': {'nt_samples': 2}}
+    trainer_study.set_saliency_params(saliency_params, interact=True)
+    assert trainer_study.get_saliency_params() == saliency_params
+    assert trainer_study.trainer.saliency_params == saliency_params
+    assert trainer_study.trainer.interact
+
+def test_study_set_saliency_storage(trainer_study):
+    assert trainer_study.saliency_storage == SaliencyStorage.FULL
+    trainer_study.set_saliency_storage(SaliencyStorage.DISK)
+    assert trainer_study.saliency_storage == SaliencyStorage.DISK
+    for holder in trainer_study.trainer.holders:
+        assert holder.saliency_storage == SaliencyStorage.DISK
+    with pytest.raises(TypeError):
+        trainer_study.set_saliency_storage('disk')
+
 def test_study_training_not_set():
     study = Study()
     assert not study.is_training()
@@ -6,6 +6,7 @@ from .option import (
     parse_device_name,
     parse_optim_name,
 )
+from .record import SaliencyStorage
 from .trainer import Trainer
 from .training_plan import TrainingPlanHolder
 
@@ -18,4 +19,5 @@ __all__ = [
     'parse_optim_name',
     'TrainingPlanHolder',
     'Trainer',
+    'SaliencyStorage',
 ]
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from copy import deepcopy
+
+import torch
+from torch.func import functional_call, stack_module_state, vmap
+
+from ..utils import zip_strict
+
+
+class ModelEnsemble:
+    """Class for training models of identical architecture in one vectorized pass
+
+    Parameters and buffers of the models are stacked along a new leading
+    dimension, and the forward pass is vectorized with :func:`torch.func.vmap`
+    over :func:`torch.func.functional_call`. Dropout draws different masks
+    for each model.
+
+    Attributes:
+        models: list[:class:`torch.nn.Module`]
+            Models to be stacked
+        params: dict[str, :class:`torch.Tensor`]
+            Stacked parameters, leaf tensors to be optimized
+        buffers: dict[str, :class:`torch.Tensor`]
+            Stacked buffers, e.g. running statistics of batch normalization
+        base_model: :class:`torch.nn.Module`
+            Stateless copy of the model on meta device, used for functional call
+    """
+    def __init__(self, models: list[torch.nn.Module]):
+        if len(models) == 0:
+            raise ValueError('No model to be stacked')
+        self.models = models
+        self.params, self.buffers = stack_module_state(models)
+        self.base_model = deepcopy(models[0]).to('meta')
+
+        def forward(params, buffers, inputs):
+            return functional_call(self.base_model, (params, buffers), (inputs,))
+        self.forward = vmap(
+            forward, in_dims=(0, 0, None), randomness='different'
+        )
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def __call__(self, inputs: torch.Tensor) -> torch.Tensor:
+        """Return outputs of all models, of shape (n_models, batch_size, ...)"""
+        return self.forward(self.params, self.buffers, inputs)
+
+    def parameters(self) -> list[torch.Tensor]:
+        """Return stacked parameters for constructing optimizer"""
+        return list(self.params.values())
+
+    def train(self) -> None:
+        """Set models to training mode"""
+        self.base_model.train()
+
+    def eval(self) -> None:
+        """Set models to evaluation mode"""
+        self.base_model.eval()
+
+    def unstack(self) -> None:
+        """Copy the stacked parameters and buffers back to each model"""
+        with torch.no_grad():
+            for i, model in enumerate(self.models):
+                for name, param in model.named_parameters():
+                    param.copy_(self.params[name][i])
+                for name, buffer in model.named_buffers():
+                    buffer.copy_(self.buffers[name][i])
+
+    def stack_optimizer_state(
+        self,
+        optimizer: torch.optim.Optimizer,
+        optimizer_list: list[torch.optim.Optimizer]
+    ) -> None:
+        """Load the states of each model's optimizer into the ensemble optimizer
+
+        Only element-wise optimizers with a single parameter group are supported,
+        e.g. SGD, Adam and AdamW.
+
+        Args:
+            optimizer: Optimizer of the stacked parameters
+            optimizer_list: Optimizers of each model, in the order of :attr:`models`
+        """
+        if optimizer is None or any(optim is None for optim in optimizer_list):
+            return
+        for optim in optimizer_list:
+            if not optim.state:
+                return
+        for stacked_param, *params in zip_strict(
+            self.parameters(),
+            *[optim.param_groups[0]['params'] for optim in optimizer_list]
+        ):
+            state_list = [
+                optim.state[param]
+                for optim, param in zip_strict(optimizer_list, params)
+            ]
+            optimizer.state[stacked_param] = {
+                key: (
+                    torch.stack([state[key] for state in state_list])
+                    if isinstance(value, torch.Tensor) and value.dim() > 0
+                    else deepcopy(value)
+                )
+                for key, value in state_list[0].items()
+            }
+
+    def unstack_optimizer_state(
+        self,
+        optimizer: torch.optim.Optimizer,
+        optimizer_list: list[torch.optim.Optimizer]
+    ) -> None:
+        """Write the state of the ensemble optimizer back to each model's optimizer
+
+        Args:
+            optimizer: Optimizer of the stacked parameters
+            optimizer_list: Optimizers of each model, in the order of :attr:`models`
+        """
+        if optimizer is None:
+            return
+        for i, optim in enumerate(optimizer_list):
+            if optim is None:
+                continue
+            for stacked_param, param in zip_strict(
+                self.parameters(), optim.param_groups[0]['params']
+            ):
+                if stacked_param not in optimizer.state:
+                    continue
+                optim.state[param] = {
+                    key: (
+                        value[i].clone()
+                        if isinstance(value, torch.Tensor) and value.dim() > 0
+                        else deepcopy(value)
+                    )
+                    for key, value in optimizer.state[stacked_param].items()
+                }
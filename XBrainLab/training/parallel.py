@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import copy
+import multiprocessing
+import os
+import queue
+import threading
+import traceback
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing.queues import Queue
+from multiprocessing.synchronize import Event
+from typing import TYPE_CHECKING
+
+import torch
+
+if TYPE_CHECKING: # pragma: no cover
+    from .training_plan import TrainingPlanHolder
+
+# interval in seconds for reporting progress from worker processes
+REPORT_INTERVAL = 0.5
+
+# states of worker process, set by :func:`_init_worker`
+_worker_state = {}
+
+
+def _init_worker(
+    training_plan_holders: list[TrainingPlanHolder] | None,
+    num_threads: int,
+    stop_event: Event,
+    report_queue: Queue,
+    ensemble: bool = False
+) -> None:
+    """Initialize worker process of the training pool
+
+    Args:
+        training_plan_holders: Training plan holders to be trained.
+                               None if each job is sent with its own holder
+        num_threads: Number of intra-op threads used by torch in the worker
+        stop_event: Event for interrupting the training
+        report_queue: Queue for reporting training progress
+        ensemble: Whether to train the repeats as a vectorized ensemble
+    """
+    torch.set_num_threads(num_threads)
+    _worker_state['training_plan_holders'] = training_plan_holders
+    _worker_state['stop_event'] = stop_event
+    _worker_state['report_queue'] = report_queue
+    _worker_state['ensemble'] = ensemble
+
+def _get_report(
+    plan_holder: TrainingPlanHolder, plan_idx: int, repeat_list: list[int],
+    include_model: bool = False
+) -> dict:
+    """Return the training progress of the given repeats of a plan
+
+    Progress reports without model are put into the report queue while the
+    training goes on, and the queue pickles them later in its feeder thread.
+    A snapshot of the records is returned instead of their live state.
+    """
+    records = {
+        i: plan_holder.get_plans()[i].get_state(include_model=include_model)
+        for i in repeat_list
+    }
+    if not include_model:
+        records = copy.deepcopy(records)
+    return {
+        'plan_idx': plan_idx,
+        'status': plan_holder.status,
+        'error': plan_holder.error,
+        'records': records
+    }
+
+def _train_in_worker(
+    plan_idx: int, repeat: int | None,
+    plan_holder: TrainingPlanHolder | None = None
+) -> dict:
+    """Train a plan or a single repeat of a plan in worker process
+
+    Progress is reported periodically through the report queue,
+    and the interrupt flag of the plan is set once the stop event is set.
+
+    Args:
+        plan_idx: Index of the training plan holder
+        repeat: Index of the repeat to be trained. Train all repeats if None
+        plan_holder: Training plan holder sent with the job.
+                     Taken from the holders of the worker if None
+
+    Returns:
+        Training result, including full state of the trained repeats
+    """
+    if plan_holder is None:
+        plan_holder = _worker_state['training_plan_holders'][plan_idx]
+    stop_event = _worker_state['stop_event']
+    report_queue = _worker_state['report_queue']
+    if repeat is None:
+        repeat_list = list(range(len(plan_holder.get_plans())))
+    else:
+        repeat_list = [repeat]
+    plan_holder.clear_interrupt()
+    if stop_event.is_set():
+        plan_holder.set_interrupt()
+
+    done = threading.Event()
+    def monitor():
+        while not done.wait(REPORT_INTERVAL):
+            if stop_event.is_set():
+                plan_holder.set_interrupt()
+            report_queue.put(_get_report(plan_holder, plan_idx, repeat_list))
+    monitor_thread = threading.Thread(target=monitor, daemon=True)
+    monitor_thread.start()
+    try:
+        plan_holder.train(repeat_list, ensemble=_worker_state['ensemble'])
+    finally:
+        done.set()
+        monitor_thread.join()
+    return _get_report(plan_holder, plan_idx, repeat_list, include_model=True)
+
+
+class TrainingPool:
+    """Class for training plans with a pool of worker processes
+
+    Each job is either a whole plan or a single repeat of a plan.
+    Since every repeat restores its own random state before training,
+    the result is identical to training in the current process,
+    given the same number of torch threads.
+
+    Attributes:
+        training_plan_holders: list[:class:`TrainingPlanHolder`]
+            Training plan holders to be trained
+        num_workers: int
+            Number of worker processes
+        num_threads: int
+            Number of torch threads of each worker process
+        ensemble: bool
+            Whether to train the repeats of each job as a vectorized ensemble
+    """
+    def __init__(
+        self,
+        training_plan_holders: list[TrainingPlanHolder],
+        num_workers: int,
+        num_threads: int | None = None,
+        ensemble: bool = False
+    ):
+        self.training_plan_holders = training_plan_holders
+        self.num_workers = num_workers
+        if num_threads is None:
+            num_threads = max(1, (os.cpu_count() or 1) // num_workers)
+        self.num_threads = num_threads
+        self.ensemble = ensemble
+
+    def get_mp_context(self) -> multiprocessing.context.BaseContext:
+        """Return multiprocessing context for the worker pool
+
+        CUDA cannot be re-initialized in forked process, spawn is used instead
+        """
+        for plan_holder in self.training_plan_holders:
+            if plan_holder.option.get_device() != 'cpu':
+                return multiprocessing.get_context('spawn')
+        return multiprocessing.get_context()
+
+    def apply_report(self, report: dict, finished_jobs: set) -> None:
+        """Apply training progress reported by worker to the plan holder
+
+        Args:
+            report: Report generated by worker process
+            finished_jobs: Set of (plan index, repeat index) already finished,
+                           reports of finished repeats are outdated and ignored
+        """
+        plan_idx = report['plan_idx']
+        plan_holder = self.training_plan_holders[plan_idx]
+        records = {
+            repeat: state for repeat, state in report['records'].items()
+            if (plan_idx, repeat) not in finished_jobs
+        }
+        if not records:
+            return
+        for repeat, state in records.items():
+            train_record = plan_holder.get_plans()[repeat]
+            train_record.set_state(state)
+            plan_holder.attach_saliency_source(train_record)
+        plan_holder.status = report['status']
+        plan_holder.error = report['error']
+
+    def run(
+        self,
+        job_list: list[tuple[int, int | None]],
+        is_interrupted: Callable[[], bool],
+        on_progress: Callable[[list[str]], None] | None = None
+    ) -> None:
+        """Run the jobs and merge the result back to the plan holders
+
+        Args:
+            job_list: List of (plan index, repeat index).
+                      Repeat index is None if all repeats are trained by one worker
+            is_interrupted: Callback returning whether to interrupt the training
+            on_progress: Callback receiving names of plans currently in training
+        """
+        if not job_list or is_interrupted():
+            return
+        mp_context = self.get_mp_context()
+        # forked workers inherit the holders, other start methods pickle the
+        # initializer arguments for every worker, so only the holder of each job
+        # is sent along with the job instead
+        shared = mp_context.get_start_method() == 'fork'
+        stop_event = mp_context.Event()
+        report_queue = mp_context.Queue()
+        finished_jobs = set()
+
+        def drain_report_queue():
+            while True:
+                try:
+                    report = report_queue.get_nowait()
+                except queue.Empty:
+                    return
+                self.apply_report(report, finished_jobs)
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(
+                self.training_plan_holders if shared else None, self.num_threads,
+                stop_event, report_queue, self.ensemble
+            )
+        )
+        try:
+            futures = {
+                executor.submit(
+                    _train_in_worker, plan_idx, repeat,
+                    None if shared else self.training_plan_holders[plan_idx]
+                ): (plan_idx, repeat)
+                for plan_idx, repeat in job_list
+            }
+            pending = set(futures)
+            while pending:
+                if is_interrupted():
+                    stop_event.set()
+                    for future in pending:
+                        future.cancel()
+                done, pending = wait(
+                    pending, timeout=REPORT_INTERVAL, return_when=FIRST_COMPLETED
+                )
+                drain_report_queue()
+                for future in done:
+                    plan_idx, _ = futures[future]
+                    plan_holder = self.training_plan_holders[plan_idx]
+                    if future.cancelled():
+                        continue
+                    try:
+                        report = future.result()
+                    except Exception as e:
+                        traceback.print_exc()
+                        plan_holder.error = str(e)
+                        continue
+                    self.apply_report(report, finished_jobs)
+                    finished_jobs.update(
+                        (plan_idx, repeat) for repeat in report['records']
+                    )
+                if on_progress and not is_interrupted():
+                    running_plans = []
+                    for future in pending:
+                        plan_idx, _ = futures[future]
+                        name = self.training_plan_holders[plan_idx].get_name()
+                        if future.running() and name not in running_plans:
+                            running_plans.append(name)
+                    if running_plans:
+                        on_progress(running_plans)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            report_queue.close()
+
+        for plan_idx in {plan_idx for plan_idx, _ in job_list}:
+            self.training_plan_holders[plan_idx].reset_status()
@@ -1,4 +1,10 @@
 from .eval import EvalRecord
+from .eval_store import EvalStore
+from .metric import MetricAccumulator
+from .saliency_storage import SaliencyAggregate, SaliencyStorage
 from .train import RecordKey, TrainRecord, TrainRecordKey
 
-__all__ = ['TrainRecord', 'RecordKey', 'TrainRecordKey', 'EvalRecord']
+__all__ = [
+    'TrainRecord', 'RecordKey', 'TrainRecordKey', 'EvalRecord', 'MetricAccumulator',
+    'SaliencyAggregate', 'SaliencyStorage', 'EvalStore'
+]
@@ -1,9 +1,34 @@
+from __future__ import annotations
+
 import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections.abc import Callable
 
 import numpy as np
 import torch
 from sklearn.metrics import roc_auc_score
 
+from ...utils import zip_strict
+from .eval_store import SALIENCY_DIR, EvalStore
+from .saliency_storage import (
+    SaliencyAggregate,
+    SaliencyStorage,
+    remove_trials,
+    store_trials,
+)
+
+# attribute name of each saliency method, in the order of constructor arguments
+SALIENCY_ATTRIBUTES = {
+    'Gradient': 'gradient',
+    'Gradient * Input': 'gradient_input',
+    'SmoothGrad': 'smoothgrad',
+    'SmoothGrad_Squared': 'smoothgrad_sq',
+    'VarGrad': 'vargrad',
+}
+
 
 def calculate_confusion(output: np.ndarray, label: np.ndarray) -> np.ndarray:
     """Calculate confusion matrix.
@@ -22,41 +47,497 @@ def calculate_confusion(output: np.ndarray, label: np.ndarray) -> np.ndarray:
             ).sum()
     return confusion
 
+def get_saliency_key(
+    method: str, saliency_params: dict | None
+) -> tuple[str, tuple]:
+    """Return key identifying saliency map of a method computed with parameters.
+
+    Args:
+        method: Saliency method name.
+        saliency_params: Parameters of each noise tunnel saliency method.
+
+    Raises:
+        NotImplementedError: If the method is not supported.
+    """
+    if method not in SALIENCY_ATTRIBUTES:
+        raise NotImplementedError(f'Unsupported saliency method: {method}')
+    params = (saliency_params or {}).get(method) or {}
+    return method, tuple(sorted(params.items()))
+
 
 class EvalRecord:
     """Class for recording evaluation result.
 
+    Only labels and outputs are recorded when evaluated. Saliency maps are
+    computed by :attr:`saliency_source` on first access, and memoized by
+    method and saliency parameters until the parameters change.
+    Per-trial maps are kept according to :attr:`saliency_storage`,
+    along with per-class aggregates read by the visualizers.
+    Once saved to an :class:`EvalStore`, saliency maps are written to it
+    when computed, and read from it on first access after loading.
+
     Attributes:
         label: :class:`numpy.ndarray` of shape (n,).
             Ground truth label.
         output: :class:`numpy.ndarray` of shape (n, classNum).
             Output of model.
-        gradient: dict of :class:`numpy.ndarray` of shape (n, classNum, ...) with
-                  class index as key.
-            Gradient of model by class index.
+        saliency_params: dict | None
+            Parameters of each noise tunnel saliency method.
+        saliency: dict[tuple[str, tuple], dict]
+            Memoized saliency maps by (method, parameters). Each value is a dict
+            of :class:`numpy.ndarray` of shape (n, ...) with class index as key.
+        saliency_aggregates: dict[tuple[str, tuple], dict]
+            Memoized per-class aggregates by (method, parameters). Each value is
+            a dict of :class:`SaliencyAggregate` with class index as key.
+        saliency_source: Callable[[list[str], dict], dict] | None
+            Function computing saliency maps of the evaluated model, called with
+            the methods and saliency parameters, returning saliency maps by
+            method. Not pickled, since it refers to the model and dataset.
+        saliency_storage: :class:`SaliencyStorage`
+            Storage mode of per-trial saliency maps.
+        saliency_dir: str | None
+            Directory of saliency maps spilled to disk in DISK mode.
+            The saliency directory of :attr:`store` is used if None,
+            or a temporary directory removed along with the record if not saved.
+            Files of superseded maps are removed, except those of the store.
+        store: :class:`EvalStore` | None
+            Evaluation store the record is saved to. None if not saved.
     """
-    def __init__(self, label: np.ndarray, output: np.ndarray, gradient: dict, gradient_input:dict, smoothgrad: dict, smoothgrad_sq: dict, vargrad:dict) -> None:
+    def __init__(
+        self,
+        label: np.ndarray,
+        output: np.ndarray,
+        gradient: dict | None = None,
+        gradient_input: dict | None = None,
+        smoothgrad: dict | None = None,
+        smoothgrad_sq: dict | None = None,
+        vargrad: dict | None = None,
+        saliency_params: dict | None = None,
+        saliency_storage: SaliencyStorage = SaliencyStorage.FULL,
+        saliency_dir: str | None = None
+    ) -> None:
         self.label = label
         self.output = output
-        self.gradient = gradient
-        self.gradient_input = gradient_input
-        self.smoothgrad = smoothgrad
-        self.smoothgrad_sq = smoothgrad_sq
-        self.vargrad = vargrad
+        self.saliency_params = saliency_params
+        self.saliency = {}
+        self.saliency_aggregates = {}
+        self.saliency_source = None
+        self.saliency_storage = saliency_storage
+        self.saliency_dir = saliency_dir
+        self.store = None
+        self._lock = threading.Lock()
+        self._temp_dir_finalizer = None
+        saliency_list = [gradient, gradient_input, smoothgrad, smoothgrad_sq, vargrad]
+        for method, saliency in zip_strict(SALIENCY_ATTRIBUTES, saliency_list):
+            if saliency is not None:
+                self._store_saliency(self._get_saliency_key(method), saliency)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['saliency_source'] = None
+        del state['_lock']
+        # the temporary directory is owned by this record only
+        finalizer = state.pop('_temp_dir_finalizer')
+        if finalizer is not None and finalizer.alive:
+            state['saliency_dir'] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        state = state.copy()
+        state.setdefault('saliency_params', None)
+        state.setdefault('saliency', {})
+        state.setdefault('saliency_aggregates', {})
+        state.setdefault('saliency_source', None)
+        state.setdefault('saliency_storage', SaliencyStorage.FULL)
+        state.setdefault('saliency_dir', None)
+        state.setdefault('store', None)
+        # records pickled before saliency maps were computed on demand
+        legacy = {
+            method: state.pop(attr) for method, attr in SALIENCY_ATTRIBUTES.items()
+            if attr in state
+        }
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._temp_dir_finalizer = None
+        for method, saliency in legacy.items():
+            if saliency is not None:
+                self.saliency[self._get_saliency_key(method)] = saliency
+
+    def _get_saliency_key(self, method: str) -> tuple[str, tuple]:
+        """Return memo key of saliency method with current parameters."""
+        return get_saliency_key(method, self.saliency_params)
+
+    def _remove_spilled(self, old: dict | None, new: dict | None = None) -> None:
+        """Remove files of spilled maps no longer memoized.
+
+        Only files in :attr:`saliency_dir` are removed, the store removes
+        its own files once they are unlisted.
+
+        Args:
+            old: Maps by class index no longer memoized.
+            new: Maps by class index memoized instead, which are kept.
+        """
+        if not old or not self.saliency_dir:
+            return
+        spill_dir = os.path.abspath(self.saliency_dir)
+        if self.store and spill_dir == os.path.abspath(
+            os.path.join(self.store.directory, SALIENCY_DIR)
+        ):
+            return
+        kept = {id(trials) for trials in (new or {}).values()}
+        for trials in old.values():
+            if id(trials) in kept or not isinstance(trials, np.memmap):
+                continue
+            if os.path.dirname(trials.filename or '') == spill_dir:
+                remove_trials(trials)
+
+    def _store_saliency(self, key: tuple[str, tuple], saliency: dict) -> None:
+        """Memoize saliency maps of all classes in the storage mode."""
+        old = self.saliency.get(key)
+        if self.saliency_storage == SaliencyStorage.FULL:
+            self.saliency[key] = saliency
+            self._remove_spilled(old, saliency)
+            return
+        if key not in self.saliency_aggregates:
+            self.saliency_aggregates[key] = {
+                labelIndex: SaliencyAggregate.from_trials(trials)
+                for labelIndex, trials in saliency.items()
+            }
+        if self.saliency_storage == SaliencyStorage.AGGREGATE:
+            self._remove_spilled(self.saliency.pop(key, None))
+            return
+        if self.saliency_storage == SaliencyStorage.DISK and not self.saliency_dir:
+            if self.store:
+                # spilled maps are the per-trial maps of the store
+                self.saliency_dir = os.path.join(self.store.directory, SALIENCY_DIR)
+            else:
+                self.saliency_dir = tempfile.mkdtemp(prefix='xbrainlab_saliency_')
+                self._temp_dir_finalizer = weakref.finalize(
+                    self, shutil.rmtree, self.saliency_dir, True
+                )
+        filepath = os.path.join(
+            self.saliency_dir or '', f'{SALIENCY_ATTRIBUTES[key[0]]}_{{}}.npy'
+        )
+        self.saliency[key] = {
+            labelIndex: store_trials(
+                trials, self.saliency_storage, filepath.format(labelIndex)
+            )
+            for labelIndex, trials in saliency.items()
+        }
+        self._remove_spilled(old, self.saliency[key])
+
+    def set_saliency_source(
+        self, saliency_source: Callable[[list[str], dict], dict] | None
+    ) -> None:
+        """Set the function computing saliency maps on demand."""
+        self.saliency_source = saliency_source
+
+    def set_saliency_storage(
+        self, saliency_storage: SaliencyStorage, saliency_dir: str | None = None
+    ) -> None:
+        """Set storage mode of per-trial saliency maps.
+
+        Memoized saliency maps are converted to the new storage mode.
+
+        Args:
+            saliency_storage: Storage mode.
+            saliency_dir: Directory of saliency maps spilled to disk in DISK mode.
+                          Unchanged if None.
+        """
+        with self._lock:
+            self.saliency_storage = saliency_storage
+            if saliency_dir:
+                self.saliency_dir = saliency_dir
+            for key, saliency in list(self.saliency.items()):
+                self._store_saliency(key, saliency)
+
+    def set_saliency_params(self, saliency_params: dict | None) -> list[str]:
+        """Set saliency parameters.
+
+        Memoized saliency maps of methods whose parameters changed are
+        released, and computed with the new parameters on next access.
+        Maps of the other methods are kept.
+
+        Returns:
+            Methods computed with the previous parameters, which are outdated.
+        """
+        with self._lock:
+            outdated = [
+                method for method in SALIENCY_ATTRIBUTES
+                if self.has_saliency(method) and
+                get_saliency_key(method, saliency_params)
+                != self._get_saliency_key(method)
+            ]
+            self.saliency_params = saliency_params
+            if self.store:
+                self.store.write_saliency_params(saliency_params)
+            outdated_saliency = [
+                value for key, value in self.saliency.items()
+                if key != self._get_saliency_key(key[0])
+            ]
+            self.saliency, self.saliency_aggregates = [
+                {
+                    key: value for key, value in memo.items()
+                    if key == self._get_saliency_key(key[0])
+                }
+                for memo in [self.saliency, self.saliency_aggregates]
+            ]
+            for saliency in outdated_saliency:
+                self._remove_spilled(saliency)
+        return outdated
+
+    def has_saliency(self, method: str) -> bool:
+        """Return whether saliency map is computed with current parameters."""
+        key = self._get_saliency_key(method)
+        return (
+            key in self.saliency or key in self.saliency_aggregates
+            or self._is_stored(method)
+        )
+
+    def _is_stored(self, method: str) -> bool:
+        """Return whether saliency map with current parameters is in the store."""
+        if self.store is None:
+            return False
+        params = self.store.get_saliency_params(SALIENCY_ATTRIBUTES[method])
+        return params is not None and (
+            get_saliency_key(method, {method: params})
+            == self._get_saliency_key(method)
+        )
+
+    def _read_stored(self, method: str, trials: bool) -> dict | None:
+        """Memoize saliency maps read from the store.
+
+        Args:
+            method: Saliency method name.
+            trials: Whether to read per-trial maps besides the aggregates.
+
+        Returns:
+            Per-trial maps read from the store, None if not stored.
+        """
+        name = SALIENCY_ATTRIBUTES[method]
+        key = self._get_saliency_key(method)
+        if key not in self.saliency_aggregates:
+            self.saliency_aggregates[key] = self.store.read_aggregates(name)
+        if not trials or not self.store.has_trials(name):
+            return None
+        saliency = self.store.read_saliency(name)
+        self._store_saliency(key, saliency)
+        return saliency
+
+    def _write_stored(self, method: str, saliency: dict) -> None:
+        """Write saliency maps computed with current parameters to the store."""
+        key = self._get_saliency_key(method)
+        # aggregates of FULL mode are computed per class on first access
+        aggregates = self.saliency_aggregates.setdefault(key, {})
+        for labelIndex, trials in saliency.items():
+            if labelIndex not in aggregates:
+                aggregates[labelIndex] = SaliencyAggregate.from_trials(trials)
+        self.store.write_saliency(
+            SALIENCY_ATTRIBUTES[method],
+            (self.saliency_params or {}).get(method) or {},
+            self.saliency.get(key, saliency),
+            aggregates
+        )
+
+    def _compute_saliency(self, methods: list[str], trials: bool = False) -> dict:
+        """Compute and memoize saliency maps with current parameters.
+
+        Args:
+            methods: Saliency methods to be computed.
+            trials: Whether to compute methods whose per-trial maps are not kept,
+                    instead of only those not computed yet.
+
+        Returns:
+            Saliency maps computed or read from the store by this call by method,
+            before conversion to the storage mode.
+
+        Raises:
+            ValueError: If saliency maps are required but no source is set.
+        """
+        with self._lock:
+            missing = [
+                method for method in methods
+                if self._get_saliency_key(method) not in self.saliency
+                and (trials or self._get_saliency_key(method)
+                     not in self.saliency_aggregates)
+            ]
+            result = {}
+            for method in [method for method in missing if self._is_stored(method)]:
+                saliency = self._read_stored(method, trials)
+                if saliency is not None:
+                    result[method] = saliency
+                if saliency is not None or not trials:
+                    missing.remove(method)
+            if not missing:
+                return result
+            if self.saliency_source is None:
+                raise ValueError(
+                    f'Saliency map of {", ".join(missing)} is not available'
+                )
+            computed = self.saliency_source(missing, self.saliency_params)
+            if self.store:
+                # unlisted before the maps spilled to the store are overwritten
+                self.store.remove_saliency(
+                    [SALIENCY_ATTRIBUTES[method] for method in computed]
+                )
+            for method, saliency in computed.items():
+                self._store_saliency(self._get_saliency_key(method), saliency)
+                if self.store:
+                    self._write_stored(method, saliency)
+            result.update(computed)
+            return result
+
+    def compute_saliency(self, methods: list[str] | None = None) -> None:
+        """Compute saliency maps not memoized yet with current parameters.
+
+        Args:
+            methods: Saliency methods to be computed. All methods if None.
+
+        Raises:
+            ValueError: If saliency maps are required but no source is set.
+        """
+        if methods is None:
+            methods = list(SALIENCY_ATTRIBUTES)
+        self._compute_saliency(methods)
+
+    def get_saliency_dict(self, method: str) -> dict:
+        """Return saliency map of all classes, computed on first access.
+
+        Per-trial maps not kept in AGGREGATE mode are computed again on each call.
+
+        Args:
+            method: Saliency method name.
+
+        Returns:
+            Dict of :class:`numpy.ndarray` of shape (n, ...) with class index as key.
+        """
+        result = self._compute_saliency([method], trials=True)
+        key = self._get_saliency_key(method)
+        if key in self.saliency:
+            return self.saliency[key]
+        return result[method]
+
+    def get_saliency(self, method: str, labelIndex: int) -> np.ndarray:
+        """Return saliency map of model by method and class index."""
+        return self.get_saliency_dict(method)[labelIndex]
+
+    def get_saliency_aggregate(
+        self, method: str, labelIndex: int
+    ) -> SaliencyAggregate:
+        """Return aggregate of saliency maps by method and class index.
+
+        Computed on first access, from the per-trial maps in FULL mode.
+        """
+        self._compute_saliency([method])
+        key = self._get_saliency_key(method)
+        with self._lock:
+            aggregates = self.saliency_aggregates.setdefault(key, {})
+            if labelIndex not in aggregates:
+                aggregates[labelIndex] = SaliencyAggregate.from_trials(
+                    self.saliency[key][labelIndex]
+                )
+        return aggregates[labelIndex]
+
+    @property
+    def gradient(self) -> dict:
+        """Gradient of model by class index."""
+        return self.get_saliency_dict('Gradient')
+
+    @property
+    def gradient_input(self) -> dict:
+        """Gradient times input of model by class index."""
+        return self.get_saliency_dict('Gradient * Input')
+
+    @property
+    def smoothgrad(self) -> dict:
+        """Smoothgrad of model by class index."""
+        return self.get_saliency_dict('SmoothGrad')
+
+    @property
+    def smoothgrad_sq(self) -> dict:
+        """Smoothgrad squared of model by class index."""
+        return self.get_saliency_dict('SmoothGrad_Squared')
+
+    @property
+    def vargrad(self) -> dict:
+        """Vargrad of model by class index."""
+        return self.get_saliency_dict('VarGrad')
 
     def export(self, target_path: str) -> None:
         """Export evaluation result as torch file.
 
+        Saliency maps are not computed for exporting, since the result is
+        exported during training. The ``'gradient'`` key is always written,
+        and is None if the gradient has not been computed yet.
+
         Args:
             target_path: Path to save evaluation result.
         """
         record = {
             'label': self.label,
             'output': self.output,
-            'gradient': self.gradient,
+            'gradient': self.gradient if self.has_saliency('Gradient') else None,
         }
         torch.save(record, os.path.join(target_path, 'eval'))
 
+    def save(self, directory: str) -> None:
+        """Save evaluation result and saliency maps to an evaluation store.
+
+        Saliency maps are not computed for saving. Maps computed afterwards
+        are written to the store when computed.
+
+        Args:
+            directory: Directory of the evaluation store.
+        """
+        with self._lock:
+            store = EvalStore(directory)
+            store.write_record(self.label, self.output, self.saliency_params)
+            self.store = store
+            for method, name in SALIENCY_ATTRIBUTES.items():
+                key = self._get_saliency_key(method)
+                if self._is_stored(method) and (
+                    store.has_trials(name) or key not in self.saliency
+                ):
+                    continue
+                if key in self.saliency:
+                    self._write_stored(method, self.saliency[key])
+                elif key in self.saliency_aggregates:
+                    store.write_saliency(
+                        name,
+                        (self.saliency_params or {}).get(method) or {},
+                        None, self.saliency_aggregates[key]
+                    )
+
+    @classmethod
+    def load(
+        cls,
+        directory: str,
+        saliency_storage: SaliencyStorage = SaliencyStorage.DISK
+    ) -> EvalRecord:
+        """Load evaluation record from an evaluation store.
+
+        Saliency maps are read on first access, memory-mapped from the store
+        in DISK mode, without being computed again.
+
+        Args:
+            directory: Directory of the evaluation store.
+            saliency_storage: Storage mode of per-trial saliency maps.
+
+        Raises:
+            FileNotFoundError: If no evaluation record is saved in the directory.
+        """
+        store = EvalStore(directory)
+        if not store.exists():
+            raise FileNotFoundError(f'No evaluation record saved in {directory}')
+        eval_record = cls(
+            store.read_array('label'),
+            store.read_array('output'),
+            saliency_params=store.meta['saliency_params'],
+            saliency_storage=saliency_storage
+        )
+        eval_record.store = store
+        return eval_record
+
     def export_csv(self, target_path: str) -> None:
         """Export evaluation result as csv file.
 
@@ -77,17 +558,7 @@ class EvalRecord:
             method: saliency type to be exported.
             target_path: Path to save saliency map.
         """
-        if method == "Gradient":
-            saliency = self.gradient
-        elif method == "Gradient * Input":
-            saliency = self.gradient_input
-        elif method == "SmoothGrad":
-            saliency = self.smoothgrad
-        elif method == "SmoothGrad_Squared":
-            saliency = self.smoothgrad_sq
-        elif method == "VarGrad":
-            saliency = self.vargrad
-        return saliency
+        return self.get_saliency_dict(method)
     #
     def get_acc(self) -> float:
         """Get accuracy of the model."""
@@ -126,20 +597,20 @@ class EvalRecord:
     
     def get_gradient(self, labelIndex: int) -> np.ndarray:
         """Return gradient of model by class index."""
-        return self.gradient[labelIndex]
+        return self.get_saliency('Gradient', labelIndex)
     
     def get_gradient_input(self, labelIndex: int) -> np.ndarray:
         """Return gradient times input of model by class index."""
-        return self.gradient_input[labelIndex]
+        return self.get_saliency('Gradient * Input', labelIndex)
 
     def get_smoothgrad(self, labelIndex: int) -> np.ndarray:
         """Return smoothgrad of model by class index."""
-        return self.smoothgrad[labelIndex]
+        return self.get_saliency('SmoothGrad', labelIndex)
     
     def get_smoothgrad_sq(self, labelIndex: int) -> np.ndarray: 
         """Return smoothgrad squared of model by class index."""
-        return self.smoothgrad_sq[labelIndex]
+        return self.get_saliency('SmoothGrad_Squared', labelIndex)
     
     def get_vargrad(self, labelIndex: int) -> np.ndarray:
         """Return vargrad of model by class index."""
-        return self.vargrad[labelIndex]
\ No newline at end of file
+        return self.get_saliency('VarGrad', labelIndex)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import re
+
+import numpy as np
+
+from .saliency_storage import SaliencyAggregate, SaliencyStorage, store_trials
+
+EVAL_STORE_VERSION = 1
+# directory of the evaluation store in the directory of a training record
+EVAL_STORE_DIR = 'eval_record'
+META_FILE = 'meta.json'
+SALIENCY_DIR = 'saliency'
+AGGREGATE_STATS = ['mean', 'abs_mean', 'sq_mean']
+
+
+def _save_array(filepath: str, array: np.ndarray) -> None:
+    """Save array as .npy file, replacing the file as a whole."""
+    with open(filepath + '.tmp', 'wb') as f:
+        np.save(f, np.asarray(array))
+    os.replace(filepath + '.tmp', filepath)
+
+
+class EvalStore:
+    """Class for reading and writing an evaluation record on disk.
+
+    Each array is kept in its own .npy file, so that the saliency maps of
+    a single method and class can be read partially by memory mapping,
+    without loading the rest of the record. The layout of the directory is::
+
+        meta.json                                 parameters and contents
+        label.npy, output.npy                     evaluation result
+        saliency/{name}_{labelIndex}-*.npy        per-trial saliency maps
+        saliency/{name}_{labelIndex}_{stat}.npy   per-class aggregates
+
+    Metadata is written last, saliency maps are only read if listed in it.
+    Per-trial maps are written to new files with a unique suffix, since the
+    previous ones may still be memory-mapped, and superseded files are removed
+    once they are unlisted. Aggregates are small and read into memory.
+
+    Attributes:
+        directory: str
+            Directory of the store.
+        meta: dict
+            Version, saliency parameters of the record, and the parameters,
+            per-class trial counts and file names of per-trial maps, if stored,
+            of each stored saliency map by name.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                self.meta = json.load(f)
+            version = self.meta.get('version')
+            if version != EVAL_STORE_VERSION:
+                raise ValueError(f'Unsupported evaluation store version: {version}')
+        else:
+            self.meta = {
+                'version': EVAL_STORE_VERSION,
+                'saliency_params': None,
+                'saliency': {}
+            }
+
+    def exists(self) -> bool:
+        """Return whether the store has been written."""
+        return os.path.exists(os.path.join(self.directory, META_FILE))
+
+    def _write_meta(self) -> None:
+        meta_path = os.path.join(self.directory, META_FILE)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=4)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def get_saliency_path(
+        self, name: str, labelIndex: int, stat: str | None = None
+    ) -> str:
+        """Return path of an aggregate if stat, or base path of per-trial maps."""
+        filename = f'{name}_{labelIndex}' + (f'_{stat}' if stat else '')
+        return os.path.join(self.directory, SALIENCY_DIR, filename + '.npy')
+
+    def _remove_stale_trials(self, name: str) -> None:
+        """Remove files of per-trial saliency maps not listed in metadata."""
+        listed = self.meta['saliency'].get(name, {}).get('files', {}).values()
+        saliency_dir = os.path.join(self.directory, SALIENCY_DIR)
+        pattern = re.compile(re.escape(name) + r'_\d+-.*\.npy')
+        for filename in os.listdir(saliency_dir):
+            if pattern.fullmatch(filename) and filename not in listed:
+                # left if still memory-mapped on Windows, removed on next write
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(saliency_dir, filename))
+
+    def write_record(
+        self, label: np.ndarray, output: np.ndarray, saliency_params: dict | None
+    ) -> None:
+        """Write evaluation result and saliency parameters."""
+        os.makedirs(os.path.join(self.directory, SALIENCY_DIR), exist_ok=True)
+        _save_array(os.path.join(self.directory, 'label.npy'), label)
+        _save_array(os.path.join(self.directory, 'output.npy'), output)
+        self.write_saliency_params(saliency_params)
+
+    def write_saliency_params(self, saliency_params: dict | None) -> None:
+        """Write saliency parameters of the record."""
+        self.meta['saliency_params'] = saliency_params
+        self._write_meta()
+
+    def read_array(self, name: str) -> np.ndarray:
+        """Return array of evaluation result by name, label or output."""
+        return np.load(os.path.join(self.directory, f'{name}.npy'))
+
+    def get_saliency_params(self, name: str) -> dict | None:
+        """Return parameters of stored saliency maps, or None if not stored."""
+        entry = self.meta['saliency'].get(name)
+        return None if entry is None else entry['params']
+
+    def has_trials(self, name: str) -> bool:
+        """Return whether per-trial saliency maps are stored."""
+        return 'files' in self.meta['saliency'].get(name, {})
+
+    def remove_saliency(self, names: list[str]) -> None:
+        """Unlist saliency maps, before their files are overwritten."""
+        if any(name in self.meta['saliency'] for name in names):
+            for name in names:
+                self.meta['saliency'].pop(name, None)
+            self._write_meta()
+
+    def write_saliency(
+        self,
+        name: str,
+        params: dict,
+        saliency: dict[int, np.ndarray] | None,
+        aggregates: dict[int, SaliencyAggregate],
+    ) -> None:
+        """Write saliency maps of all classes.
+
+        Per-trial maps already memory-mapped from the store are not written again.
+
+        Args:
+            name: Name of the saliency map.
+            params: Parameters the saliency maps were computed with.
+            saliency: Per-trial maps with class index as key. Not stored if None.
+            aggregates: Per-class aggregates with class index as key.
+        """
+        os.makedirs(os.path.join(self.directory, SALIENCY_DIR), exist_ok=True)
+        self.remove_saliency([name])
+        files = {}
+        for labelIndex, aggregate in aggregates.items():
+            if saliency is not None:
+                trials = store_trials(
+                    saliency[labelIndex], SaliencyStorage.DISK,
+                    self.get_saliency_path(name, labelIndex)
+                )
+                files[str(labelIndex)] = os.path.basename(trials.filename)
+            for stat in AGGREGATE_STATS:
+                _save_array(
+                    self.get_saliency_path(name, labelIndex, stat),
+                    getattr(aggregate, stat)
+                )
+        self.meta['saliency'][name] = {
+            'params': params,
+            'count': {
+                str(labelIndex): aggregate.count
+                for labelIndex, aggregate in aggregates.items()
+            },
+        }
+        if saliency is not None:
+            self.meta['saliency'][name]['files'] = files
+        self._write_meta()
+        self._remove_stale_trials(name)
+
+    def read_saliency(self, name: str) -> dict[int, np.ndarray]:
+        """Return memory-mapped per-trial saliency maps with class index as key."""
+        saliency_dir = os.path.join(self.directory, SALIENCY_DIR)
+        return {
+            int(labelIndex): np.load(
+                os.path.join(saliency_dir, filename), mmap_mode='r'
+            )
+            for labelIndex, filename in self.meta['saliency'][name]['files'].items()
+        }
+
+    def read_aggregates(self, name: str) -> dict[int, SaliencyAggregate]:
+        """Return per-class aggregates read into memory."""
+        aggregates = {}
+        for label_key, count in self.meta['saliency'][name]['count'].items():
+            labelIndex = int(label_key)
+            aggregates[labelIndex] = SaliencyAggregate(count, *[
+                np.load(self.get_saliency_path(name, labelIndex, stat))
+                for stat in AGGREGATE_STATS
+            ])
+        return aggregates
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import torch
+from sklearn.metrics import roc_auc_score
+
+from .train import RecordKey
+
+
+class MetricAccumulator:
+    """Class for accumulating loss, accuracy and auc over mini-batches
+
+    Model outputs and labels are detached and written into buffers
+    preallocated from the expected number of samples, instead of concatenated
+    after every mini-batch. Loss and number of correct predictions are
+    accumulated on the device of the outputs, so no synchronization is needed
+    until :meth:`compute` is called.
+
+    Attributes:
+        total: int
+            Expected number of samples, buffers grow if exceeded
+        count: int
+            Number of accumulated samples
+        batch_count: int
+            Number of accumulated mini-batches
+        running_loss: :class:`torch.Tensor` | float
+            Sum of loss of mini-batches
+        correct: :class:`torch.Tensor` | float
+            Number of correct predictions
+        y_true: :class:`torch.Tensor` | None
+            Buffer of ground truth labels
+        y_pred: :class:`torch.Tensor` | None
+            Buffer of model outputs
+    """
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.count = 0
+        self.batch_count = 0
+        self.running_loss = 0.0
+        self.correct = 0.0
+        self.y_true = None
+        self.y_pred = None
+
+    @classmethod
+    def from_loader(
+        cls, dataLoader: torch.utils.data.DataLoader
+    ) -> MetricAccumulator:
+        """Create accumulator with buffers sized from the data loader"""
+        try:
+            total = len(dataLoader.dataset)
+        except TypeError:
+            total = 0
+        return cls(total)
+
+    def _reserve(self, outputs: torch.Tensor, labels: torch.Tensor) -> None:
+        """Allocate or grow the buffers to hold the incoming mini-batch"""
+        required = self.count + len(labels)
+        if self.y_pred is None:
+            size = max(self.total, required)
+            self.y_true = torch.empty(size, dtype=labels.dtype, device=labels.device)
+            self.y_pred = torch.empty(
+                (size, *outputs.shape[1:]), dtype=outputs.dtype, device=outputs.device
+            )
+        elif required > len(self.y_pred):
+            size = max(2 * len(self.y_pred), required)
+            y_true = torch.empty(
+                size, dtype=self.y_true.dtype, device=self.y_true.device
+            )
+            y_pred = torch.empty(
+                (size, *self.y_pred.shape[1:]),
+                dtype=self.y_pred.dtype, device=self.y_pred.device
+            )
+            y_true[:self.count] = self.y_true[:self.count]
+            y_pred[:self.count] = self.y_pred[:self.count]
+            self.y_true, self.y_pred = y_true, y_pred
+
+    def update(
+        self, outputs: torch.Tensor, labels: torch.Tensor, loss: torch.Tensor
+    ) -> None:
+        """Accumulate the result of a mini-batch
+
+        Args:
+            outputs: Model outputs before softmax, of shape (batch_size, classNum)
+            labels: Ground truth labels, of shape (batch_size,)
+            loss: Mean loss of the mini-batch
+        """
+        outputs = outputs.detach()
+        self._reserve(outputs, labels)
+        end = self.count + len(labels)
+        self.y_true[self.count:end] = labels
+        self.y_pred[self.count:end] = outputs
+        self.correct += (outputs.argmax(axis=1) == labels).sum()
+        self.running_loss += loss.detach()
+        self.count = end
+        self.batch_count += 1
+
+    def get_loss(self) -> float:
+        """Return mean loss over mini-batches"""
+        if self.batch_count == 0:
+            return 0
+        return float(self.running_loss) / self.batch_count
+
+    def get_acc(self) -> float:
+        """Return accuracy in percentage"""
+        if self.count == 0:
+            return 0
+        return float(self.correct) / self.count * 100
+
+    def get_auc(self) -> float:
+        """Return auc score, one-vs-rest for multi-class classification
+
+        Return 0 if the score cannot be computed, e.g. only one class is present
+        """
+        if self.count == 0:
+            return 0
+        y_true = self.y_true[:self.count].cpu().numpy()
+        y_score = torch.nn.functional.softmax(
+            self.y_pred[:self.count], dim=1
+        ).cpu().numpy()
+        try:
+            if y_score.shape[-1] <= 2:
+                return roc_auc_score(y_true, y_score[:, 1])
+            return roc_auc_score(y_true, y_score, multi_class='ovr')
+        except Exception:
+            return 0
+
+    def compute(self) -> dict[str, float]:
+        """Return the accumulated statistics keyed by :class:`RecordKey`"""
+        return {
+            RecordKey.LOSS: self.get_loss(),
+            RecordKey.ACC: self.get_acc(),
+            RecordKey.AUC: self.get_auc()
+        }
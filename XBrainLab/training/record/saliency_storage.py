@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+from enum import Enum
+
+import numpy as np
+
+# number of trials aggregated at once, bounding the temporary memory
+AGGREGATE_CHUNK_SIZE = 256
+
+
+class SaliencyStorage(Enum):
+    """Utility class for storage mode of per-trial saliency maps.
+
+    Per-class aggregates at float32 are computed along with the saliency maps,
+    except in FULL mode, where they are computed from the maps on first access.
+    Float16 maps may overflow to inf for absolute values beyond 65504.
+    """
+    FULL = 'full'
+    FLOAT16 = 'float16'
+    DISK = 'disk'
+    AGGREGATE = 'aggregate'
+
+
+class SaliencyAggregate:
+    """Class for storing aggregates of saliency maps of trials of a class.
+
+    Attributes:
+        count: int
+            Number of trials.
+        mean: :class:`numpy.ndarray` of float32
+            Mean of saliency maps.
+        abs_mean: :class:`numpy.ndarray` of float32
+            Mean of absolute saliency maps.
+        sq_mean: :class:`numpy.ndarray` of float32
+            Second moment, mean of squared saliency maps.
+    """
+    def __init__(
+        self, count: int, mean: np.ndarray, abs_mean: np.ndarray, sq_mean: np.ndarray
+    ):
+        self.count = count
+        self.mean = mean
+        self.abs_mean = abs_mean
+        self.sq_mean = sq_mean
+
+    @classmethod
+    def from_trials(cls, trials: np.ndarray) -> SaliencyAggregate:
+        """Aggregate saliency maps of trials, chunk by chunk.
+
+        Args:
+            trials: Saliency maps of shape (n, ...).
+        """
+        trials = np.asanyarray(trials)
+        total = np.zeros(trials.shape[1:])
+        abs_total = np.zeros(trials.shape[1:])
+        sq_total = np.zeros(trials.shape[1:])
+        for start in range(0, len(trials), AGGREGATE_CHUNK_SIZE):
+            chunk = trials[start:start + AGGREGATE_CHUNK_SIZE].astype(np.float64)
+            total += chunk.sum(axis=0)
+            abs_total += np.abs(chunk).sum(axis=0)
+            sq_total += np.square(chunk).sum(axis=0)
+        count = len(trials)
+        return cls(
+            count, *[
+                (value / max(count, 1)).astype(np.float32)
+                for value in [total, abs_total, sq_total]
+            ]
+        )
+
+    def get_var(self) -> np.ndarray:
+        """Return variance of saliency maps."""
+        return self.sq_mean - np.square(self.mean)
+
+
+def is_spilled(trials: np.ndarray | None, filepath: str) -> bool:
+    """Return whether the maps are memory-mapped from a file spilled to filepath.
+
+    Spilled files are named after `filepath` with a unique suffix,
+    see :func:`store_trials`.
+    """
+    if not isinstance(trials, np.memmap) or trials.filename is None:
+        return False
+    directory, filename = os.path.split(os.path.abspath(filepath))
+    stem, _ = os.path.splitext(filename)
+    return (
+        os.path.dirname(trials.filename) == directory
+        and os.path.basename(trials.filename).startswith(stem + '-')
+    )
+
+def store_trials(
+    trials: np.ndarray, storage: SaliencyStorage, filepath: str | None = None
+) -> np.ndarray | None:
+    """Return per-trial saliency maps to be kept in the given storage mode.
+
+    In DISK mode, the maps are written to a new file named after `filepath`
+    with a unique suffix, instead of replacing the file of previously spilled
+    maps, which may still be memory-mapped and cannot be replaced on Windows.
+
+    Args:
+        trials: Saliency maps of shape (n, ...).
+        storage: Storage mode.
+        filepath: Path of the .npy file spilled to in DISK mode.
+
+    Returns:
+        Maps as is in FULL mode, at float16 in FLOAT16 mode, read-only memory-mapped
+        from the spilled file in DISK mode, and None in AGGREGATE mode.
+    """
+    if storage == SaliencyStorage.FULL:
+        return trials
+    if storage == SaliencyStorage.FLOAT16:
+        return np.asarray(trials, dtype=np.float16)
+    if storage == SaliencyStorage.DISK:
+        if is_spilled(trials, filepath):
+            return trials
+        directory, filename = os.path.split(os.path.abspath(filepath))
+        stem, ext = os.path.splitext(filename)
+        os.makedirs(directory, exist_ok=True)
+        fd, spilled_path = tempfile.mkstemp(
+            suffix=ext, prefix=stem + '-', dir=directory
+        )
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, trials)
+        return np.load(spilled_path, mmap_mode='r')
+    return None
+
+def remove_trials(trials: np.ndarray | None) -> None:
+    """Remove the file of maps spilled to disk, if any.
+
+    The file is left in place if it cannot be removed,
+    e.g. while it is still memory-mapped on Windows.
+    """
+    if not isinstance(trials, np.memmap) or trials.filename is None:
+        return
+    with contextlib.suppress(OSError):
+        os.remove(trials.filename)
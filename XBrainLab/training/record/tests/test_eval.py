@@ -1,9 +1,12 @@
+import gc
 import os
+import pickle
 
 import numpy as np
 import pytest
 
 from XBrainLab.training.record.eval import EvalRecord, calculate_confusion
+from XBrainLab.training.record.saliency_storage import SaliencyStorage
 
 
 @pytest.mark.parametrize('output, label, expected', [
@@ -99,3 +102,186 @@ def test_export_csv(clean_csv):
         assert f.readline() == '0,1,ground_truth,predict\n'
         assert [float(i) for i in f.readline().split(',')] == [0, 1, 1, 1]
         assert [float(i) for i in f.readline().split(',')] == [1, 0, 2, 0]
+
+class FakeSaliencySource:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, methods, saliency_params):
+        self.calls.append((methods, saliency_params))
+        # methods computed along with the requested ones are returned as well
+        return {
+            method: {0: np.full((2, 3), len(self.calls))}
+            for method in [*methods, 'Gradient']
+        }
+
+def test_saliency_computed_on_demand():
+    params = {'SmoothGrad': {'nt_samples': 5, 'stdevs': 1.0}}
+    eval_record = EvalRecord(np.array([0, 0]), np.zeros((2, 1)), saliency_params=params)
+    source = FakeSaliencySource()
+    eval_record.set_saliency_source(source)
+    assert not eval_record.has_saliency('SmoothGrad')
+    assert source.calls == []
+
+    assert np.array_equal(eval_record.get_smoothgrad(0), np.full((2, 3), 1))
+    assert source.calls == [(['SmoothGrad'], params)]
+    # memoized, including the methods computed along with it
+    assert eval_record.has_saliency('Gradient')
+    eval_record.get_smoothgrad(0)
+    eval_record.get_gradient(0)
+    assert len(source.calls) == 1
+
+    eval_record.compute_saliency()
+    assert source.calls[1][0] == [
+        'Gradient * Input', 'SmoothGrad_Squared', 'VarGrad'
+    ]
+
+def test_saliency_memoized_by_params():
+    params = {
+        'SmoothGrad': {'nt_samples': 5, 'stdevs': 1.0},
+        'VarGrad': {'nt_samples': 5, 'stdevs': 1.0},
+    }
+    eval_record = EvalRecord(np.array([0]), np.zeros((1, 1)), saliency_params=params)
+    source = FakeSaliencySource()
+    eval_record.set_saliency_source(source)
+    eval_record.compute_saliency(['SmoothGrad', 'VarGrad'])
+
+    new_params = {
+        'SmoothGrad': {'nt_samples': 10, 'stdevs': 1.0},
+        'VarGrad': {'stdevs': 1.0, 'nt_samples': 5},
+    }
+    assert eval_record.set_saliency_params(new_params) == ['SmoothGrad']
+    # only maps of the changed method are released
+    assert eval_record.has_saliency('Gradient')
+    assert eval_record.has_saliency('VarGrad')
+    assert not eval_record.has_saliency('SmoothGrad')
+    assert np.array_equal(eval_record.smoothgrad[0], np.full((2, 3), 2))
+    assert source.calls[1] == (['SmoothGrad'], new_params)
+    assert eval_record.set_saliency_params(new_params) == []
+
+    assert eval_record.set_saliency_params(params) == ['SmoothGrad']
+    assert np.array_equal(eval_record.smoothgrad[0], np.full((2, 3), 3))
+    assert len(eval_record.saliency) == 3
+
+def test_saliency_without_source():
+    gradient = {0: np.zeros(3)}
+    eval_record = EvalRecord(np.array([0]), np.zeros((1, 1)), gradient)
+    assert eval_record.get_gradient(0) is gradient[0]
+    with pytest.raises(ValueError, match='SmoothGrad'):
+        eval_record.get_smoothgrad(0)
+    with pytest.raises(NotImplementedError):
+        eval_record.export_saliency('Unknown', 'target_path')
+
+def test_saliency_source_not_pickled():
+    eval_record = EvalRecord(np.array([0]), np.zeros((1, 1)))
+    eval_record.set_saliency_source(FakeSaliencySource())
+    eval_record.get_gradient(0)
+    restored = pickle.loads(pickle.dumps(eval_record))
+    assert restored.saliency_source is None
+    assert np.array_equal(restored.get_gradient(0), eval_record.get_gradient(0))
+    assert eval_record.saliency_source is not None
+
+def test_export_without_computing_saliency(mocker):
+    torch_mock = mocker.patch('torch.save')
+    source = FakeSaliencySource()
+    eval_record = EvalRecord([1, 2], [1])
+    eval_record.set_saliency_source(source)
+    eval_record.export('target_path')
+    torch_mock.assert_called_once_with(
+        {'label': [1, 2], 'output': [1], 'gradient': None}, 'target_path/eval'
+    )
+    assert source.calls == []
+
+    # included once computed
+    gradient = eval_record.gradient
+    eval_record.export('target_path')
+    assert torch_mock.call_args.args[0]['gradient'] is gradient
+
+@pytest.mark.parametrize('storage', [
+    SaliencyStorage.FULL, SaliencyStorage.FLOAT16,
+    SaliencyStorage.DISK, SaliencyStorage.AGGREGATE
+])
+def test_saliency_storage(tmp_path, storage):
+    eval_record = EvalRecord(
+        np.array([0, 0]), np.zeros((2, 1)),
+        saliency_storage=storage, saliency_dir=str(tmp_path)
+    )
+    source = FakeSaliencySource()
+    eval_record.set_saliency_source(source)
+    aggregate = eval_record.get_saliency_aggregate('Gradient', 0)
+    assert aggregate.count == 2
+    assert np.array_equal(aggregate.mean, np.full(3, 1))
+    gradient = eval_record.get_gradient(0)
+    assert np.array_equal(gradient, np.full((2, 3), len(source.calls)))
+    if storage == SaliencyStorage.AGGREGATE:
+        # per-trial maps are computed again
+        assert len(source.calls) == 2
+        assert eval_record.saliency == {}
+    else:
+        assert len(source.calls) == 1
+        assert eval_record.has_saliency('Gradient')
+    if storage == SaliencyStorage.DISK:
+        assert isinstance(eval_record.get_gradient(0), np.memmap)
+        assert os.path.dirname(gradient.filename) == str(tmp_path)
+        assert os.path.basename(gradient.filename).startswith('gradient_0-')
+    if storage == SaliencyStorage.FLOAT16:
+        assert eval_record.get_gradient(0).dtype == np.float16
+
+def test_saliency_storage_disk_files(tmp_path):
+    eval_record = EvalRecord(
+        np.array([0, 0]), np.zeros((2, 1)), saliency_params={},
+        saliency_storage=SaliencyStorage.DISK, saliency_dir=str(tmp_path)
+    )
+    eval_record.set_saliency_source(FakeSaliencySource())
+    gradient = eval_record.get_gradient(0)
+    # files of outdated maps are removed
+    eval_record.set_saliency_params({'SmoothGrad': {'nt_samples': 2}})
+    assert os.path.exists(gradient.filename)
+    smoothgrad = eval_record.get_smoothgrad(0)
+    eval_record.set_saliency_params({'SmoothGrad': {'nt_samples': 3}})
+    assert not os.path.exists(smoothgrad.filename)
+    eval_record.get_smoothgrad(0)
+    assert len([
+        name for name in os.listdir(tmp_path) if name.startswith('smoothgrad_0-')
+    ]) == 1
+
+    eval_record.set_saliency_storage(SaliencyStorage.AGGREGATE)
+    assert os.listdir(tmp_path) == []
+
+def test_saliency_storage_temp_dir():
+    eval_record = EvalRecord(
+        np.array([0, 0]), np.zeros((2, 1)), saliency_storage=SaliencyStorage.DISK
+    )
+    eval_record.set_saliency_source(FakeSaliencySource())
+    eval_record.get_gradient(0)
+    saliency_dir = eval_record.saliency_dir
+    assert os.listdir(saliency_dir)
+    # the copy does not own the temporary directory
+    assert pickle.loads(pickle.dumps(eval_record)).saliency_dir is None
+    del eval_record
+    gc.collect()
+    assert not os.path.exists(saliency_dir)
+
+def test_set_saliency_storage(tmp_path):
+    eval_record = EvalRecord(np.array([0, 0]), np.zeros((2, 1)))
+    source = FakeSaliencySource()
+    eval_record.set_saliency_source(source)
+    eval_record.compute_saliency(['Gradient'])
+    assert eval_record.saliency_aggregates == {}
+
+    eval_record.set_saliency_storage(SaliencyStorage.DISK, str(tmp_path))
+    assert isinstance(eval_record.get_gradient(0), np.memmap)
+    assert eval_record.get_saliency_aggregate('Gradient', 0).count == 2
+
+    eval_record.set_saliency_storage(SaliencyStorage.AGGREGATE)
+    assert eval_record.saliency == {}
+    assert eval_record.has_saliency('Gradient')
+    assert np.array_equal(
+        eval_record.get_saliency_aggregate('Gradient', 0).mean, np.full(3, 1)
+    )
+    assert len(source.calls) == 1
+
+    # aggregates are released along with outdated maps
+    eval_record.set_saliency_params({'SmoothGrad': {'nt_samples': 2}})
+    assert eval_record.has_saliency('Gradient')
+    assert eval_record.set_saliency_params(None) == []
@@ -0,0 +1,158 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from XBrainLab.training.record import EvalRecord, EvalStore, SaliencyStorage
+from XBrainLab.training.record.eval import SALIENCY_ATTRIBUTES
+
+SALIENCY_PARAMS = {'SmoothGrad': {'nt_samples': 5, 'stdevs': 1.0}}
+
+
+class FakeSaliencySource:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, methods, saliency_params):
+        self.calls.append(methods)
+        rng = np.random.default_rng(len(self.calls))
+        return {
+            method: {
+                0: rng.normal(size=(2, 3, 4)).astype(np.float32),
+                1: rng.normal(size=(3, 3, 4)).astype(np.float32),
+            }
+            for method in methods
+        }
+
+@pytest.fixture
+def eval_record():
+    eval_record = EvalRecord(
+        np.array([0, 1, 1, 0, 1]), np.random.default_rng(0).normal(size=(5, 2)),
+        saliency_params=SALIENCY_PARAMS
+    )
+    eval_record.set_saliency_source(FakeSaliencySource())
+    return eval_record
+
+def test_eval_store_save_load(tmp_path, eval_record):
+    eval_record.compute_saliency()
+    eval_record.save(str(tmp_path))
+    assert set(os.listdir(tmp_path)) == {
+        'meta.json', 'label.npy', 'output.npy', 'saliency'
+    }
+
+    loaded = EvalRecord.load(str(tmp_path))
+    assert np.array_equal(loaded.label, eval_record.label)
+    assert np.array_equal(loaded.output, eval_record.output)
+    assert loaded.get_acc() == eval_record.get_acc()
+    assert loaded.saliency_params == SALIENCY_PARAMS
+    # read on first access, without computing again
+    assert loaded.saliency == {}
+    assert loaded.saliency_aggregates == {}
+    for method in SALIENCY_ATTRIBUTES:
+        assert loaded.has_saliency(method)
+        for labelIndex in range(2):
+            saliency = loaded.get_saliency(method, labelIndex)
+            assert isinstance(saliency, np.memmap)
+            assert np.array_equal(
+                saliency, eval_record.get_saliency(method, labelIndex)
+            )
+            aggregate = loaded.get_saliency_aggregate(method, labelIndex)
+            assert aggregate.count == len(saliency)
+            assert np.allclose(aggregate.mean, saliency.mean(axis=0), atol=1e-6)
+
+def test_eval_store_partial_read(tmp_path, eval_record):
+    eval_record.compute_saliency(['VarGrad'])
+    eval_record.save(str(tmp_path))
+    loaded = EvalRecord.load(str(tmp_path))
+    loaded.get_saliency_aggregate('VarGrad', 1)
+    # aggregates are read without per-trial maps
+    assert loaded.saliency == {}
+
+    vargrad = loaded.get_saliency('VarGrad', 1)
+    assert vargrad.filename == os.path.join(
+        os.path.abspath(tmp_path), 'saliency',
+        loaded.store.meta['saliency']['vargrad']['files']['1']
+    )
+    assert len(loaded.saliency) == 1
+    with pytest.raises(ValueError, match='Gradient'):
+        loaded.get_gradient(0)
+
+def test_eval_store_write_through(tmp_path, eval_record):
+    eval_record.save(str(tmp_path))
+    assert not eval_record.has_saliency('Gradient')
+    gradient = eval_record.get_gradient(0)
+    # written to the store when computed
+    loaded = EvalRecord.load(str(tmp_path), SaliencyStorage.FULL)
+    assert np.array_equal(loaded.get_gradient(0), gradient)
+
+    new_params = {'SmoothGrad': {'nt_samples': 10, 'stdevs': 1.0}}
+    eval_record.get_smoothgrad(0)
+    assert eval_record.set_saliency_params(new_params) == ['SmoothGrad']
+    smoothgrad = eval_record.get_smoothgrad(0)
+    loaded = EvalRecord.load(str(tmp_path))
+    assert loaded.saliency_params == new_params
+    assert np.array_equal(loaded.get_smoothgrad(0), smoothgrad)
+    # superseded files are removed
+    assert len([
+        name for name in os.listdir(tmp_path / 'saliency')
+        if name.startswith('smoothgrad_0-')
+    ]) == 1
+    assert np.array_equal(loaded.get_gradient(0), gradient)
+
+    # stored maps of outdated parameters are not read
+    loaded.set_saliency_params(SALIENCY_PARAMS)
+    assert not loaded.has_saliency('SmoothGrad')
+    assert loaded.has_saliency('Gradient')
+
+def test_eval_store_aggregate_storage(tmp_path, eval_record):
+    eval_record.set_saliency_storage(SaliencyStorage.AGGREGATE)
+    eval_record.compute_saliency(['Gradient'])
+    eval_record.save(str(tmp_path))
+    # only aggregates are kept in memory, per-trial maps are not saved
+    store = EvalStore(str(tmp_path))
+    assert store.get_saliency_params('gradient') == {}
+    assert not store.has_trials('gradient')
+
+    loaded = EvalRecord.load(str(tmp_path))
+    aggregate = loaded.get_saliency_aggregate('Gradient', 1)
+    assert np.array_equal(
+        aggregate.mean, eval_record.get_saliency_aggregate('Gradient', 1).mean
+    )
+    with pytest.raises(ValueError):
+        loaded.get_gradient(1)
+    # computed again when the model is available, and saved
+    loaded.set_saliency_source(FakeSaliencySource())
+    gradient = loaded.get_gradient(1)
+    assert EvalStore(str(tmp_path)).has_trials('gradient')
+    assert np.array_equal(EvalRecord.load(str(tmp_path)).get_gradient(1), gradient)
+
+def test_eval_store_saved_once(tmp_path, eval_record, mocker):
+    eval_record.set_saliency_storage(SaliencyStorage.DISK)
+    eval_record.compute_saliency(['Gradient'])
+    eval_record.save(str(tmp_path))
+    save_mock = mocker.spy(np, 'save')
+    eval_record.save(str(tmp_path))
+    # only label and output are written again
+    assert save_mock.call_count == 2
+
+def test_eval_store_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        EvalRecord.load(str(tmp_path))
+
+def test_eval_store_version(tmp_path):
+    with open(tmp_path / 'meta.json', 'w') as f:
+        json.dump({'version': 0}, f)
+    with pytest.raises(ValueError, match='version'):
+        EvalStore(str(tmp_path))
+
+def test_eval_store_partial_aggregates(tmp_path, eval_record):
+    eval_record.get_saliency_aggregate('Gradient', 1)
+    assert list(eval_record.saliency_aggregates[('Gradient', ())]) == [1]
+    eval_record.save(str(tmp_path))
+    loaded = EvalRecord.load(str(tmp_path))
+    for labelIndex in range(2):
+        assert np.array_equal(
+            loaded.get_saliency_aggregate('Gradient', labelIndex).abs_mean,
+            eval_record.get_saliency_aggregate('Gradient', labelIndex).abs_mean
+        )
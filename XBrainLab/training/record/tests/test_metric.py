@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import torch
+from sklearn.metrics import roc_auc_score
+from torch.utils.data import DataLoader, TensorDataset
+
+from XBrainLab.training.record import MetricAccumulator, RecordKey
+
+
+def _accumulate(metric, outputs, labels, bs):
+    criterion = torch.nn.CrossEntropyLoss()
+    losses = []
+    for i in range(0, len(labels), bs):
+        loss = criterion(outputs[i:i + bs], labels[i:i + bs])
+        metric.update(outputs[i:i + bs], labels[i:i + bs], loss)
+        losses.append(loss.item())
+    return np.mean(losses)
+
+@pytest.mark.parametrize('class_num', [2, 4])
+@pytest.mark.parametrize('total', [0, 10, 50])
+def test_metric_accumulator(class_num, total):
+    torch.manual_seed(0)
+    outputs = torch.randn(50, class_num, requires_grad=True)
+    labels = torch.arange(50) % class_num
+    metric = MetricAccumulator(total)
+    loss = _accumulate(metric, outputs, labels, 8)
+    result = metric.compute()
+
+    score = torch.nn.functional.softmax(outputs, dim=1).detach().numpy()
+    if class_num == 2:
+        auc = roc_auc_score(labels.numpy(), score[:, 1])
+    else:
+        auc = roc_auc_score(labels.numpy(), score, multi_class='ovr')
+    acc = (outputs.argmax(axis=1) == labels).float().mean().item() * 100
+    assert result.keys() == set(RecordKey())
+    assert np.isclose(result[RecordKey.LOSS], loss)
+    assert np.isclose(result[RecordKey.ACC], acc)
+    assert np.isclose(result[RecordKey.AUC], auc)
+    assert metric.count == 50
+    assert metric.batch_count == 7
+    assert len(metric.y_pred) >= 50
+    assert not metric.y_pred.requires_grad
+    assert not metric.running_loss.requires_grad
+
+def test_metric_accumulator_from_loader():
+    dataset = TensorDataset(torch.zeros(20, 3), torch.zeros(20))
+    metric = MetricAccumulator.from_loader(DataLoader(dataset, batch_size=4))
+    assert metric.total == 20
+    metric.update(torch.zeros(4, 3), torch.zeros(4).long(), torch.tensor(1.0))
+    assert len(metric.y_pred) == 20
+
+def test_metric_accumulator_single_class():
+    metric = MetricAccumulator()
+    metric.update(torch.randn(4, 3), torch.zeros(4).long(), torch.tensor(1.0))
+    assert metric.get_auc() == 0
+
+def test_metric_accumulator_empty():
+    metric = MetricAccumulator()
+    assert metric.compute() == {
+        RecordKey.LOSS: 0, RecordKey.ACC: 0, RecordKey.AUC: 0
+    }
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from XBrainLab.training.record import saliency_storage
+from XBrainLab.training.record.saliency_storage import (
+    SaliencyAggregate,
+    SaliencyStorage,
+    is_spilled,
+    remove_trials,
+    store_trials,
+)
+
+
+@pytest.fixture
+def trials():
+    return np.random.default_rng(0).normal(size=(10, 3, 4)).astype(np.float32)
+
+@pytest.mark.parametrize('chunk_size', [3, 256])
+def test_aggregate(mocker, trials, chunk_size):
+    mocker.patch.object(saliency_storage, 'AGGREGATE_CHUNK_SIZE', chunk_size)
+    aggregate = SaliencyAggregate.from_trials(trials)
+    assert aggregate.count == 10
+    for value in [aggregate.mean, aggregate.abs_mean, aggregate.sq_mean]:
+        assert value.dtype == np.float32
+        assert value.shape == (3, 4)
+    assert np.allclose(aggregate.mean, trials.mean(axis=0), atol=1e-6)
+    assert np.allclose(aggregate.abs_mean, np.abs(trials).mean(axis=0), atol=1e-6)
+    assert np.allclose(aggregate.sq_mean, np.square(trials).mean(axis=0), atol=1e-6)
+    assert np.allclose(aggregate.get_var(), trials.var(axis=0), atol=1e-5)
+
+def test_aggregate_no_trials():
+    aggregate = SaliencyAggregate.from_trials(np.zeros((0, 3, 4)))
+    assert aggregate.count == 0
+    assert np.array_equal(aggregate.mean, np.zeros((3, 4)))
+
+def test_store_full(trials):
+    assert store_trials(trials, SaliencyStorage.FULL) is trials
+
+def test_store_float16(trials):
+    stored = store_trials(trials, SaliencyStorage.FLOAT16)
+    assert stored.dtype == np.float16
+    assert np.allclose(stored, trials, atol=1e-2)
+
+def test_store_aggregate(trials):
+    assert store_trials(trials, SaliencyStorage.AGGREGATE) is None
+
+def test_store_disk(tmp_path, trials):
+    filepath = str(tmp_path / 'saliency' / 'gradient_0.npy')
+    stored = store_trials(trials, SaliencyStorage.DISK, filepath)
+    assert isinstance(stored, np.memmap)
+    assert not stored.flags.writeable
+    assert np.array_equal(stored, trials)
+    # not written again
+    assert store_trials(stored, SaliencyStorage.DISK, filepath) is stored
+    # written to a new file, maps of the previous file stay valid
+    stored_again = store_trials(trials * 2, SaliencyStorage.DISK, filepath)
+    assert stored_again.filename != stored.filename
+    assert os.path.basename(stored_again.filename).startswith('gradient_0-')
+    assert np.array_equal(stored, trials)
+    assert np.array_equal(stored_again, trials * 2)
+    assert is_spilled(stored_again, filepath)
+    assert not is_spilled(stored_again, str(tmp_path / 'saliency' / 'gradient.npy'))
+    assert not is_spilled(trials, filepath)
+
+    remove_trials(stored)
+    assert not os.path.exists(stored.filename)
+    remove_trials(stored)
+    remove_trials(trials)
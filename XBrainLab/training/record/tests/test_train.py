@@ -335,3 +335,11 @@ def test_export(train_record, best_type, key):
         for args in args_list
     ]
     assert 'test' in arg
+
+def test_export_eval_record(mocker, train_record, eval_record):
+    save_mock = mocker.patch.object(eval_record, 'save')
+    train_record.set_eval_record(eval_record)
+    train_record.export_checkpoint()
+    save_mock.assert_called_once_with(
+        os.path.join(train_record.target_path, 'eval_record')
+    )
@@ -13,6 +13,7 @@ from ...dataset import Dataset
 from ...training import TrainingOption
 from ...utils import get_random_state, set_random_state
 from .eval import EvalRecord, calculate_confusion
+from .eval_store import EVAL_STORE_DIR
 
 
 class RecordKey:
@@ -226,12 +227,59 @@ class TrainRecord:
     def set_eval_record(self, eval_record: EvalRecord) -> None:
         """Set the evaluation record when training is finished"""
         self.eval_record = eval_record
+
+    def get_state(self, include_model: bool = True) -> dict:
+        """Return the picklable training state of the record
+
+        Used for transferring the record between processes.
+
+        Args:
+            include_model: Whether to include model, optimizer, best models,
+                           evaluation record and random state
+        """
+        state = {
+            'train': self.train,
+            'val': self.val,
+            'test': self.test,
+            'best_record': self.best_record,
+            'epoch': self.epoch,
+        }
+        if include_model:
+            state['model'] = self.model.state_dict()
+            state['optim'] = self.optim.state_dict() if self.optim else None
+            state['eval_record'] = self.eval_record
+            state['random_state'] = self.random_state
+            for best_type in ['val', 'test']:
+                for key in RecordKey():
+                    full_key = 'best_' + best_type + '_' + key + '_model'
+                    state[full_key] = getattr(self, full_key)
+        return state
+
+    def set_state(self, state: dict) -> None:
+        """Restore the training state generated by :meth:`get_state`"""
+        self.train = state['train']
+        self.val = state['val']
+        self.test = state['test']
+        self.best_record = state['best_record']
+        self.epoch = state['epoch']
+        if 'model' not in state:
+            return
+        self.model.load_state_dict(state['model'])
+        if self.optim and state['optim']:
+            self.optim.load_state_dict(state['optim'])
+        self.eval_record = state['eval_record']
+        self.random_state = state['random_state']
+        for best_type in ['val', 'test']:
+            for key in RecordKey():
+                full_key = 'best_' + best_type + '_' + key + '_model'
+                setattr(self, full_key, state[full_key])
     #
     def export_checkpoint(self) -> None:
         """Export the checkpoint of the training record"""
         epoch = len(self.train[RecordKey.LOSS])
         if self.eval_record:
             self.eval_record.export(self.target_path)
+            self.eval_record.save(os.path.join(self.target_path, EVAL_STORE_DIR))
         for best_type in ['val', 'test']:
             for key in RecordKey():
                 full_key = 'best_' + best_type + '_' + key + '_model'
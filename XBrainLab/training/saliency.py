@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import torch
+import torch.utils.data as Data
+
+from ..utils import zip_strict
+from ..visualization import supported_saliency_methods
+
+# default parameters of noise tunnel, same as captum.attr.NoiseTunnel
+DEFAULT_NT_SAMPLES = 5
+DEFAULT_STDEVS = 1.0
+
+GRADIENT = 'Gradient'
+GRADIENT_INPUT = 'Gradient * Input'
+SMOOTHGRAD, SMOOTHGRAD_SQUARED, VARGRAD = supported_saliency_methods
+SALIENCY_METHODS = [GRADIENT, GRADIENT_INPUT, *supported_saliency_methods]
+
+
+def _get_noise_key(params: dict | None) -> tuple[int, int, float]:
+    """Return (nt_samples, nt_samples_batch_size, stdevs) of noise tunnel params."""
+    params = params or {}
+    nt_samples = params.get('nt_samples', DEFAULT_NT_SAMPLES)
+    nt_samples_batch_size = params.get('nt_samples_batch_size') or nt_samples
+    nt_samples_batch_size = min(nt_samples, nt_samples_batch_size)
+    stdevs = float(params.get('stdevs', DEFAULT_STDEVS))
+    return nt_samples, nt_samples_batch_size, stdevs
+
+def _get_partitions(nt_samples: int, nt_samples_batch_size: int) -> list[int]:
+    """Return number of noisy samples drawn at once, same as captum."""
+    partitions = [nt_samples_batch_size] * (nt_samples // nt_samples_batch_size)
+    if nt_samples % nt_samples_batch_size:
+        partitions.append(nt_samples % nt_samples_batch_size)
+    return partitions
+
+
+class SaliencyEngine:
+    """Helper class for computing all saliency maps of a batch in a single pass.
+
+    SmoothGrad, SmoothGrad_Squared and VarGrad are the mean, mean of squares
+    and variance of the absolute gradients of the same noisy copies of inputs.
+    Noise is therefore drawn once for methods sharing the same parameters,
+    and gradients of the inputs and all noisy copies are computed by one
+    batched backward pass, unless `nt_samples_batch_size` limits the number
+    of noisy copies processed at once.
+
+    The results are the same as :class:`captum.attr.Saliency` and
+    :class:`captum.attr.NoiseTunnel` of it, including the random noise
+    drawn with the same seed. If `seed` is given, noise is drawn from
+    a generator of the engine instead of the global random state, so that
+    the maps are reproducible and engines can run concurrently.
+
+    Gradient and Gradient * Input come with the backward pass of the inputs
+    and are always computed. Noise tunnel methods can be limited to the
+    requested ones, in which case only the noise shared with them is drawn.
+
+    Attributes:
+        model: :class:`torch.nn.Module`
+            Model to be explained.
+        noise_groups: dict[tuple[int, int, float], list[str]]
+            Noise tunnel methods by (nt_samples, nt_samples_batch_size, stdevs).
+        seed: int | None
+            Seed of the noise generator. Global random state is used if None.
+        generator: :class:`torch.Generator` | None
+            Noise generator, created on the device of the first batch.
+    """
+    def __init__(
+        self,
+        model: torch.nn.Module,
+        saliency_params: dict,
+        methods: list[str] | None = None,
+        seed: int | None = None
+    ):
+        self.model = model
+        self.seed = seed
+        self.generator = None
+        noise_groups = {}
+        for method in supported_saliency_methods:
+            key = _get_noise_key(saliency_params.get(method))
+            noise_groups.setdefault(key, []).append(method)
+        # methods sharing noise with the requested ones come at no extra cost
+        self.noise_groups = {
+            key: group for key, group in noise_groups.items()
+            if methods is None or any(method in methods for method in group)
+        }
+
+    def _forward_backward(
+        self, inputs: torch.Tensor, target: torch.Tensor
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        """Return outputs and gradients of the target outputs w.r.t. inputs."""
+        inputs = inputs.detach().requires_grad_()
+        with torch.enable_grad():
+            outputs = self.model(inputs)
+            target_outputs = outputs.gather(1, target[:, None])
+            gradient, = torch.autograd.grad(target_outputs.sum(), inputs)
+        return outputs.detach(), gradient
+
+    @staticmethod
+    def _add_noise(
+        inputs: torch.Tensor,
+        stdevs: float,
+        n: int,
+        generator: torch.Generator | None = None
+    ) -> torch.Tensor:
+        """Return n noisy copies of each input, drawn same as captum."""
+        expanded_size = (inputs.shape[0] * n, *inputs.shape[1:])
+        stdevs_expanded = torch.tensor(stdevs, device=inputs.device).repeat(
+            expanded_size
+        )
+        noise = torch.normal(0, stdevs_expanded, generator=generator)
+        return inputs.repeat_interleave(n, dim=0) + noise
+
+    def _get_generator(self, device: torch.device) -> torch.Generator | None:
+        """Return the noise generator, or None if the engine is not seeded."""
+        if self.seed is None:
+            return None
+        if self.generator is None:
+            self.generator = torch.Generator(device=device)
+            self.generator.manual_seed(self.seed)
+        return self.generator
+
+    def attribute(
+        self, inputs: torch.Tensor, target: torch.Tensor
+    ) -> tuple[torch.Tensor, dict[str, torch.Tensor]]:
+        """Compute outputs and saliency maps of a batch.
+
+        Args:
+            inputs: Input batch.
+            target: Target class of each input.
+
+        Returns:
+            Tuple of model outputs of the inputs, and dict of saliency maps
+            by method name, including Gradient and Gradient * Input.
+        """
+        inputs = inputs.detach()
+        target = torch.as_tensor(target, device=inputs.device)
+        batch_size = inputs.shape[0]
+        # batched backward pass over inputs and noisy copies
+        batch_inputs = [inputs]
+        batch_targets = [target]
+        batch_owners = []
+        sums = {}
+        sums_sq = {}
+
+        def accumulate(key, n, gradient):
+            attribution = gradient.abs().view(batch_size, n, *inputs.shape[1:])
+            current_sum = attribution.sum(dim=1)
+            current_sum_sq = attribution.pow(2).sum(dim=1)
+            if key in sums:
+                sums[key] = sums[key] + current_sum
+                sums_sq[key] = sums_sq[key] + current_sum_sq
+            else:
+                sums[key] = current_sum
+                sums_sq[key] = current_sum_sq
+
+        for key in self.noise_groups:
+            nt_samples, nt_samples_batch_size, stdevs = key
+            for n in _get_partitions(nt_samples, nt_samples_batch_size):
+                noisy_inputs = self._add_noise(
+                    inputs, stdevs, n, self._get_generator(inputs.device)
+                )
+                noisy_target = target.repeat_interleave(n)
+                if nt_samples_batch_size < nt_samples:
+                    # processed separately to bound memory usage
+                    _, gradient = self._forward_backward(noisy_inputs, noisy_target)
+                    accumulate(key, n, gradient)
+                else:
+                    batch_inputs.append(noisy_inputs)
+                    batch_targets.append(noisy_target)
+                    batch_owners.append((key, n))
+
+        outputs, gradients = self._forward_backward(
+            torch.cat(batch_inputs), torch.cat(batch_targets)
+        )
+        outputs = outputs[:batch_size]
+        gradient, *noisy_gradients = gradients.split(
+            [len(batch_input) for batch_input in batch_inputs]
+        )
+        for (key, n), noisy_gradient in zip_strict(batch_owners, noisy_gradients):
+            accumulate(key, n, noisy_gradient)
+
+        saliency = {
+            GRADIENT: gradient,
+            GRADIENT_INPUT: inputs * gradient
+        }
+        for key, methods in self.noise_groups.items():
+            nt_samples = key[0]
+            mean = sums[key] * 1 / nt_samples
+            mean_sq = sums_sq[key] * 1 / nt_samples
+            results = {
+                SMOOTHGRAD: mean,
+                SMOOTHGRAD_SQUARED: mean_sq,
+                VARGRAD: mean_sq - mean * mean
+            }
+            for method in methods:
+                saliency[method] = results[method]
+        return outputs, saliency
+
+
+def get_saliency_workers(num_jobs: int) -> int:
+    """Return number of threads computing saliency maps of num_jobs concurrently
+
+    Each computation already runs on the intra-op threads of torch,
+    so the cpu count is divided by them to avoid oversubscription.
+    """
+    num_workers = (os.cpu_count() or 1) // max(torch.get_num_threads(), 1)
+    return max(1, min(num_jobs, num_workers))
+
+def compute_saliency(
+    model: torch.nn.Module,
+    dataLoader: Data.DataLoader,
+    saliency_params: dict,
+    methods: list[str] | None = None,
+    seed: int | None = None
+) -> dict[str, dict[int, np.ndarray]]:
+    """Compute saliency maps of each class on given data loader
+
+    Args:
+        model: Model to be explained
+        dataLoader: Data loader
+        saliency_params: Parameters of each noise tunnel saliency method
+        methods: Saliency methods to be computed. All methods if None
+        seed: Seed of the noise of noise tunnel methods.
+              Drawn from the global random state if None
+
+    Returns:
+        Dict of saliency maps by method name, each a dict of
+        :class:`numpy.ndarray` of shape (n, ...) with class index as key.
+        Methods computed along with the requested ones are included.
+    """
+    model.eval()
+
+    label_list = []
+    saliency_lists = {}
+    class_num = 0
+
+    saliency_engine = SaliencyEngine(model, saliency_params, methods, seed)
+
+    for inputs, labels in dataLoader:
+        outputs, saliency = saliency_engine.attribute(inputs, labels)
+        class_num = outputs.shape[-1]
+
+        label_list.append(labels.detach().cpu().numpy())
+        for method, saliency_map in saliency.items():
+            saliency_lists.setdefault(method, []).append(
+                saliency_map.detach().cpu().numpy()
+            )
+
+    label_list = np.concatenate(label_list)
+    saliency_by_class = {}
+    for method, saliency_batches in saliency_lists.items():
+        saliency_array = np.concatenate(saliency_batches)
+        saliency_by_class[method] = {
+            i: saliency_array[np.where(label_list==i)]
+            for i in range(class_num)
+        }
+    return saliency_by_class
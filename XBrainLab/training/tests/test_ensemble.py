@@ -0,0 +1,147 @@
+from copy import deepcopy
+
+import pytest
+import torch
+
+from XBrainLab.model_base import EEGNet
+from XBrainLab.training.ensemble import ModelEnsemble
+from XBrainLab.utils import zip_strict
+
+
+class FakeModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.fc = torch.nn.Linear(4, 3)
+        self.bn = torch.nn.BatchNorm1d(3)
+
+    def forward(self, x):
+        return self.bn(self.fc(x))
+
+@pytest.fixture
+def models():
+    torch.manual_seed(0)
+    return [FakeModel() for _ in range(3)]
+
+def test_model_ensemble_empty():
+    with pytest.raises(ValueError):
+        ModelEnsemble([])
+
+def test_model_ensemble_forward(models):
+    ensemble = ModelEnsemble(models)
+    inputs = torch.rand(5, 4)
+    ensemble.eval()
+    outputs = ensemble(inputs)
+    assert len(ensemble) == 3
+    assert outputs.shape == (3, 5, 3)
+    for model, output in zip_strict(models, outputs):
+        model.eval()
+        assert torch.allclose(model(inputs), output, atol=1e-6)
+
+def test_model_ensemble_unstack(models):
+    ensemble = ModelEnsemble(models)
+    optimizer = torch.optim.SGD(ensemble.parameters(), lr=0.1)
+    ensemble.train()
+    outputs = ensemble(torch.rand(5, 4))
+    outputs.sum().backward()
+    optimizer.step()
+    ensemble.unstack()
+    for i, model in enumerate(models):
+        assert torch.equal(model.fc.weight, ensemble.params['fc.weight'][i])
+        assert torch.equal(
+            model.bn.running_mean, ensemble.buffers['bn.running_mean'][i]
+        )
+        assert model.bn.num_batches_tracked == 1
+
+def test_model_ensemble_optimizer_state(models):
+    optimizer_list = [torch.optim.Adam(model.parameters()) for model in models]
+    for model, optim in zip_strict(models, optimizer_list):
+        model(torch.rand(5, 4)).sum().backward()
+        optim.step()
+    ensemble = ModelEnsemble(models)
+    optimizer = torch.optim.Adam(ensemble.parameters())
+    ensemble.stack_optimizer_state(optimizer, optimizer_list)
+    stacked_state = optimizer.state[ensemble.params['fc.weight']]
+    assert stacked_state['exp_avg'].shape == (3, 3, 4)
+    for i, (model, optim) in enumerate(zip_strict(models, optimizer_list)):
+        assert torch.equal(
+            stacked_state['exp_avg'][i], optim.state[model.fc.weight]['exp_avg']
+        )
+
+    ensemble(torch.rand(5, 4)).sum().backward()
+    optimizer.step()
+    ensemble.unstack_optimizer_state(optimizer, optimizer_list)
+    for i, (model, optim) in enumerate(zip_strict(models, optimizer_list)):
+        state = optim.state[model.fc.weight]
+        assert state['step'] == 2
+        assert torch.equal(state['exp_avg'], stacked_state['exp_avg'][i])
+
+@pytest.fixture
+def eeg_models():
+    torch.manual_seed(0)
+    return [EEGNet(4, 8, 512, 64) for _ in range(3)]
+
+@pytest.fixture
+def eeg_batch():
+    generator = torch.Generator().manual_seed(1)
+    inputs = torch.randn(6, 1, 8, 512, generator=generator)
+    target = torch.randint(0, 4, (6,), generator=generator)
+    return inputs, target
+
+def _train_step(model, optimizer, inputs, target):
+    optimizer.zero_grad()
+    outputs = model(inputs)
+    if isinstance(model, ModelEnsemble):
+        loss = sum(
+            torch.nn.functional.cross_entropy(output, target) for output in outputs
+        )
+    else:
+        loss = torch.nn.functional.cross_entropy(outputs, target)
+    loss.backward()
+    optimizer.step()
+    return outputs
+
+def test_model_ensemble_eegnet_same_as_sequential(eeg_models, eeg_batch):
+    # dropout masks of stacked models differ from sequential ones
+    for model in eeg_models:
+        for module in model.modules():
+            if isinstance(module, torch.nn.Dropout):
+                module.p = 0
+    sequential_models = deepcopy(eeg_models)
+    ensemble = ModelEnsemble(eeg_models)
+    ensemble.train()
+    optimizer = torch.optim.SGD(ensemble.parameters(), lr=0.01, momentum=0.9)
+    optimizer_list = [
+        torch.optim.SGD(model.parameters(), lr=0.01, momentum=0.9)
+        for model in sequential_models
+    ]
+    for _ in range(3):
+        outputs = _train_step(ensemble, optimizer, *eeg_batch)
+        for model, optim, output in zip_strict(
+            sequential_models, optimizer_list, outputs
+        ):
+            model.train()
+            expected = _train_step(model, optim, *eeg_batch)
+            torch.testing.assert_close(output, expected, atol=1e-5, rtol=1e-4)
+    ensemble.unstack()
+    for model, sequential_model in zip_strict(eeg_models, sequential_models):
+        for key, value in sequential_model.state_dict().items():
+            torch.testing.assert_close(
+                model.state_dict()[key], value, atol=1e-5, rtol=1e-4
+            )
+
+    ensemble.eval()
+    outputs = ensemble(eeg_batch[0])
+    for model, output in zip_strict(sequential_models, outputs):
+        model.eval()
+        torch.testing.assert_close(output, model(eeg_batch[0]))
+
+def test_model_ensemble_eegnet_single_dropout(eeg_models, eeg_batch):
+    model = eeg_models[0]
+    ensemble = ModelEnsemble([deepcopy(model)])
+    model.train()
+    ensemble.train()
+    # a single stacked model draws the same dropout masks
+    torch.manual_seed(2)
+    expected = model(eeg_batch[0])
+    torch.manual_seed(2)
+    torch.testing.assert_close(ensemble(eeg_batch[0])[0], expected)
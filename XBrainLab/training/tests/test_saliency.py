@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+import torch
+import torch.utils.data as Data
+from captum.attr import NoiseTunnel, Saliency
+
+from XBrainLab.training.saliency import (
+    GRADIENT,
+    GRADIENT_INPUT,
+    SALIENCY_METHODS,
+    SaliencyEngine,
+    compute_saliency,
+)
+
+NT_TYPES = {
+    'SmoothGrad': 'smoothgrad',
+    'SmoothGrad_Squared': 'smoothgrad_sq',
+    'VarGrad': 'vargrad',
+}
+SEED = 42
+
+
+class FakeModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.conv = torch.nn.Conv1d(3, 4, 5)
+        self.fc = torch.nn.Linear(4 * 16, 3)
+
+    def forward(self, x):
+        return self.fc(torch.tanh(self.conv(x)).flatten(1))
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return FakeModel().eval()
+
+@pytest.fixture
+def inputs():
+    return torch.randn(6, 3, 20, generator=torch.Generator().manual_seed(1))
+
+@pytest.fixture
+def target():
+    return torch.tensor([0, 1, 2, 0, 1, 2])
+
+def _captum_attribute(model, inputs, target, saliency_params):
+    saliency = Saliency(model)
+    noise_tunnel = NoiseTunnel(saliency)
+    result = {
+        GRADIENT: saliency.attribute(
+            inputs.clone().requires_grad_(), target=target.tolist(), abs=False
+        )
+    }
+    result[GRADIENT_INPUT] = inputs * result[GRADIENT]
+    for method, nt_type in NT_TYPES.items():
+        torch.manual_seed(SEED)
+        result[method] = noise_tunnel.attribute(
+            inputs.clone().requires_grad_(), target=target.tolist(),
+            nt_type=nt_type, **saliency_params[method]
+        )
+    return result
+
+@pytest.mark.parametrize('saliency_params', [
+    {'nt_samples': 5, 'nt_samples_batch_size': None, 'stdevs': 1.0},
+    {'nt_samples': 7, 'nt_samples_batch_size': 3, 'stdevs': 0.5},
+    {'nt_samples': 1, 'nt_samples_batch_size': 4, 'stdevs': 2.0},
+])
+def test_saliency_engine_same_as_captum(model, inputs, target, saliency_params):
+    saliency_params = dict.fromkeys(NT_TYPES, saliency_params)
+    expected = _captum_attribute(model, inputs, target, saliency_params)
+
+    torch.manual_seed(SEED)
+    outputs, result = SaliencyEngine(model, saliency_params).attribute(
+        inputs, target
+    )
+    torch.testing.assert_close(outputs, model(inputs).detach())
+    assert list(result) == SALIENCY_METHODS
+    for method in SALIENCY_METHODS:
+        assert result[method].shape == inputs.shape
+        torch.testing.assert_close(result[method], expected[method])
+
+def test_saliency_engine_shared_noise(model, inputs, target, mocker):
+    params = {'nt_samples': 4, 'nt_samples_batch_size': None, 'stdevs': 1.0}
+    engine = SaliencyEngine(model, dict.fromkeys(NT_TYPES, params))
+    assert len(engine.noise_groups) == 1
+    forward_backward = mocker.spy(engine, '_forward_backward')
+    add_noise = mocker.spy(engine, '_add_noise')
+    engine.attribute(inputs, target)
+    # noise drawn once, single backward over inputs and all noisy copies
+    add_noise.assert_called_once()
+    forward_backward.assert_called_once()
+    assert len(forward_backward.call_args[0][0]) == len(inputs) * 5
+
+def test_saliency_engine_different_params(model, inputs, target):
+    saliency_params = {
+        'SmoothGrad': {'nt_samples': 3, 'stdevs': 0.5},
+        'SmoothGrad_Squared': {'nt_samples': 3, 'stdevs': 0.5},
+        'VarGrad': {'nt_samples': 2, 'nt_samples_batch_size': 1, 'stdevs': 1.0},
+    }
+    engine = SaliencyEngine(model, saliency_params)
+    assert engine.noise_groups == {
+        (3, 3, 0.5): ['SmoothGrad', 'SmoothGrad_Squared'],
+        (2, 1, 1.0): ['VarGrad'],
+    }
+    torch.manual_seed(SEED)
+    _, result = engine.attribute(inputs, target)
+    # noise of the first group is drawn first, same as captum with the seed
+    expected = _captum_attribute(model, inputs, target, saliency_params)
+    for method in ['SmoothGrad', 'SmoothGrad_Squared']:
+        torch.testing.assert_close(result[method], expected[method])
+    assert result['VarGrad'].shape == inputs.shape
+    assert torch.all(result['VarGrad'] >= -1e-6)
+
+def test_saliency_engine_requested_methods(model, inputs, target):
+    saliency_params = {
+        'SmoothGrad': {'nt_samples': 3, 'stdevs': 0.5},
+        'SmoothGrad_Squared': {'nt_samples': 3, 'stdevs': 0.5},
+        'VarGrad': {'nt_samples': 2, 'stdevs': 1.0},
+    }
+    engine = SaliencyEngine(model, saliency_params, [GRADIENT])
+    assert engine.noise_groups == {}
+    _, result = engine.attribute(inputs, target)
+    assert list(result) == [GRADIENT, GRADIENT_INPUT]
+
+    engine = SaliencyEngine(model, saliency_params, ['SmoothGrad'])
+    assert engine.noise_groups == {(3, 3, 0.5): ['SmoothGrad', 'SmoothGrad_Squared']}
+    torch.manual_seed(SEED)
+    _, result = engine.attribute(inputs, target)
+    expected = _captum_attribute(model, inputs, target, saliency_params)
+    assert set(result) == {
+        GRADIENT, GRADIENT_INPUT, 'SmoothGrad', 'SmoothGrad_Squared'
+    }
+    for method in result:
+        torch.testing.assert_close(result[method], expected[method])
+
+def test_saliency_engine_seed(model, inputs, target):
+    params = {'nt_samples': 3, 'nt_samples_batch_size': 2, 'stdevs': 1.0}
+    saliency_params = dict.fromkeys(NT_TYPES, params)
+    torch.manual_seed(SEED)
+    expected = _captum_attribute(model, inputs, target, saliency_params)
+    results = []
+    for global_seed in [0, 1]:
+        torch.manual_seed(global_seed)
+        engine = SaliencyEngine(model, saliency_params, seed=SEED)
+        _, result = engine.attribute(inputs, target)
+        results.append(result)
+    for method in NT_TYPES:
+        torch.testing.assert_close(results[0][method], results[1][method])
+        # same noise as captum with the global seed
+        torch.testing.assert_close(results[0][method], expected[method])
+
+def test_compute_saliency(model, inputs, target):
+    dataloader = Data.DataLoader(
+        Data.TensorDataset(inputs, target), batch_size=4
+    )
+    saliency_params = {method: {'nt_samples': 2} for method in NT_TYPES}
+    result = compute_saliency(model, dataloader, saliency_params, ['VarGrad'])
+    assert set(result) == set(SALIENCY_METHODS)
+
+    _, expected = SaliencyEngine(model, saliency_params).attribute(inputs, target)
+    for label in range(3):
+        assert result[GRADIENT][label].shape == (2, 3, 20)
+        assert np.allclose(
+            result[GRADIENT][label], expected[GRADIENT][target == label].numpy()
+        )
@@ -1,6 +1,13 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+
 import pytest
 
 from XBrainLab.training import Trainer, TrainingPlanHolder
+from XBrainLab.training.parallel import TrainingPool, _get_report
 
 
 class FakePlan:
@@ -57,7 +64,6 @@ def test_trainer_run(mocker, training_plan_holders, interact):
     trainer = Trainer(training_plan_holders)
     job_mock = mocker.patch.object(trainer, 'job')
     def job():
-        import threading
         if interact:
             assert trainer.is_running()
             assert not isinstance(threading.current_thread(), threading._MainThread)
@@ -79,7 +85,7 @@ def test_trainer_job(mocker, training_plan_holders):
     trainer = Trainer(training_plan_holders)
     train_mock_list = []
     counter = 0
-    def train():
+    def train(**kwargs):
         nonlocal counter
         assert trainer.get_progress_text() == 'Now training: Fake' + str(counter)
         counter += 1
@@ -120,3 +126,218 @@ def test_trainer_get_plan(
         error = '.*training plan.*' if error_stage == 1 else '.*real plan.*'
         with pytest.raises(ValueError, match=error):
             trainer.get_real_training_plan(plan_name, real_plan_name)
+
+class FakeRecord:
+    def __init__(self):
+        self.epoch = 0
+        self.pid = None
+        self.history = []
+
+    def is_finished(self):
+        return self.epoch > 0
+
+    def get_state(self, include_model=True):
+        state = {'epoch': self.epoch, 'history': self.history}
+        if include_model:
+            state['pid'] = self.pid
+        return state
+
+    def set_state(self, state):
+        self.epoch = state['epoch']
+        self.history = state['history']
+        if 'pid' in state:
+            self.pid = state['pid']
+
+    def get_eval_record(self):
+        return None
+
+class FakeOption:
+    def get_device(self):
+        return 'cpu'
+
+class FakeDataset:
+    def clear_tensor_cache(self):
+        pass
+
+class FakeParallelPlanHolder(TrainingPlanHolder):
+    def __init__(self, i, repeat_num=2, error=None):
+        self.i = i
+        self.option = FakeOption()
+        self.dataset = FakeDataset()
+        self.train_record_list = [FakeRecord() for _ in range(repeat_num)]
+        self.interrupt = False
+        self.error = None
+        self.status = 'Pending'
+        self.train_error = error
+        self.trained = []
+
+    def get_name(self):
+        return 'Fake' + str(self.i)
+
+    def train(self, repeat_list=None, **kwargs):
+        if self.train_error:
+            self.error = self.train_error
+            return
+        if repeat_list is None:
+            repeat_list = range(len(self.train_record_list))
+        for i in repeat_list:
+            if self.interrupt:
+                break
+            if self.train_record_list[i].is_finished():
+                continue
+            self.train_record_list[i].epoch += 1
+            self.train_record_list[i].history.append(self.i)
+            self.train_record_list[i].pid = os.getpid()
+
+@pytest.mark.timeout(60)
+@pytest.mark.parametrize('split_repeat', [True, False])
+def test_trainer_parallel_job(split_repeat):
+    training_plan_holders = [FakeParallelPlanHolder(i) for i in range(3)]
+    trainer = Trainer(training_plan_holders)
+    assert trainer.get_job_list() == [(0, None), (1, None), (2, None)]
+    trainer.run(num_workers=2, num_threads=1, split_repeat=split_repeat)
+
+    assert trainer.get_progress_text() == 'Pending'
+    assert trainer.is_running() is False
+    for holder in training_plan_holders:
+        assert holder.is_finished()
+        assert holder.get_training_status() == 'Finished'
+        for record in holder.get_plans():
+            assert record.epoch == 1
+            assert record.pid != os.getpid()
+
+def test_trainer_parallel_job_list():
+    training_plan_holders = [FakeParallelPlanHolder(i) for i in range(2)]
+    training_plan_holders[0].train_record_list[0].epoch = 1
+    training_plan_holders[1].train_record_list[0].epoch = 1
+    training_plan_holders[1].train_record_list[1].epoch = 1
+    trainer = Trainer(training_plan_holders)
+    assert trainer.get_job_list() == [(0, None)]
+    trainer.split_repeat = True
+    assert trainer.get_job_list() == [(0, 1)]
+
+@pytest.mark.timeout(60)
+@pytest.mark.parametrize('split_repeat', [True, False])
+def test_trainer_parallel_job_resume(mocker, split_repeat):
+    # repeats finished out of order before the training was interrupted
+    training_plan_holders = [FakeParallelPlanHolder(i) for i in range(3)]
+    training_plan_holders[0].train_record_list[1].epoch = 1
+    training_plan_holders[1].train_record_list[0].epoch = 1
+    training_plan_holders[1].train_record_list[1].epoch = 1
+    run_spy = mocker.spy(TrainingPool, 'run')
+    trainer = Trainer(training_plan_holders)
+    trainer.run(num_workers=2, num_threads=1, split_repeat=split_repeat)
+
+    job_list = run_spy.call_args.args[1]
+    if split_repeat:
+        assert job_list == [(0, 0), (2, 0), (2, 1)]
+    else:
+        assert job_list == [(0, None), (2, None)]
+    for holder in training_plan_holders:
+        assert holder.is_finished()
+        for record in holder.get_plans():
+            assert record.epoch == 1
+    assert training_plan_holders[0].get_training_status() == 'Finished'
+    assert training_plan_holders[2].get_training_status() == 'Finished'
+    assert training_plan_holders[0].get_plans()[0].history == [0]
+    assert training_plan_holders[0].get_plans()[1].history == []
+
+@pytest.mark.timeout(60)
+def test_trainer_parallel_job_spawn(mocker):
+    mocker.patch.object(
+        TrainingPool, 'get_mp_context',
+        return_value=multiprocessing.get_context('spawn')
+    )
+    training_plan_holders = [FakeParallelPlanHolder(i) for i in range(2)]
+    trainer = Trainer(training_plan_holders)
+    trainer.run(num_workers=2, num_threads=1, split_repeat=True)
+
+    for holder in training_plan_holders:
+        assert holder.is_finished()
+        assert holder.get_training_status() == 'Finished'
+        for record in holder.get_plans():
+            assert record.history == [holder.i]
+            assert record.pid != os.getpid()
+
+def test_trainer_parallel_report_snapshot():
+    holder = FakeParallelPlanHolder(0)
+    report = _get_report(holder, 0, [0, 1])
+    holder.train()
+    assert report['records'][0] == {'epoch': 0, 'history': []}
+    assert report['records'][1] == {'epoch': 0, 'history': []}
+
+@pytest.mark.timeout(60)
+def test_trainer_parallel_job_error():
+    training_plan_holders = [
+        FakeParallelPlanHolder(0, error='test'), FakeParallelPlanHolder(1)
+    ]
+    trainer = Trainer(training_plan_holders)
+    trainer.run(num_workers=2, num_threads=1)
+
+    assert training_plan_holders[0].get_training_status() == 'test'
+    assert training_plan_holders[0].is_finished() is False
+    assert training_plan_holders[1].get_training_status() == 'Finished'
+
+@pytest.mark.timeout(60)
+def test_trainer_parallel_job_interrupt():
+    training_plan_holders = [FakeParallelPlanHolder(i) for i in range(2)]
+    trainer = Trainer(training_plan_holders)
+    trainer.set_interrupt()
+    trainer.num_workers = 2
+    trainer.num_threads = 1
+    trainer.job()
+
+    for holder in training_plan_holders:
+        assert holder.is_finished() is False
+        assert holder.get_training_status() == 'Pending'
+
+@pytest.mark.parametrize('saliency_workers', [0, 2])
+def test_trainer_precompute_saliency(mocker, training_plan_holders, saliency_workers):
+    trainer = Trainer(training_plan_holders)
+    future = Future()
+    precompute_mock_list = []
+    for holder in training_plan_holders:
+        mocker.patch.object(holder, 'train')
+        precompute_mock_list.append(
+            mocker.patch.object(holder, 'precompute_saliency', return_value=[future])
+        )
+    trainer.run(saliency_workers=saliency_workers)
+    for precompute_mock in precompute_mock_list:
+        assert precompute_mock.call_count == (saliency_workers > 0)
+    if saliency_workers:
+        assert trainer.get_saliency_futures() == [future, future]
+    else:
+        assert trainer.get_saliency_futures() == []
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize('interact', [True, False])
+def test_trainer_set_saliency_params(mocker, training_plan_holders, interact):
+    trainer = Trainer(training_plan_holders)
+    saliency_params = {'SmoothGrad': {'nt_samples': 2}}
+    computed = threading.Event()
+    if not interact:
+        computed.set()
+    def set_saliency_params(params, executor):
+        assert params == saliency_params
+        return [executor.submit(computed.wait), executor.submit(computed.wait)]
+    for holder in training_plan_holders:
+        mocker.patch.object(
+            holder, 'set_saliency_params', side_effect=set_saliency_params
+        )
+    trainer.set_saliency_params(saliency_params, interact=interact, num_workers=1)
+    if interact:
+        while trainer.get_progress_text() != 'Computing saliency maps: 0 / 4':
+            time.sleep(0.01)
+        assert trainer.is_running()
+        computed.set()
+        while trainer.is_running():
+            time.sleep(0.01)
+    for holder in training_plan_holders:
+        holder.set_saliency_params.assert_called_once()
+    assert trainer.get_progress_text() == 'Pending'
+
+def test_trainer_set_saliency_params_running(mocker, training_plan_holders):
+    trainer = Trainer(training_plan_holders)
+    mocker.patch.object(trainer, 'is_running', return_value=True)
+    with pytest.raises(RuntimeError):
+        trainer.set_saliency_params({})
@@ -1,4 +1,7 @@
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 
 import mne
 import numpy as np
@@ -16,15 +19,17 @@ from XBrainLab.dataset import (
     ValSplitByType,
 )
 from XBrainLab.load_data import Raw
+from XBrainLab.training import training_plan
 from XBrainLab.training.option import TRAINING_EVALUATION
-from XBrainLab.training.record import RecordKey
+from XBrainLab.training.record import RecordKey, SaliencyStorage
+from XBrainLab.training.saliency import SALIENCY_METHODS, compute_saliency
 from XBrainLab.training.training_plan import (
     ModelHolder,
     TrainingOption,
     TrainingPlanHolder,
     TrainRecord,
 )
-from XBrainLab.utils import set_seed
+from XBrainLab.utils import set_seed, zip_strict
 
 CLASS_NUM = 4
 ERROR_NUM = 3
@@ -135,13 +140,15 @@ def training_option():
 def export_mocker(mocker):
     mocker.patch('torch.save')
     mocker.patch('os.makedirs')
+    mocker.patch('XBrainLab.training.record.EvalRecord.save')
 
 @pytest.fixture
 def base_holder(export_mocker, model_holder, dataset, training_option):
     args = {
         'model_holder': model_holder,
         'dataset': dataset,
-        'option': training_option
+        'option': training_option,
+        'saliency_params': None
     }
     return TrainingPlanHolder(**args)
 
@@ -156,7 +163,8 @@ def test_training_plan_holder_check_data(
     args = {
         'model_holder': model_holder,
         'dataset': dataset,
-        'option': training_option
+        'option': training_option,
+        'saliency_params': None
     }
     if test_arg is None:
         holder = TrainingPlanHolder(**args)
@@ -192,6 +200,21 @@ def test_training_plan_holder_get_loader(base_holder):
     with pytest.raises(AssertionError):
         torch.testing.assert_close(test_data[1], train_data[1])
 
+def test_training_plan_holder_get_loader_cached(base_holder):
+    loaders = base_holder.get_loader()
+    cached_loaders = base_holder.get_loader()
+    for loader, cached_loader in zip_strict(loaders, cached_loaders):
+        assert loader is not cached_loader
+        assert loader.dataset is cached_loader.dataset
+        assert loader.dataset.data is base_holder.get_dataset().epoch_data.data
+
+    base_holder.option.epoch = 1
+    base_holder.train(repeat_list=[0])
+    assert base_holder.get_dataset().tensor_cache
+    base_holder.train()
+    assert base_holder.is_finished()
+    assert base_holder.get_dataset().tensor_cache == {}
+
 @pytest.mark.parametrize("val_loader, test_loader, expected_loader", [
     ('val', 'test', 'test'),
     (None, 'test', 'test'),
@@ -488,6 +511,43 @@ def test_training_plan_holder_train_status(mocker, base_holder):
     assert base_holder.get_training_status() == "Pending"
     train_one_repeat_mock.assert_called()
 
+@pytest.mark.timeout(10)
+def test_training_plan_holder_train_out_of_order(mocker, base_holder):
+    clear_mock = mocker.patch.object(base_holder.dataset, 'clear_tensor_cache')
+    # later repeats finished first, e.g. by concurrent workers
+    base_holder.train([4, 2])
+    assert base_holder.is_finished() is False
+    assert base_holder.get_training_status() == "Pending"
+    assert base_holder.get_training_repeat() == 0
+    assert base_holder.get_epoch_progress_text() == "20 / 50"
+    clear_mock.assert_not_called()
+
+    # interrupted halfway through the first repeat
+    original_train_one_epoch = base_holder.train_one_epoch
+    def interrupt_halfway(*args, **kwargs):
+        original_train_one_epoch(*args, **kwargs)
+        if base_holder.get_training_epoch() == 3:
+            base_holder.set_interrupt()
+    train_one_epoch_mock = mocker.patch.object(
+        base_holder, 'train_one_epoch', side_effect=interrupt_halfway
+    )
+    base_holder.train()
+    assert base_holder.is_finished() is False
+    assert base_holder.get_training_status() == "Pending"
+    assert base_holder.get_training_repeat() == 0
+    assert base_holder.get_epoch_progress_text() == "23 / 50"
+    clear_mock.assert_not_called()
+
+    # resumed
+    mocker.stop(train_one_epoch_mock)
+    base_holder.clear_interrupt()
+    base_holder.train()
+    assert base_holder.is_finished()
+    assert base_holder.get_training_status() == "Finished"
+    assert base_holder.get_training_repeat() == 4
+    assert base_holder.get_epoch_progress_text() == "50 / 50"
+    clear_mock.assert_called_once()
+
 @pytest.mark.timeout(10)
 def test_training_plan_holder_train_error(mocker, base_holder):
     train_one_repeat_mock = mocker.patch.object(base_holder, 'train_one_repeat')
@@ -499,3 +559,267 @@ def test_training_plan_holder_train_error(mocker, base_holder):
     assert base_holder.is_finished() is False
     assert base_holder.get_training_status() == "test"
     train_one_repeat_mock.assert_called()
+
+class DropoutModel(torch.nn.Module):
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.fc = torch.nn.Linear(CLASS_NUM, CLASS_NUM)
+        self.dropout = torch.nn.Dropout(0.5)
+
+    def forward(self, x):
+        x = self.dropout(self.fc(x))
+        x = x.squeeze(1)
+        return x
+
+@pytest.fixture
+def single_thread():
+    num_threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    yield
+    torch.set_num_threads(num_threads)
+
+@pytest.mark.timeout(60)
+def test_training_plan_holder_train_concurrently(
+    export_mocker, dataset, training_option, single_thread
+):
+    training_option.epoch = 3
+    model_holder = ModelHolder(DropoutModel, {}, None)
+    sequential_holder = TrainingPlanHolder(
+        model_holder, dataset, training_option, None
+    )
+    concurrent_holder = deepcopy(sequential_holder)
+
+    sequential_holder.train()
+    concurrent_holder.train(num_workers=3, num_threads=1)
+
+    assert concurrent_holder.get_training_status() == "Finished"
+    assert concurrent_holder.is_finished()
+    for sequential_record, concurrent_record in zip_strict(
+        sequential_holder.get_plans(), concurrent_holder.get_plans()
+    ):
+        for key in RecordKey():
+            assert concurrent_record.train[key] == sequential_record.train[key]
+        assert concurrent_record.val == sequential_record.val
+        assert concurrent_record.test == sequential_record.test
+        assert concurrent_record.best_record == sequential_record.best_record
+        sequential_state = sequential_record.model.state_dict()
+        concurrent_state = concurrent_record.model.state_dict()
+        for key in sequential_state:
+            assert torch.equal(sequential_state[key], concurrent_state[key])
+        for state, expected in zip_strict(
+            concurrent_record.random_state, sequential_record.random_state
+        ):
+            if isinstance(state, torch.Tensor):
+                assert torch.equal(state, expected)
+        assert np.array_equal(
+            concurrent_record.eval_record.output,
+            sequential_record.eval_record.output
+        )
+
+class LinearModel(torch.nn.Module):
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.fc = torch.nn.Linear(CLASS_NUM, CLASS_NUM)
+
+    def forward(self, x):
+        x = self.fc(x)
+        x = x.squeeze(1)
+        return x
+
+@pytest.mark.timeout(60)
+def test_training_plan_holder_train_ensemble(
+    export_mocker, dataset, training_option
+):
+    training_option.epoch = 3
+    model_holder = ModelHolder(DropoutModel, {}, None)
+    holder = TrainingPlanHolder(model_holder, dataset, training_option, None)
+    holder.train(ensemble=True)
+
+    assert holder.get_training_status() == "Finished"
+    assert holder.is_finished()
+    for record in holder.get_plans():
+        assert record.get_epoch() == 3
+        assert len(record.train[RecordKey.LOSS]) == 3
+        assert len(record.val[RecordKey.LOSS]) == 3
+        assert record.eval_record is not None
+        assert record.optim.state
+    weights = [record.model.fc.weight for record in holder.get_plans()]
+    assert not torch.equal(weights[0], weights[1])
+
+@pytest.mark.timeout(60)
+def test_training_plan_holder_train_ensemble_random_state(
+    mocker, export_mocker, dataset, training_option
+):
+    training_option.epoch = 4
+    training_option.repeat_num = 3
+    model_holder = ModelHolder(DropoutModel, {}, None)
+    holder = TrainingPlanHolder(model_holder, dataset, training_option, None)
+    resumed_holder = deepcopy(holder)
+    initial_states = [record.random_state for record in holder.get_plans()]
+
+    holder.train(ensemble=True)
+    # only the first repeat draws from its random state
+    states = [record.random_state for record in holder.get_plans()]
+    assert not torch.equal(states[0][0], initial_states[0][0])
+    for state, initial_state in zip_strict(states[1:], initial_states[1:]):
+        assert torch.equal(state[0], initial_state[0])
+
+    # resumed from the saved state after being interrupted halfway
+    train_one_epoch_ensemble = resumed_holder.train_one_epoch_ensemble
+    def interrupt_halfway(*args):
+        train_one_epoch_ensemble(*args)
+        if resumed_holder.get_plans()[0].get_epoch() == 2:
+            resumed_holder.set_interrupt()
+    mocker.patch.object(
+        resumed_holder, 'train_one_epoch_ensemble', side_effect=interrupt_halfway
+    )
+    resumed_holder.train(ensemble=True)
+    assert resumed_holder.get_plans()[0].get_epoch() == 2
+    torch.rand(10)
+    resumed_holder.clear_interrupt()
+    resumed_holder.train(ensemble=True)
+    for record, resumed_record in zip_strict(
+        holder.get_plans(), resumed_holder.get_plans()
+    ):
+        assert resumed_record.get_epoch() == 4
+        for key in RecordKey():
+            assert np.allclose(
+                resumed_record.train[key], record.train[key], atol=1e-5
+            )
+
+@pytest.mark.timeout(60)
+def test_training_plan_holder_train_ensemble_single(
+    export_mocker, dataset, training_option
+):
+    training_option.epoch = 3
+    model_holder = ModelHolder(LinearModel, {}, None)
+    sequential_holder = TrainingPlanHolder(
+        model_holder, dataset, training_option, None
+    )
+    ensemble_holder = deepcopy(sequential_holder)
+
+    sequential_holder.train(repeat_list=[0])
+    ensemble_holder.train(repeat_list=[0], ensemble=True)
+
+    sequential_record = sequential_holder.get_plans()[0]
+    ensemble_record = ensemble_holder.get_plans()[0]
+    assert ensemble_record.is_finished()
+    for key in RecordKey():
+        assert np.allclose(
+            ensemble_record.train[key], sequential_record.train[key], atol=1e-5
+        )
+    for key, value in sequential_record.model.state_dict().items():
+        assert torch.allclose(
+            ensemble_record.model.state_dict()[key], value, atol=1e-5
+        )
+
+@pytest.mark.timeout(60)
+def test_training_plan_holder_saliency_on_demand(
+    mocker, export_mocker, dataset, training_option
+):
+    training_option.epoch = 2
+    training_option.repeat_num = 2
+    model_holder = ModelHolder(LinearModel, {}, None)
+    holder = TrainingPlanHolder(model_holder, dataset, training_option, None)
+    compute_saliency_mock = mocker.spy(training_plan, 'compute_saliency')
+    holder.train()
+
+    assert holder.is_finished()
+    compute_saliency_mock.assert_not_called()
+    record = holder.get_plans()[0]
+    eval_record = record.get_eval_record()
+    assert not eval_record.has_saliency('Gradient')
+
+    smoothgrad = eval_record.get_smoothgrad(1)
+    compute_saliency_mock.assert_called_once()
+    assert eval_record.has_saliency('VarGrad')
+    assert holder.get_dataset().tensor_cache == {}
+    # computed from the best model state
+    model, loader = holder.get_eval_pair(record, *holder.get_loader()[1:])
+    expected = compute_saliency(model, loader, holder.get_saliency_params())
+    torch.testing.assert_close(eval_record.get_gradient(1), expected['Gradient'][1])
+    assert smoothgrad.shape == expected['SmoothGrad'][1].shape
+    compute_saliency_mock.assert_called_once()
+
+    saliency_params = {
+        **holder.get_saliency_params(),
+        'VarGrad': {'nt_samples': 2, 'nt_samples_batch_size': None, 'stdevs': 0.5}
+    }
+    futures = holder.set_saliency_params(saliency_params)
+    # only the computed map of the changed method is recomputed
+    assert len(futures) == 1
+    assert futures[0].done()
+    assert holder.get_saliency_progress() == (1, 1)
+    assert compute_saliency_mock.call_count == 2
+    assert compute_saliency_mock.call_args[0][2:] == (saliency_params, ['VarGrad'])
+    for record in holder.get_plans():
+        assert record.get_eval_record().saliency_params == saliency_params
+    assert eval_record.get_smoothgrad(1) is smoothgrad
+    assert eval_record.has_saliency('VarGrad')
+
+    with ThreadPoolExecutor(2) as executor:
+        futures = holder.precompute_saliency(executor)
+    assert len(futures) == 2
+    for future in futures:
+        future.result()
+    for record in holder.get_plans():
+        for method in SALIENCY_METHODS:
+            assert record.get_eval_record().has_saliency(method)
+
+    # noise is drawn from a generator seeded per repeat, on views of its own
+    holder.get_dataset().clear_tensor_cache()
+    torch.manual_seed(0)
+    result = holder.compute_eval_saliency(record, ['SmoothGrad'], saliency_params)
+    torch.manual_seed(1)
+    expected = holder.compute_eval_saliency(record, ['SmoothGrad'], saliency_params)
+    for label, saliency in expected['SmoothGrad'].items():
+        assert np.array_equal(result['SmoothGrad'][label], saliency)
+        assert np.array_equal(
+            record.get_eval_record().get_smoothgrad(label), saliency
+        )
+    assert holder.get_dataset().tensor_cache == {}
+
+def test_training_plan_holder_saliency_storage(
+    mocker, tmp_path, dataset, training_option
+):
+    mocker.patch('torch.save')
+    training_option.output_dir = str(tmp_path)
+    training_option.epoch = 1
+    training_option.repeat_num = 2
+    model_holder = ModelHolder(LinearModel, {}, None)
+    holder = TrainingPlanHolder(
+        model_holder, dataset, training_option, None,
+        saliency_storage=SaliencyStorage.DISK
+    )
+    holder.train()
+
+    # spilled to the evaluation store of each repeat
+    for record in reversed(holder.get_plans()):
+        eval_record = record.get_eval_record()
+        assert eval_record.saliency_storage == SaliencyStorage.DISK
+        gradient = eval_record.get_gradient(1)
+        assert isinstance(gradient, np.memmap)
+        assert os.path.dirname(gradient.filename) == os.path.abspath(
+            os.path.join(record.target_path, 'eval_record', 'saliency')
+        )
+
+    holder.set_saliency_storage(SaliencyStorage.AGGREGATE)
+    eval_record = holder.get_plans()[0].get_eval_record()
+    assert eval_record.saliency == {}
+    aggregate = eval_record.get_saliency_aggregate('Gradient', 1)
+    assert np.allclose(aggregate.mean, gradient.mean(axis=0), atol=1e-6)
+
+@pytest.mark.timeout(60)
+def test_training_plan_holder_concurrently_saliency_source(
+    export_mocker, dataset, training_option
+):
+    training_option.epoch = 1
+    training_option.repeat_num = 2
+    model_holder = ModelHolder(LinearModel, {}, None)
+    holder = TrainingPlanHolder(model_holder, dataset, training_option, None)
+    holder.train(num_workers=2, num_threads=1)
+
+    for record in holder.get_plans():
+        eval_record = record.get_eval_record()
+        assert eval_record.saliency_source is not None
+        assert len(eval_record.get_gradient(0)) > 0
@@ -1,13 +1,17 @@
+import math
+
 import numpy as np
 import pytest
 import torch
 from torch.utils.data import DataLoader
 
+from XBrainLab.dataset import EpochsView
 from XBrainLab.training.training_plan import (
     EvalRecord,
     _eval_model,
     _test_model,
     to_holder,
+    view_to_holder,
 )
 
 
@@ -43,6 +47,43 @@ def test_to_holder_empty():
     shuffle = True
     assert to_holder(X, y, device, bs, shuffle) is None
 
+def _create_holder(X, y, bs, shuffle):
+    # epoch data is stored as floating point
+    view = EpochsView.from_mask(
+        X.astype(np.float32), y, np.ones(len(X), dtype=bool)
+    )
+    return view_to_holder(view, bs, shuffle)
+
+@pytest.mark.parametrize('shuffle', [True, False])
+def test_view_to_holder(shuffle):
+    length = 3000
+    X = np.arange(length).reshape(-1, 1)
+    y = np.arange(length)
+
+    bs = 128
+    dataloader = _create_holder(X, y, bs, shuffle)
+
+    # Perform assertions
+    assert isinstance(dataloader, DataLoader)
+    assert len(dataloader) == math.ceil(length / bs)
+
+    sample_x, sample_y = next(iter(dataloader))
+    assert sample_x.dtype == torch.float32
+    assert sample_y.dtype == torch.int64
+    sequence = torch.arange(bs, dtype=torch.float32).reshape(-1, 1)
+    if shuffle:
+        with pytest.raises(AssertionError):
+            torch.testing.assert_close(sample_x, sequence)
+    else:
+        torch.testing.assert_close(sample_x, sequence)
+
+def test_view_to_holder_empty():
+    X = np.zeros((0, 1))
+    y = np.array([])
+    bs = 128
+    shuffle = True
+    assert _create_holder(X, y, bs, shuffle) is None
+
 CLASS_NUM = 4
 ERROR_NUM = 3
 SAMPLE_NUM = CLASS_NUM
@@ -88,9 +129,8 @@ def dataloader(full_y, y):
     for idx, gt in enumerate(full_y):
         X[idx, gt] = 1
 
-    device = 'cpu'
     shuffle = False
-    return to_holder(X, y, device, BS, shuffle)
+    return _create_holder(X, y, BS, shuffle)
 
 @pytest.fixture
 def loss_avg():
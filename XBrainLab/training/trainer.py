@@ -1,8 +1,12 @@
 import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from enum import Enum
-from typing import List
+from typing import List, Optional, Tuple
 
 from ..utils import validate_list_type
+from .parallel import TrainingPool
+from .saliency import get_saliency_workers
 from .training_plan import TrainingPlanHolder
 
 
@@ -12,6 +16,7 @@ class Status(Enum):
     INIT = 'Initializing'
     INTING = 'Interrupting'
     TRAIN = 'Now training: {}'
+    SALIENCY = 'Computing saliency maps: {} / {}'
 
 class Trainer:
     """Class for storing training options and training models
@@ -24,7 +29,21 @@ class Trainer:
         training_plan_holders: List[:class:`TrainingPlanHolder`]
             List of training plan holders
         job_thread: :class:`threading.Thread`
-            Thread for training in background
+            Thread for training or recomputing saliency maps in background
+        num_workers: int
+            Number of worker processes, train sequentially if less than 2
+        num_threads: int | None
+            Number of torch threads of each worker process,
+            evenly divided from the cpu count if None
+        split_repeat: bool
+            Whether to distribute each repeat of a plan to workers individually
+        ensemble: bool
+            Whether to train the repeats of a plan as a vectorized ensemble
+        saliency_workers: int
+            Number of background threads precomputing saliency maps
+            once training is finished, computed on first access if 0
+        saliency_futures: List[:class:`concurrent.futures.Future`]
+            Futures of the saliency maps being precomputed
     """
     def __init__(self, training_plan_holders: List[TrainingPlanHolder]):
         validate_list_type(
@@ -34,6 +53,12 @@ class Trainer:
         self.progress_text = Status.PENDING
         self.training_plan_holders = training_plan_holders
         self.job_thread = None
+        self.num_workers = 0
+        self.num_threads = None
+        self.split_repeat = False
+        self.ensemble = False
+        self.saliency_workers = 0
+        self.saliency_futures = []
 
     def get_training_plan_holders(self) -> List[TrainingPlanHolder]:
         """Return list of training plan holders"""
@@ -74,24 +99,102 @@ class Trainer:
 
     def job(self) -> None:
         """Training job running in background"""
+        if self.num_workers > 1:
+            self.parallel_job()
+            return
         for plan_holder in self.training_plan_holders:
             self.progress_text = Status.TRAIN.value.format(plan_holder.get_name())
             if self.interrupt:
                 break
-            plan_holder.train()
+            plan_holder.train(ensemble=self.ensemble)
+        self.precompute_saliency()
+        self.progress_text = Status.PENDING
+        self.job_thread = None
+
+    def get_job_list(self) -> List[Tuple[int, Optional[int]]]:
+        """Return list of (plan index, repeat index) to be trained in parallel
+
+        Repeat index is None if the whole plan is trained by a single worker
+        """
+        job_list = []
+        for plan_idx, plan_holder in enumerate(self.training_plan_holders):
+            if plan_holder.is_finished():
+                continue
+            if not self.split_repeat:
+                job_list.append((plan_idx, None))
+                continue
+            for repeat, train_record in enumerate(plan_holder.get_plans()):
+                if not train_record.is_finished():
+                    job_list.append((plan_idx, repeat))
+        return job_list
+
+    def parallel_job(self) -> None:
+        """Training job distributing plans to worker processes"""
+        def on_progress(running_plans: List[str]) -> None:
+            self.progress_text = Status.TRAIN.value.format(', '.join(running_plans))
+
+        pool = TrainingPool(
+            self.training_plan_holders, self.num_workers, self.num_threads,
+            ensemble=self.ensemble
+        )
+        pool.run(self.get_job_list(), lambda: self.interrupt, on_progress)
+        self.precompute_saliency()
         self.progress_text = Status.PENDING
         self.job_thread = None
 
-    def run(self, interact: bool = False) -> None:
+    def precompute_saliency(self) -> None:
+        """Compute saliency maps of evaluated repeats in a background thread pool
+
+        Skipped if :attr:`saliency_workers` is 0 or training is interrupted
+        """
+        if self.saliency_workers < 1 or self.interrupt:
+            return
+        executor = ThreadPoolExecutor(self.saliency_workers)
+        for plan_holder in self.training_plan_holders:
+            self.saliency_futures += plan_holder.precompute_saliency(executor)
+        executor.shutdown(wait=False)
+
+    def get_saliency_futures(self) -> List[Future]:
+        """Return futures of the saliency maps being precomputed"""
+        return self.saliency_futures
+
+    def run(
+        self,
+        interact: bool = False,
+        num_workers: int = 0,
+        num_threads: Optional[int] = None,
+        split_repeat: bool = False,
+        ensemble: bool = False,
+        saliency_workers: int = 0
+    ) -> None:
         """Run training job
 
         Parameters:
             interact: bool
                 Whether to run training in background
+            num_workers: int
+                Number of worker processes for training plans in parallel.
+                Train sequentially in current process if less than 2
+            num_threads: int | None
+                Number of torch threads of each worker process.
+                Evenly divided from the cpu count if None
+            split_repeat: bool
+                Whether to distribute each repeat of a plan to workers individually
+            ensemble: bool
+                Whether to train the repeats of a plan as a vectorized ensemble
+            saliency_workers: int
+                Number of background threads precomputing saliency maps
+                once training is finished. Saliency maps are computed
+                on first access if 0
         """
         if self.is_running():
             return
 
+        self.num_workers = num_workers
+        self.num_threads = num_threads
+        self.split_repeat = split_repeat
+        self.ensemble = ensemble
+        self.saliency_workers = saliency_workers
         self.clear_interrupt()
         if interact:
             self.job_thread = threading.Thread(target=self.job)
@@ -99,6 +202,70 @@ class Trainer:
         else:
             self.job()
 
+    def set_saliency_params(
+        self,
+        saliency_params: dict,
+        interact: bool = False,
+        num_workers: Optional[int] = None
+    ) -> None:
+        """Set saliency parameters of all training plans
+
+        Outdated saliency maps are recomputed, with repeats of all plans
+        recomputed concurrently. Each repeat iterates its own views of the
+        dataset and draws noise from its own seeded generator, so the maps
+        do not depend on the order of the recomputation. Progress is reported
+        by :meth:`get_progress_text`.
+
+        Parameters:
+            saliency_params: dict
+                Parameters of each noise tunnel saliency method
+            interact: bool
+                Whether to recompute in background
+            num_workers: int | None
+                Number of threads recomputing repeats concurrently.
+                Bounded by the cpu count divided by the torch threads if None
+
+        Raises:
+            RuntimeError: If training is still in progress
+        """
+        if self.is_running():
+            raise RuntimeError("Training still in progress")
+        if interact:
+            self.job_thread = threading.Thread(
+                target=self.saliency_job, args=(saliency_params, num_workers)
+            )
+            self.job_thread.start()
+        else:
+            self.saliency_job(saliency_params, num_workers)
+
+    def saliency_job(
+        self, saliency_params: dict, num_workers: Optional[int] = None
+    ) -> None:
+        """Job recomputing outdated saliency maps with new parameters"""
+        num_jobs = sum(
+            len(plan_holder.get_plans())
+            for plan_holder in self.training_plan_holders
+        )
+        executor = ThreadPoolExecutor(
+            num_workers or get_saliency_workers(num_jobs)
+        )
+        futures = []
+        for plan_holder in self.training_plan_holders:
+            futures += plan_holder.set_saliency_params(saliency_params, executor)
+        executor.shutdown(wait=False)
+        pending = set(futures)
+        while pending:
+            self.progress_text = Status.SALIENCY.value.format(
+                len(futures) - len(pending), len(futures)
+            )
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error:
+                    traceback.print_exception(type(error), error, error.__traceback__)
+        self.progress_text = Status.PENDING
+        self.job_thread = None
+
     def get_progress_text(self) -> str:
         """Return string representation of training progress"""
         if isinstance(self.progress_text, Status):
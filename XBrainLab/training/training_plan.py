@@ -2,20 +2,30 @@ from __future__ import annotations
 
 import time
 import traceback
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from enum import Enum
+from functools import partial
 
 import numpy as np
 import torch
 import torch.utils.data as Data
-from captum.attr import Saliency, NoiseTunnel
-from sklearn.metrics import roc_auc_score
 
-from ..dataset import Dataset
+from ..dataset import Dataset, EpochsView
+from ..utils import set_seed, validate_type, zip_strict
 from ..visualization import supported_saliency_methods
-from ..utils import set_seed, validate_type
+from .ensemble import ModelEnsemble
 from .model_holder import ModelHolder
 from .option import TRAINING_EVALUATION, TrainingOption
-from .record import EvalRecord, RecordKey, TrainRecord, TrainRecordKey
+from .parallel import TrainingPool
+from .saliency import compute_saliency, get_saliency_workers
+from .record import (
+    EvalRecord,
+    MetricAccumulator,
+    RecordKey,
+    SaliencyStorage,
+    TrainRecord,
+    TrainRecordKey,
+)
 
 
 def _test_model(
@@ -35,129 +45,42 @@ def _test_model(
     """
     model.eval()
 
-    running_loss = 0.0
-    total_count = 0
-    auc = 0
-    correct = 0
-    y_true, y_pred = None, None
+    metric = MetricAccumulator.from_loader(dataLoader)
     with torch.no_grad():
         for inputs, labels in dataLoader:
             outputs = model(inputs)
             loss = criterion(outputs, labels)
-            running_loss += loss.item()
+            metric.update(outputs, labels, loss)
+    return metric.compute()
 
-            correct += (outputs.argmax(axis=1) == labels).float().sum().item()
-            total_count += len(labels)
-
-            if y_true is None or y_pred is None:
-                y_true = labels
-                y_pred = outputs
-            else:
-                y_true = torch.cat((y_true, labels))
-                y_pred = torch.cat((y_pred, outputs))
-
-        try:
-            if y_pred.size()[-1] <=2:
-                auc = roc_auc_score(y_true.clone().detach().cpu().numpy(),
-                torch.nn.functional.softmax(
-                    y_pred, dim=1
-                ).clone().detach().cpu().numpy()[:, 1])
-            else:
-                auc = roc_auc_score(y_true.clone().detach().cpu().numpy(),
-                torch.nn.functional.softmax(
-                    y_pred, dim=1
-                ).clone().detach().cpu().numpy(), multi_class='ovr')
-        except Exception:
-            pass
-
-    running_loss /= len(dataLoader)
-    acc = correct / total_count * 100
-    return {
-        RecordKey.ACC: acc,
-        RecordKey.AUC: auc,
-        RecordKey.LOSS: running_loss
-    }
-
-def _eval_model(model: torch.nn.Module, dataLoader: Data.DataLoader, saliency_params:dict) -> EvalRecord:
+def _eval_model(
+    model: torch.nn.Module,
+    dataLoader: Data.DataLoader,
+    saliency_params: dict | None = None
+) -> EvalRecord:
     """Evaluate model on given data loader
 
-    Evaluate model and compute saliency map for each class
+    Only labels and outputs are recorded. Saliency maps are computed
+    on first access, see :meth:`TrainingPlanHolder.attach_saliency_source`.
 
     Args:
         model: Model to be evaluated
         dataLoader: Data loader
+        saliency_params: Parameters of each noise tunnel saliency method
     """
     model.eval()
 
     output_list = []
     label_list = []
+    with torch.no_grad():
+        for inputs, labels in dataLoader:
+            output_list.append(model(inputs).cpu().numpy())
+            label_list.append(labels.cpu().numpy())
 
-    gradient_list = []
-    gradient_input_list = []
-    smoothgrad_list = []
-    smoothgrad_sq_list = []
-    vargrad_list = []
-
-    saliency_inst = Saliency(model)
-    noise_tunnel_inst = NoiseTunnel(saliency_inst)
-
-    for inputs, labels in dataLoader:
-        outputs = model(inputs)
-
-        output_list.append(outputs.detach().cpu().numpy())
-        label_list.append(labels.detach().cpu().numpy())
-
-        inputs.requires_grad=True
-        batch_gradient = saliency_inst.attribute(inputs, target=label_list[-1].tolist(), abs=False).detach().cpu().numpy()
-        
-        gradient_list.append(batch_gradient)
-        gradient_input_list.append(np.multiply(inputs.detach().cpu().numpy(), batch_gradient))
-        smoothgrad_list.append(
-            noise_tunnel_inst.attribute(
-                inputs, target=label_list[-1].tolist(), nt_type='smoothgrad', **saliency_params['SmoothGrad']
-            ).detach().cpu().numpy()
-        )
-        smoothgrad_sq_list.append(
-            noise_tunnel_inst.attribute(
-                inputs, target=label_list[-1].tolist(), nt_type='smoothgrad_sq', **saliency_params['SmoothGrad_Squared']
-            ).detach().cpu().numpy()
-        )
-        vargrad_list.append(
-            noise_tunnel_inst.attribute(
-                inputs, target=label_list[-1].tolist(), nt_type='vargrad', **saliency_params['VarGrad']
-            ).detach().cpu().numpy()
-        )
-
-    label_list = np.concatenate(label_list)
-    output_list = np.concatenate(output_list)
-
-    gradient_list = np.concatenate(gradient_list)
-    gradient_input_list = np.concatenate(gradient_input_list)
-    smoothgrad_list = np.concatenate(smoothgrad_list)
-    smoothgrad_sq_list = np.concatenate(smoothgrad_sq_list)
-    vargrad_list = np.concatenate(vargrad_list)
-        
-    gradient_list = {
-        i: gradient_list[np.where(label_list==i)]
-        for i in range(output_list.shape[-1])
-    }
-    gradient_input_list = {
-        i: gradient_input_list[np.where(label_list==i)]
-        for i in range(output_list.shape[-1])
-    }
-    smoothgrad_list = {
-        i: smoothgrad_list[np.where(label_list==i)]
-        for i in range(output_list.shape[-1])
-    }
-    smoothgrad_sq_list = {        
-        i: smoothgrad_sq_list[np.where(label_list==i)]
-        for i in range(output_list.shape[-1])
-    }
-    vargrad_list = {
-        i: vargrad_list[np.where(label_list==i)]
-        for i in range(output_list.shape[-1])
-    }
-    return EvalRecord(label_list, output_list, gradient_list, gradient_input_list, smoothgrad_list, smoothgrad_sq_list, vargrad_list)
+    return EvalRecord(
+        np.concatenate(label_list), np.concatenate(output_list),
+        saliency_params=saliency_params
+    )
 
 def to_holder(
     X: np.ndarray,
@@ -189,6 +112,30 @@ def to_holder(
     )
     return dataloader
 
+def view_to_holder(
+    view: EpochsView,
+    bs: int,
+    shuffle: bool = False
+) -> Data.DataLoader | None:
+    """Convert epochs view to torch data holder
+
+    Batches are gathered by the view as a whole, instead of trial by trial
+
+    Args:
+        view: Torch dataset view of epochs
+        bs: Batch size
+        shuffle: Whether to shuffle the data
+    """
+    if len(view) == 0:
+        return None
+    sampler = Data.RandomSampler(view) if shuffle else Data.SequentialSampler(view)
+    dataloader = Data.DataLoader(
+        view,
+        sampler=Data.BatchSampler(sampler, batch_size=bs, drop_last=False),
+        batch_size=None
+    )
+    return dataloader
+
 class Status(Enum):
     """Utility class for training status"""
     DONE = 'Finished'
@@ -219,6 +166,12 @@ class TrainingPlanHolder:
             Error message
         status: str
             Training status
+        saliency_futures: list[:class:`concurrent.futures.Future`]
+            Futures of recomputing saliency maps of each repeat
+            after the saliency parameters are changed
+        saliency_storage: :class:`SaliencyStorage`
+            Storage mode of per-trial saliency maps of the evaluation records.
+            Maps are spilled to the evaluation store of each repeat in DISK mode
     """
     def __init__(
         self,
@@ -226,10 +179,12 @@ class TrainingPlanHolder:
         dataset: Dataset,
         option: TrainingOption, 
         saliency_params: dict,
+        saliency_storage: SaliencyStorage = SaliencyStorage.FULL,
     ):
         self.model_holder = model_holder
         self.dataset = dataset
         self.saliency_params = saliency_params
+        self.saliency_storage = saliency_storage
         self.option = option
         self.check_data()
 
@@ -237,6 +192,7 @@ class TrainingPlanHolder:
         self.interrupt = False
         self.error = None
         self.status = Status.PENDING.value
+        self.saliency_futures = []
         for i in range(self.option.repeat_num):
             seed = set_seed(seed=None)
             model = self.model_holder.get_model(
@@ -272,10 +228,34 @@ class TrainingPlanHolder:
         self.option.validate()
 
     # interact
-    def train(self) -> None:
-        """Train the model"""
+    def train(
+        self,
+        repeat_list: list[int] | None = None,
+        num_workers: int = 0,
+        num_threads: int | None = None,
+        ensemble: bool = False
+    ) -> None:
+        """Train the model
+
+        Args:
+            repeat_list: Index of repeats to be trained. Train all repeats if None
+            num_workers: Number of worker processes for training repeats
+                         concurrently. Train sequentially if less than 2
+            num_threads: Number of torch threads of each worker process.
+                         Evenly divided from the cpu count if None
+            ensemble: Whether to train the repeats together
+                      as a vectorized ensemble of models
+        """
+        if repeat_list is None:
+            repeat_list = range(self.option.repeat_num)
+        if ensemble:
+            self.train_ensemble(repeat_list)
+            return
+        if num_workers > 1:
+            self.train_concurrently(repeat_list, num_workers, num_threads)
+            return
         try:
-            for i in range(self.option.repeat_num):
+            for i in repeat_list:
                 self.status = Status.INIT.value.format(
                     self.train_record_list[i].get_name()
                 )
@@ -283,22 +263,139 @@ class TrainingPlanHolder:
                 train_record.resume()
                 self.train_one_repeat(train_record)
                 train_record.pause()
-            if self.is_finished():
-                self.status = Status.DONE.value
-            else:
-                self.status = Status.PENDING.value
+            self.reset_status()
         except Exception as e:
             traceback.print_exc()
             self.error = str(e)
             self.status = Status.PENDING.value
 
+    def train_concurrently(
+        self,
+        repeat_list: list[int],
+        num_workers: int,
+        num_threads: int | None = None
+    ) -> None:
+        """Train repeats concurrently with a pool of worker processes
+
+        Each repeat restores its own random state in the worker,
+        so the result is identical to sequential training
+        with the same number of torch threads.
+
+        Args:
+            repeat_list: Index of repeats to be trained
+            num_workers: Number of worker processes
+            num_threads: Number of torch threads of each worker process
+        """
+        job_list = [
+            (0, i) for i in repeat_list
+            if not self.train_record_list[i].is_finished()
+        ]
+        pool = TrainingPool([self], num_workers, num_threads)
+        pool.run(job_list, lambda: self.interrupt)
+
+    def train_ensemble(self, repeat_list: list[int]) -> None:
+        """Train repeats together as a vectorized ensemble of models
+
+        All repeats share the same mini-batches, and are trained in one
+        vectorized forward and backward pass per mini-batch. Data shuffling and
+        dropout are drawn from the random state of the first repeat, so the result
+        differs from sequential training. Only the first repeat saves the advanced
+        random state, the other repeats keep their own states, which are resumed
+        if they are trained separately later.
+        Repeats at different epochs cannot be stacked and are trained sequentially.
+
+        Args:
+            repeat_list: Index of repeats to be trained
+        """
+        train_record_list = [
+            self.train_record_list[i] for i in repeat_list
+            if not self.train_record_list[i].is_finished()
+        ]
+        if len({train_record.get_epoch() for train_record in train_record_list}) > 1:
+            self.train(repeat_list)
+            return
+        if not train_record_list:
+            self.reset_status()
+            return
+        name = ', '.join(train_record.get_name() for train_record in train_record_list)
+        try:
+            self.status = Status.INIT.value.format(name)
+            train_record_list[0].resume()
+            self.train_one_ensemble(train_record_list)
+            train_record_list[0].pause()
+            self.reset_status()
+        except Exception as e:
+            traceback.print_exc()
+            self.error = str(e)
+            self.status = Status.PENDING.value
+
+    def train_one_ensemble(self, train_record_list: list[TrainRecord]) -> None:
+        """Train the stacked repeats of the training plan
+
+        Args:
+            train_record_list: Training records at the same epoch
+        """
+        device = self.option.get_device()
+        ensemble = ModelEnsemble([
+            train_record.get_training_model(device=device)
+            for train_record in train_record_list
+        ])
+        optimizer = self.option.get_optim(ensemble)
+        optimizer_list = [train_record.optim for train_record in train_record_list]
+        ensemble.stack_optimizer_state(optimizer, optimizer_list)
+        criterion = train_record_list[0].criterion
+        trainLoader, valLoader, testLoader = self.get_loader()
+        if self.option.epoch > 0 and not trainLoader:
+            raise ValueError('No Training Data')
+        name = ', '.join(train_record.get_name() for train_record in train_record_list)
+        self.status = Status.TRAIN.value.format(name)
+        while train_record_list[0].get_epoch() < self.option.epoch:
+            if self.interrupt:
+                break
+            self.train_one_epoch_ensemble(
+                ensemble, trainLoader, valLoader, testLoader,
+                optimizer, criterion, train_record_list
+            )
+        ensemble.unstack_optimizer_state(optimizer, optimizer_list)
+
+        for train_record in train_record_list:
+            if train_record.get_epoch() == self.option.epoch:
+                self.status = Status.EVAL.value.format(train_record.get_name())
+                target, target_loader = self.get_eval_pair(
+                    train_record, valLoader, testLoader
+                )
+                if target and target_loader:
+                    eval_record = _eval_model(
+                        target, target_loader, self.saliency_params
+                    )
+                    train_record.set_eval_record(eval_record)
+                    self.attach_saliency_source(train_record)
+            train_record.export_checkpoint()
+
+    def reset_status(self) -> None:
+        """Reset the status after training is stopped or finished
+
+        Cached tensors of the dataset are released once the plan is finished
+        """
+        if self.is_finished():
+            self.status = Status.DONE.value
+            self.dataset.clear_tensor_cache()
+        else:
+            self.status = Status.PENDING.value
+
     def get_loader(self) -> tuple[Data.DataLoader, Data.DataLoader, Data.DataLoader]:
-        """Return the data loader for training, validation and testing"""
+        """Return the data loader for training, validation and testing
+
+        Loaders are backed by views over the shared epoch data, which are
+        cached in the dataset and shared across repeats until the plan is finished
+        """
         bs = self.option.bs
         dev = self.option.get_device()
-        trainHolder = to_holder(*self.dataset.get_training_data(), dev, bs, True)
-        valHolder = to_holder(*self.dataset.get_val_data(), dev, bs)
-        testHolder = to_holder(*self.dataset.get_test_data(), dev, bs)
+        trainHolder = view_to_holder(
+            self.dataset.get_epochs_view('train', dev), bs, True
+        )
+        valHolder = view_to_holder(self.dataset.get_epochs_view('val', dev), bs)
+        testHolder = view_to_holder(self.dataset.get_epochs_view('test', dev), bs)
         return trainHolder, valHolder, testHolder
 
     def get_eval_pair(
@@ -340,6 +437,81 @@ class TrainingPlanHolder:
             target_model = target_model.eval()
         return target_model, target_loader
 
+    def compute_eval_saliency(
+        self,
+        train_record: TrainRecord,
+        methods: list[str],
+        saliency_params: dict
+    ) -> dict[str, dict[int, np.ndarray]]:
+        """Compute saliency maps of the evaluated model of a finished repeat
+
+        The evaluated model is restored from the saved best-model state.
+        Repeats may be computed concurrently, so each computation iterates
+        its own views of the dataset instead of the cached ones, and draws
+        the noise from a generator seeded with the seed of the repeat,
+        which also makes the maps reproducible
+
+        Args:
+            train_record: Training record of the repeat
+            methods: Saliency methods to be computed
+            saliency_params: Parameters of each noise tunnel saliency method
+        """
+        bs = self.option.bs
+        dev = self.option.get_device()
+        valLoader = view_to_holder(
+            self.dataset.get_epochs_view('val', dev, cached=False), bs
+        )
+        testLoader = view_to_holder(
+            self.dataset.get_epochs_view('test', dev, cached=False), bs
+        )
+        target, target_loader = self.get_eval_pair(
+            train_record, valLoader, testLoader
+        )
+        if not target or not target_loader:
+            raise ValueError(f'{train_record.get_name()} is not evaluated')
+        return compute_saliency(
+            target, target_loader, saliency_params, methods, seed=train_record.seed
+        )
+
+    def attach_saliency_source(self, train_record: TrainRecord) -> None:
+        """Compute saliency maps of the evaluation record on first access
+
+        Called once the evaluation record of a repeat is set, including
+        records transferred from worker processes, whose source is not pickled.
+        The maps are kept in the storage mode of the plan
+
+        Args:
+            train_record: Training record of the repeat
+        """
+        eval_record = train_record.get_eval_record()
+        if eval_record:
+            eval_record.set_saliency_source(
+                partial(self.compute_eval_saliency, train_record)
+            )
+            self.apply_saliency_storage(train_record)
+
+    def apply_saliency_storage(self, train_record: TrainRecord) -> None:
+        """Apply the saliency storage mode to the evaluation record of a repeat"""
+        train_record.get_eval_record().set_saliency_storage(self.saliency_storage)
+
+    def precompute_saliency(
+        self, executor: Executor, methods: list[str] | None = None
+    ) -> list[Future]:
+        """Compute saliency maps of all evaluated repeats in background
+
+        Args:
+            executor: Pool running the computation
+            methods: Saliency methods to be computed. All methods if None
+
+        Returns:
+            Futures of the submitted computation, one for each evaluated repeat
+        """
+        return [
+            executor.submit(train_record.get_eval_record().compute_saliency, methods)
+            for train_record in self.train_record_list
+            if train_record.get_eval_record()
+        ]
+
     def train_one_repeat(self, train_record: TrainRecord) -> None:
         """Train one repetition of the training plan
 
@@ -373,6 +545,7 @@ class TrainingPlanHolder:
             if target and target_loader:
                 eval_record = _eval_model(target, target_loader, self.saliency_params)
                 train_record.set_eval_record(eval_record)
+                self.attach_saliency_source(train_record)
 
         train_record.export_checkpoint()
 
@@ -386,12 +559,8 @@ class TrainingPlanHolder:
                         train_record: TrainRecord) -> None:
         """Train one epoch of the training plan"""
         start_time = time.time()
-        running_loss = 0.0
         model.train()
-        correct = 0
-        total_count = 0
-        train_auc = 0
-        y_true, y_pred = None, None
+        metric = MetricAccumulator.from_loader(trainLoader)
         # train one mini batch
         for inputs, labels in trainLoader:
             if self.interrupt:
@@ -401,41 +570,11 @@ class TrainingPlanHolder:
             loss = criterion(outputs, labels)
             loss.backward()
             optimizer.step()
+            metric.update(outputs, labels, loss)
 
-            correct += (outputs.argmax(axis=1) == labels).float().sum().item()
-            if y_true is None or y_pred is None:
-                y_true = labels
-                y_pred = outputs
-            else:
-                y_true = torch.cat((y_true, labels))
-                y_pred = torch.cat((y_pred, outputs))
-            total_count += len(labels)
-            running_loss += loss.item()
-
-        try:
-            if y_pred.size()[-1] <=2:
-                train_auc = roc_auc_score(y_true.clone().detach().cpu().numpy(),
-                torch.nn.functional.softmax(
-                    y_pred, dim=1
-                ).clone().detach().cpu().numpy()[:, 1])
-            else:
-                train_auc = roc_auc_score(y_true.clone().detach().cpu().numpy(),
-                torch.nn.functional.softmax(
-                    y_pred, dim=1
-                ).clone().detach().cpu().numpy(), multi_class='ovr')
-        except Exception:
-            # first few epochs in binary classification
-            # might not be able to compute score
-            pass
-
-
-        running_loss /= len(trainLoader)
-        train_acc = correct / total_count * 100
-        train_record.update_train({
-            RecordKey.LOSS: running_loss,
-            RecordKey.ACC: train_acc,
-            RecordKey.AUC: train_auc
-        })
+        # first few epochs in binary classification
+        # might not be able to compute auc score
+        train_record.update_train(metric.compute())
 
         if valLoader:
             test_result = _test_model(model, valLoader, criterion)
@@ -458,6 +597,61 @@ class TrainingPlanHolder:
         ):
             train_record.export_checkpoint()
 
+    def train_one_epoch_ensemble(
+        self,
+        ensemble: ModelEnsemble,
+        trainLoader: Data.DataLoader,
+        valLoader: Data.DataLoader,
+        testLoader: Data.DataLoader,
+        optimizer: torch.optim.Optimizer,
+        criterion: torch.nn.Module,
+        train_record_list: list[TrainRecord]
+    ) -> None:
+        """Train one epoch of the stacked repeats of the training plan
+
+        Weights are copied back to the model of each training record
+        after the epoch, so that evaluation and best model selection
+        are done for each repeat individually.
+        """
+        start_time = time.time()
+        ensemble.train()
+        metric_list = [
+            MetricAccumulator.from_loader(trainLoader) for _ in range(len(ensemble))
+        ]
+        # train one mini batch
+        for inputs, labels in trainLoader:
+            if self.interrupt:
+                ensemble.unstack()
+                return
+            optimizer.zero_grad()
+            outputs = ensemble(inputs)
+            loss = torch.stack([criterion(output, labels) for output in outputs])
+            loss.sum().backward()
+            optimizer.step()
+            for metric, output, model_loss in zip_strict(metric_list, outputs, loss):
+                metric.update(output, labels, model_loss)
+        ensemble.unstack()
+        trainingTime = time.time() - start_time
+
+        for train_record, metric in zip_strict(train_record_list, metric_list):
+            train_record.update_train(metric.compute())
+            if valLoader:
+                test_result = _test_model(train_record.model, valLoader, criterion)
+                train_record.update_eval(test_result)
+            if testLoader:
+                test_result = _test_model(train_record.model, testLoader, criterion)
+                train_record.update_test(test_result)
+            train_record.update_statistic({
+                TrainRecordKey.LR: optimizer.param_groups[0]['lr'],
+                TrainRecordKey.TIME: trainingTime
+            })
+            train_record.step()
+            if (
+                self.option.checkpoint_epoch and
+                train_record.get_epoch() % self.option.checkpoint_epoch == 0
+            ):
+                train_record.export_checkpoint()
+
     def set_interrupt(self) -> None:
         """Set the training plan to be interrupted"""
         self.interrupt = True
@@ -485,18 +679,59 @@ class TrainingPlanHolder:
         return self.saliency_params
     
     # setter
-    def set_saliency_params(self, saliency_params)-> None:
-        """Set the saliency computation parameters"""
+    def set_saliency_params(
+        self, saliency_params: dict, executor: Executor | None = None
+    ) -> list[Future]:
+        """Set the saliency computation parameters
+
+        Only the computed saliency maps of methods whose parameters changed
+        are recomputed, other maps are kept or computed on first access.
+        Repeats are recomputed concurrently on the executor. If no executor is
+        given, a thread pool bounded by :func:`get_saliency_workers` is used
+        and waited for before returning.
+
+        Args:
+            saliency_params: Parameters of each noise tunnel saliency method
+            executor: Pool running the recomputation
+
+        Returns:
+            Futures of the recomputation, one for each repeat with outdated maps
+        """
         self.saliency_params = saliency_params
-        for i in range(self.option.repeat_num):
-            train_record = self.train_record_list[i]
-            trainLoader, valLoader, testLoader = self.get_loader()
-            target, target_loader = self.get_eval_pair(
-                train_record, valLoader, testLoader
-            )
-            if target is not None: # model is trained
-                eval_record = _eval_model(target, target_loader, self.saliency_params)
-                self.train_record_list[i].set_eval_record(eval_record)
+        jobs = []
+        for train_record in self.train_record_list:
+            eval_record = train_record.get_eval_record()
+            if eval_record:
+                outdated = eval_record.set_saliency_params(saliency_params)
+                if outdated:
+                    jobs.append((eval_record, outdated))
+
+        def submit(executor: Executor) -> list[Future]:
+            return [
+                executor.submit(eval_record.compute_saliency, methods)
+                for eval_record, methods in jobs
+            ]
+
+        if executor is None:
+            with ThreadPoolExecutor(get_saliency_workers(len(jobs))) as pool:
+                self.saliency_futures = submit(pool)
+        else:
+            self.saliency_futures = submit(executor)
+        return self.saliency_futures
+
+    def set_saliency_storage(self, saliency_storage: SaliencyStorage) -> None:
+        """Set the storage mode of saliency maps, converting the computed maps"""
+        self.saliency_storage = saliency_storage
+        for train_record in self.train_record_list:
+            if train_record.get_eval_record():
+                self.apply_saliency_storage(train_record)
+
+    def get_saliency_progress(self) -> tuple[int, int]:
+        """Return the number of repeats recomputed and the total to be recomputed"""
+        return (
+            sum(future.done() for future in self.saliency_futures),
+            len(self.saliency_futures)
+        )
 
     # status
     def get_training_status(self) -> str:
@@ -543,8 +778,13 @@ class TrainingPlanHolder:
         return lr, train_loss, train_acc, train_auc, val_loss, val_acc, val_auc
 
     def is_finished(self) -> bool:
-        """Return whether the training plan is finished"""
-        return self.train_record_list[-1].is_finished()
+        """Return whether all repeats of the training plan are finished
+
+        Repeats may be finished out of order when trained concurrently
+        """
+        return all(
+            train_record.is_finished() for train_record in self.train_record_list
+        )
 
     def get_epoch_progress_text(self) -> str:
         """Return the progress text of the training plan"""
@@ -336,12 +336,17 @@ class DashBoard(tk.Tk):
     
     def set_saliency(self):
         if self.study.trainer:
+            if self.study.trainer.is_running():
+                raise ValidateException(
+                    window=self, message='Training is in progress'
+                )
             if self.study.trainer.get_training_plan_holders()[0].get_plans()[0].is_finished() or self.study.get_saliency_params() is not None:
                 if not tk.messagebox.askokcancel(
                     parent=self, title='Warning',
                     message=(
                         'The saliency maps are already computed,\n'
-                        'all saliency maps will be recomputed if you reset this step.\n'
+                        'saliency maps of the changed methods will be recomputed\n'
+                        'if you reset this step.\n'
                         'Do you want to proceed?'
                     )
                 ):
@@ -349,7 +354,7 @@ class DashBoard(tk.Tk):
         set_saliency_module = SetSaliencyWindow(self, self.study.get_saliency_params())
         saliency_param_confirm, saliency_params = set_saliency_module.get_result()
         if saliency_param_confirm:
-            self.study.set_saliency_params(saliency_params)
+            self.study.set_saliency_params(saliency_params, interact=True)
             self.script_history += set_saliency_module.get_script_history()
             self.script_history.add_cmd("study.set_saliency_params(saliency_params)")
             self.update_dashboard()
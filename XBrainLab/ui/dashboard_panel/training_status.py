@@ -38,6 +38,10 @@ class TrainingStatusPanel(PanelBase):
         plan_holders = trainer.get_training_plan_holders()
         for plan_holder in plan_holders:
             dataset = plan_holder.get_dataset()
+            progress = plan_holder.get_epoch_progress_text()
+            done, total = plan_holder.get_saliency_progress()
+            if done < total:
+                progress = f'Saliency {done} / {total}'
             self.tree.insert(
                 "", 'end',
                 values=[
@@ -45,6 +49,6 @@ class TrainingStatusPanel(PanelBase):
                     dataset.get_train_len(),
                     dataset.get_val_len(),
                     dataset.get_test_len(),
-                    plan_holder.get_epoch_progress_text()
+                    progress
                 ]
             )
@@ -1,8 +1,9 @@
+import functools
 import tkinter as tk
 from enum import Enum
 from tkinter import filedialog, ttk
 
-from XBrainLab.load_data import Raw, RawDataLoader
+from XBrainLab.load_data import ConcurrentFileReader, Raw, RawDataLoader
 
 from ...base import InitWindowValidateException, TopWindow, ValidateException
 from ...script import Script
@@ -134,6 +135,9 @@ class EditRaw(TopWindow): # called when double click on treeview
         return self.ret_script_history
 
 class LoadBase(TopWindow):
+    # whether the loader can read headers only and load data on demand
+    support_lazy = False
+
     def __init__(self, parent, title, lock_config_status=False):
         # ==== initialize ====
         super().__init__(parent, title)
@@ -141,6 +145,7 @@ class LoadBase(TopWindow):
         self.ret_script_history = None
         self.filetypes = ()
         self.lock_config_status = lock_config_status
+        self.reader = None
 
         self.columnconfigure([0], weight=2)
         self.columnconfigure([1], weight=1)
@@ -161,6 +166,11 @@ class LoadBase(TopWindow):
         )
         self.type_raw.grid(row=0, column=0, sticky="w")
         self.type_epoch.grid(row=0, column=1, sticky="w")
+        self.lazy_ctrl = tk.BooleanVar(self, value=self.support_lazy)
+        if self.support_lazy:
+            tk.Checkbutton(
+                type_frame, text="Load data on demand", variable=self.lazy_ctrl
+            ).grid(row=0, column=2, sticky="w")
 
         # ==== attr table ====  (self.data_attr_treeview)
         attr_frame = ttk.LabelFrame(self, text="Data attributes")
@@ -215,16 +225,32 @@ class LoadBase(TopWindow):
 
         # ==== functional buttons ====
         btn_frame = tk.Frame(self)
-        add_btn = tk.Button(btn_frame, text="Add", command=self.load)
-        confirm_btn = tk.Button(btn_frame, text="Confirm", command=self.confirm)
-        add_btn.pack(side=tk.LEFT)
-        confirm_btn.pack(side=tk.LEFT)
+        self.add_btn = tk.Button(btn_frame, text="Add", command=self.load)
+        self.confirm_btn = tk.Button(btn_frame, text="Confirm", command=self.confirm)
+        self.add_btn.pack(side=tk.LEFT)
+        self.confirm_btn.pack(side=tk.LEFT)
+
+        # ==== import progress ==== (shown while reading files)
+        self.progress_frame = tk.Frame(self)
+        self.progress_var = tk.DoubleVar(self)
+        self.progress_text_var = tk.StringVar(self)
+        ttk.Progressbar(
+            self.progress_frame, variable=self.progress_var, maximum=1, length=200
+        ).pack(side=tk.LEFT)
+        tk.Label(self.progress_frame, textvariable=self.progress_text_var).pack(
+            side=tk.LEFT, padx=5
+        )
+        tk.Button(self.progress_frame, text="Cancel", command=self.stop_load).pack(
+            side=tk.LEFT
+        )
 
         # ==== pack ====
         type_frame.grid(row=0, column=0, columnspan=2, sticky='w', padx=10, pady=10)
         attr_frame.grid(row=1, column=0, sticky='news')
         stat_frame.grid(row=1, column=1, sticky='ew', padx=10)
         btn_frame.grid(row=2, column=0,  columnspan=2)
+        self.progress_frame.grid(row=3, column=0, columnspan=2, pady=5)
+        self.progress_frame.grid_remove()
 
         self.stat_frame = stat_frame
         self.reset()
@@ -251,47 +277,106 @@ class LoadBase(TopWindow):
             return True
         return False
 
-    def _load(self): # for overriding
+    def _read(self, filepath, data_type, preload): # for overriding
+        # runs on worker threads, should not access the ui
+        # return (data, script commands of reading the file)
         raise NotImplementedError
 
+    def _load(self, filepath, data): # for overriding, runs on main thread
+        return data
+
+    def get_preload(self):
+        # only headers and events are read if not preloaded
+        return not (self.support_lazy and self.lazy_ctrl.get())
+
     def load(self):
+        if self.reader:
+            return
         selected_files = filedialog.askopenfilenames(
             parent = self,
             filetypes = self.filetypes
         )
-        for filepath in selected_files:
-            if self.data_loader.get_loaded_raw(filepath):
-                continue
-            self.script_history.newline()
-            self.script_history.add_cmd('filepath = ' + repr(filepath))
-            data = self._load(filepath)
-            if data is None:
-                raise ValidateException(self, f'Unable to load {filepath}.')
-            if data is False:
-                return
-            if not isinstance(data, Raw):
-                self.script_history.add_cmd('raw_data = Raw(filepath, data)')
-                raw_data = Raw(filepath, data)
-            else:
-                self.script_history.add_cmd('raw_data = data')
-                raw_data = data
-            try:
-                self.data_loader.check_loaded_data_consistency(raw_data)
-            except Exception as e:
-                raise ValidateException(window=self, message=str(e)) from e
-            if self.filename_template_var.get():
-                raw_data.parse_filename(regex=self.filename_template_var.get())
-                self.script_history.add_cmd(
-                    "raw_data.parse_filename("
-                    f"regex={self.filename_template_var.get()!r})"
-                )
+        filepaths = [
+            filepath for filepath in selected_files
+            if not self.data_loader.get_loaded_raw(filepath)
+        ]
+        if not filepaths:
+            return
+        # tk variables are read on main thread only
+        read_func = functools.partial(
+            self._read, data_type=self.type_ctrl.get(), preload=self.get_preload()
+        )
+        self.reader = ConcurrentFileReader(read_func, filepaths)
+        self.add_btn.config(state='disabled')
+        self.confirm_btn.config(state='disabled')
+        self.progress_frame.grid()
+        self.load_loop()
+
+    def load_loop(self):
+        # handle files read so far in the selected order
+        if not self.window_exist or not self.reader:
+            return
+        try:
+            for filepath, (data, commands) in self.reader.iter_ready():
+                if not self._add_data(filepath, data, commands):
+                    self.stop_load()
+                    return
+        except Exception:
+            self.stop_load()
+            raise
+        if self.reader.is_finished():
+            self.stop_load()
+            return
+        done, total = self.reader.get_progress()
+        self.progress_var.set(done / total)
+        self.progress_text_var.set(f'{done} / {total}')
+        self.update_panel()
+        self.after(100, self.load_loop)
 
-            self.data_attr_treeview.insert(
-                '', iid=filepath, index="end", values=raw_data.get_row_info()
+    def _add_data(self, filepath, data, commands):
+        self.script_history.newline()
+        self.script_history.add_cmd('filepath = ' + repr(filepath))
+        for command in commands:
+            self.script_history.add_cmd(command)
+        data = self._load(filepath, data)
+        if data is None:
+            raise ValidateException(self, f'Unable to load {filepath}.')
+        if data is False:
+            return False
+        if not isinstance(data, Raw):
+            self.script_history.add_cmd('raw_data = Raw(filepath, data)')
+            raw_data = Raw(filepath, data)
+        else:
+            self.script_history.add_cmd('raw_data = data')
+            raw_data = data
+        try:
+            self.data_loader.check_loaded_data_consistency(raw_data)
+        except Exception as e:
+            raise ValidateException(window=self, message=str(e)) from e
+        if self.filename_template_var.get():
+            raw_data.parse_filename(regex=self.filename_template_var.get())
+            self.script_history.add_cmd(
+                "raw_data.parse_filename("
+                f"regex={self.filename_template_var.get()!r})"
             )
-            self.data_loader.append(raw_data)
-            self.script_history.add_cmd("data_loader.append(raw_data)")
 
+        self.data_attr_treeview.insert(
+            '', iid=filepath, index="end", values=raw_data.get_row_info()
+        )
+        self.data_loader.append(raw_data)
+        self.script_history.add_cmd("data_loader.append(raw_data)")
+        return True
+
+    def stop_load(self):
+        # cancel files not yet handled, loaded files are kept
+        if self.reader:
+            self.reader.cancel()
+            self.reader = None
+        if not self.window_exist:
+            return
+        self.progress_frame.grid_remove()
+        self.add_btn.config(state='normal')
+        self.confirm_btn.config(state='normal')
         self.update_panel()
     #
     def check_data_type(self, data_type):
@@ -369,6 +454,12 @@ class LoadBase(TopWindow):
         self.ret_script_history = self.script_history
         self.destroy()
 
+    def destroy(self, force=False):
+        if self.reader:
+            self.reader.cancel()
+            self.reader = None
+        return super().destroy(force)
+
     def _get_result(self):
         return self.ret_val
 
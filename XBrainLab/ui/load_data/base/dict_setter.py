@@ -130,9 +130,10 @@ class DataDictInfoSetter(TopWindow):
         self._shape_view_update()
 
     def _shape_view_update(self, *args): # on spinbox change
-        data = self.loaded_mat[self.data_key_trace.get()]
-        self.data_shape_view.set(str(data.shape))
-        if len(data.shape) != len(self.OPTION):
+        # read shapes from header, without reading the data
+        data_shape = self.loaded_mat.get_shape(self.data_key_trace.get())
+        self.data_shape_view.set(str(data_shape))
+        if len(data_shape) != len(self.OPTION):
             self.nchan_trace.set(-1)
             self.time_trace.set(-1)
         else:
@@ -141,14 +142,14 @@ class DataDictInfoSetter(TopWindow):
             ]
             ch_idx = shape_idx.index(self.OPTION.CH)
             time_idx = shape_idx.index(self.OPTION.TIME)
-            self.nchan_trace.set(data.shape[ch_idx])
-            self.time_trace.set(data.shape[time_idx])
+            self.nchan_trace.set(data_shape[ch_idx])
+            self.time_trace.set(data_shape[time_idx])
 
         if self.event_key_trace.get() == 'None':
             self.event_shape_view.set('None')
         else:
             self.event_shape_view.set(
-                str(self.loaded_mat[self.event_key_trace.get()].shape)
+                str(self.loaded_mat.get_shape(self.event_key_trace.get()))
             )
 
     def _key_confirm(self):
@@ -163,8 +164,7 @@ class DataDictInfoSetter(TopWindow):
         event_key = self.event_key_trace.get()
         # check data
         ## check dim
-        data = self.loaded_mat[data_key]
-        if len(data.shape) != len(self.OPTION):
+        if len(self.loaded_mat.get_shape(data_key)) != len(self.OPTION):
             raise ValidateException(
                 self,
                 f"Invalid data dimension, should be ({self.shape_type_trace.get()})."
@@ -172,7 +172,6 @@ class DataDictInfoSetter(TopWindow):
         nchan = self.nchan_trace.get()
         ntimes = self.time_trace.get()
         # check event
-        event = None
         if event_key == 'None':
             event_key = None
             if self.type_ctrl == DataType.EPOCH.value:
@@ -181,9 +180,9 @@ class DataDictInfoSetter(TopWindow):
                     message='Loading epoched data without specifying event.\n Default event created.'
                 )
         else:
-            event = self.loaded_mat[event_key]
+            event_shape = self.loaded_mat.get_shape(event_key)
             ## check dim
-            if len(event.squeeze().shape) != 1:
+            if len([n for n in event_shape if n != 1]) != 1:
                 raise ValidateException(
                     self,
                     "Invalid label dimension, should be (epoch)."
@@ -5,14 +5,12 @@ from .base import LoadBase
 
 class LoadCnt(LoadBase):
     command_label = "Import CNT file (Neuroscan)"
+    support_lazy = True
 
     def __init__(self, parent):
         super().__init__(parent, "Load data from .cnt files", lock_config_status=True)
         self.filetypes = [('eeg files (.cnt)', '*.cnt'),]
 
-    def _load(self, filepath):
-        data = mne.io.read_raw_cnt(filepath, preload=True)
-        self.script_history.add_cmd(
-            "data = mne.io.read_raw_cnt(filepath, preload=True)"
-        )
-        return data
+    def _read(self, filepath, data_type, preload):
+        data = mne.io.read_raw_cnt(filepath, preload=preload)
+        return data, [f"data = mne.io.read_raw_cnt(filepath, preload={preload})"]
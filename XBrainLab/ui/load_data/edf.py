@@ -6,6 +6,8 @@ from .base import LoadBase
 
 class LoadEdf(LoadBase):
     command_label = "Import EDF/EDF+/GDF file (BIOSIG toolbox)"
+    support_lazy = True
+
     def __init__(self, parent):
         super().__init__(
             parent,
@@ -13,17 +15,13 @@ class LoadEdf(LoadBase):
         )
         self.filetypes = [('eeg files (.edf, .gdf)', '*.edf *.gdf')]
 
-    def _load(self, filepath):
+    def _read(self, filepath, data_type, preload):
         if '.edf' in filepath:
-            selected_data = mne.io.read_raw_edf(filepath, preload=True)
-            self.script_history.add_cmd(
-                "data = mne.io.read_raw_edf(filepath, preload=True)"
-            )
+            selected_data = mne.io.read_raw_edf(filepath, preload=preload)
+            command = f"data = mne.io.read_raw_edf(filepath, preload={preload})"
         elif '.gdf' in filepath:
-            selected_data = mne.io.read_raw_gdf(filepath, preload=True)
-            self.script_history.add_cmd(
-                "data = mne.io.read_raw_gdf(filepath, preload=True)"
-            )
+            selected_data = mne.io.read_raw_gdf(filepath, preload=preload)
+            command = f"data = mne.io.read_raw_gdf(filepath, preload={preload})"
         else:
             raise ValidateException(self, 'Only EDF/GDF files are supported')
-        return selected_data
+        return selected_data, [command]
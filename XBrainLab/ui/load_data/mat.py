@@ -1,4 +1,4 @@
-import scipy.io
+from XBrainLab.load_data import load_array_dict
 
 from .base import LoadDict
 
@@ -8,9 +8,14 @@ class LoadMat(LoadDict):
     def __init__(self, parent):
         super().__init__(parent, "Load data from .mat files")
         self.filetypes = [('eeg files(.mat)', '*.mat'),]
-        self.script_history.add_import("import scipy.io")
+        self.script_history.add_import(
+            "from XBrainLab.load_data import load_array_dict"
+        )
 
-    def _load(self, filepath):
-        selected_data = scipy.io.loadmat(filepath)
-        self.script_history.add_cmd("data = scipy.io.loadmat(filepath)")
-        return self.handle_dict(filepath, selected_data)
+    def _read(self, filepath, data_type, preload):
+        # only the selected variables are read, including MAT v7.3 files
+        selected_data = load_array_dict(filepath)
+        return selected_data, ["data = load_array_dict(filepath)"]
+
+    def _load(self, filepath, data):
+        return self.handle_dict(filepath, data)
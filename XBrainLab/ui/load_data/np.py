@@ -1,4 +1,6 @@
-import numpy as np
+import os
+
+from XBrainLab.load_data import load_array_dict, load_npy
 
 from .base import LoadDict
 
@@ -11,11 +13,23 @@ class LoadNp(LoadDict):
         super().__init__(parent, "Load data from .npy/.npz files")
         self.filetypes = [('eeg files (.npy, .npz)', '*.npy *.npz')]
         self.script_history.add_import("import numpy as np")
+        self.script_history.add_import(
+            "from XBrainLab.load_data import load_array_dict"
+        )
+
+    def _read(self, filepath, data_type, preload):
+        # arrays are read from disk on demand
+        if self._is_npz(filepath):
+            selected_data = load_array_dict(filepath)
+            return selected_data, ["data = load_array_dict(filepath)"]
+        selected_data = load_npy(filepath)
+        return selected_data, ["data = np.load(filepath, mmap_mode='r')"]
 
-    def _load(self, filepath):
-        selected_data = np.load(filepath)
-        self.script_history.add_cmd("data = np.load(filepath)")
-        if isinstance(selected_data, np.lib.npyio.NpzFile): # npz
-            return self.handle_dict(filepath, selected_data)
+    def _load(self, filepath, data):
+        if self._is_npz(filepath):
+            return self.handle_dict(filepath, data)
         else: # npy
-            return self.handle_array(filepath, selected_data)
+            return self.handle_array(filepath, data)
+
+    def _is_npz(self, filepath):
+        return os.path.splitext(filepath)[1].lower() == '.npz'
@@ -5,48 +5,48 @@ from .base import DataType, LoadBase
 
 class LoadSet(LoadBase):
     command_label = "Import SET file (EEGLAB toolbox)"
+    # only raw data can be loaded on demand, epochs are always preloaded
+    support_lazy = True
+
     def __init__(self, parent):
         super().__init__(parent, "Load data from .set files")
         self.filetypes = [('eeg files (.set)', '*.set'),]
 
-    def _load(self, filepath):
-        data_type = None
-        if self.type_ctrl.get() == DataType.RAW.value:
+    def _read(self, filepath, data_type, preload):
+        read_raw_command = (
+            "data = mne.io.read_raw_eeglab("
+            f"filepath, uint16_codec='latin1', preload={preload})"
+        )
+        read_epochs_command = (
+            "data = mne.io.read_epochs_eeglab(filepath, uint16_codec='latin1')"
+        )
+        if data_type == DataType.RAW.value:
             try:
                 selected_data = mne.io.read_raw_eeglab(
-                    filepath, uint16_codec='latin1', preload=True
-                )
-                self.script_history.add_cmd(
-                    "data = mne.io.read_raw_eeglab("
-                    "filepath, uint16_codec='latin1', preload=True)"
+                    filepath, uint16_codec='latin1', preload=preload
                 )
-                data_type = DataType.RAW.value
+                command = read_raw_command
             except (TypeError):
                 selected_data = mne.io.read_epochs_eeglab(
                     filepath, uint16_codec='latin1'
                 )
-                self.script_history.add_cmd(
-                    "data = mne.io.read_epochs_eeglab(filepath, uint16_codec='latin1')"
-                )
-                data_type = DataType.EPOCH.value
+                command = read_epochs_command
         else:
             try:
                 selected_data = mne.io.read_epochs_eeglab(
                     filepath, uint16_codec='latin1'
                 )
-                self.script_history.add_cmd(
-                    "data = mne.io.read_epochs_eeglab(filepath, uint16_codec='latin1')"
-                )
-                data_type = DataType.EPOCH.value
+                command = read_epochs_command
             except (ValueError):
                 selected_data = mne.io.read_raw_eeglab(
-                    filepath, uint16_codec='latin1', preload=True
+                    filepath, uint16_codec='latin1', preload=preload
                 )
-                self.script_history.add_cmd(
-                    "data = mne.io.read_raw_eeglab("
-                    "filepath, uint16_codec='latin1', preload=True)"
-                )
-                data_type = DataType.RAW.value
-        if data_type:
-            self.check_data_type(data_type)
-        return selected_data
+                command = read_raw_command
+        return selected_data, [command]
+
+    def _load(self, filepath, data):
+        if isinstance(data, mne.BaseEpochs):
+            self.check_data_type(DataType.EPOCH.value)
+        else:
+            self.check_data_type(DataType.RAW.value)
+        return data
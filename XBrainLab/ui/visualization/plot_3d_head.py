@@ -51,8 +51,7 @@ class Saliency3D:
 
         # get saliency
         labelIndex = epoch_data.event_id[self.selected_event_name]
-        self.saliency = eval_record.gradient[labelIndex]
-        self.saliency = self.saliency.mean(axis=0)
+        self.saliency = eval_record.get_saliency_aggregate('Gradient', labelIndex).mean
         self.scalar_bar_range = [self.saliency.min(), self.saliency.max()]
 
         self.max_time = self.saliency.shape[-1]
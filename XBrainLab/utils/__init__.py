@@ -1,7 +1,12 @@
-from .check import validate_issubclass, validate_list_type, validate_type
+from .check import (
+    validate_issubclass,
+    validate_list_type,
+    validate_type,
+    zip_strict,
+)
 from .seed import get_random_state, set_random_state, set_seed
 
 __all__ = [
     'validate_type', 'validate_list_type', 'validate_issubclass',
-    'set_seed', 'set_random_state', 'get_random_state'
+    'zip_strict', 'set_seed', 'set_random_state', 'get_random_state'
 ]
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
+from itertools import zip_longest
+
 
 def _get_type_name(type_class: type) -> str:
     """Return the formatted name of a type."""
@@ -76,3 +79,21 @@ def validate_issubclass(class_name: type,
         raise TypeError(
             f"{message_name} must be an instance of {type_name}, "
             f"got {_get_type_name(class_name)} instead.")
+
+def zip_strict(*iterables: Iterable) -> Iterator[tuple]:
+    """Zip iterables of identical length.
+
+    Same as ``zip(*iterables, strict=True)``, which is not available
+    before Python 3.10.
+
+    Args:
+        iterables: The iterables to be zipped.
+
+    Raises:
+        ValueError: If the iterables have different lengths.
+    """
+    sentinel = object()
+    for items in zip_longest(*iterables, fillvalue=sentinel):
+        if any(item is sentinel for item in items):
+            raise ValueError("zip_strict() arguments have different lengths.")
+        yield items
@@ -77,3 +77,11 @@ def test_validate_issubclass():
     ):
         check.validate_issubclass(B, (int, float), 'test')
 
+
+def test_zip_strict():
+    assert list(check.zip_strict()) == []
+    assert list(check.zip_strict([1, 2], 'ab')) == [(1, 'a'), (2, 'b')]
+    with pytest.raises(ValueError, match='different lengths'):
+        list(check.zip_strict([1, 2], 'a'))
+    with pytest.raises(ValueError, match='different lengths'):
+        list(check.zip_strict([1], 'ab'))
@@ -3,7 +3,7 @@ from matplotlib import pyplot as plt
 from matplotlib.figure import Figure
 
 from ..dataset import Epochs
-from ..training.record import EvalRecord
+from ..training.record import EvalRecord, SaliencyAggregate
 
 
 class Visualizer:
@@ -54,3 +54,9 @@ class Visualizer:
                 return self.eval_record.get_vargrad(labelIndex)
             else:
                 raise NotImplementedError
+
+    def get_saliency_aggregate(
+        self, saliency_name: str, labelIndex: int
+    ) -> SaliencyAggregate:
+        """Return per-class aggregate of saliency maps by class index."""
+        return self.eval_record.get_saliency_aggregate(saliency_name, labelIndex)
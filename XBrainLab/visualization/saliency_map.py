@@ -21,16 +21,16 @@ class SaliencyMapViz(Visualizer):
         # draw
         for labelIndex in range(label_number):
             plt.subplot(rows, cols, labelIndex + 1)
-            saliency = self.get_saliency(method, labelIndex)
+            aggregate = self.get_saliency_aggregate(method, labelIndex)
             # no test data for this label
-            if len(saliency) == 0:
+            if aggregate.count == 0:
                 continue
 
             if absolute:
-                saliency = np.abs(saliency).mean(axis=0)
+                saliency = aggregate.abs_mean
                 cmap = 'Reds'
             else:
-                saliency = saliency.mean(axis=0)
+                saliency = aggregate.mean
                 cmap = 'coolwarm'
 
             im = plt.imshow(saliency, aspect='auto', cmap=cmap,
@@ -22,9 +22,9 @@ class SaliencyTopoMapViz(Visualizer):
         for labelIndex in range(label_number):
             ax = plt.subplot(rows, cols, labelIndex + 1)
 
-            saliency = self.get_saliency(method, labelIndex)
+            aggregate = self.get_saliency_aggregate(method, labelIndex)
             # no test data for this label
-            if len(saliency) == 0:
+            if aggregate.count == 0:
                 continue
             kwargs = {'pos': positions[:, 0:2],
                         'ch_type': 'eeg',
@@ -38,10 +38,10 @@ class SaliencyTopoMapViz(Visualizer):
                         }
 
             if absolute:
-                saliency = np.abs(saliency).mean(axis=0)
+                saliency = aggregate.abs_mean
                 cmap = 'Reds'
             else:
-                saliency = saliency.mean(axis=0)
+                saliency = aggregate.mean
                 cmap = 'coolwarm'
 
             # average over time
@@ -0,0 +1,79 @@
+"""Benchmark of :class:`XBrainLab.dataset.Epochs` construction.
+
+Compares the two-pass constructor against the previous implementation,
+which concatenated every array once per preprocessed data.
+
+Usage:
+    python benchmarks/bench_epochs.py [n_files ...]
+"""
+import sys
+import time
+
+import mne
+import numpy as np
+
+from XBrainLab.dataset import Epochs
+from XBrainLab.load_data import Raw
+
+N_TRIALS = 20
+N_CHANNELS = 32
+N_TIMES = 500
+SFREQ = 250
+# the previous implementation is quadratic, skipped for more files
+MAX_CONCATENATE_FILES = 500
+
+
+def create_data_list(n_files: int) -> list[Raw]:
+    info = mne.create_info(N_CHANNELS, SFREQ, 'eeg')
+    events = np.zeros((N_TRIALS, 3), dtype=int)
+    events[:, 0] = np.arange(N_TRIALS)
+    events[:, 2] = np.arange(N_TRIALS) % 2
+    data = np.random.default_rng(0).standard_normal((N_TRIALS, N_CHANNELS, N_TIMES))
+    data_list = []
+    for i in range(n_files):
+        epochs = mne.EpochsArray(
+            data, info, events=events, event_id={'a': 0, 'b': 1}, verbose=False
+        )
+        raw = Raw(f'sub-{i // 10}_ses-{i % 10}.fif', epochs)
+        raw.set_subject_name(str(i // 10))
+        raw.set_session_name(str(i % 10))
+        data_list.append(raw)
+    return data_list
+
+def concatenate_epochs(data_list: list[Raw]) -> np.ndarray:
+    """Previous implementation, concatenating arrays of each preprocessed data"""
+    subject, session, label, idx, result = [], [], [], [], []
+    for preprocessed_data in data_list:
+        data = preprocessed_data.get_mne()
+        epoch_len = preprocessed_data.get_epochs_length()
+        subject = np.concatenate((subject, [0] * epoch_len))
+        session = np.concatenate((session, [0] * epoch_len))
+        label = np.concatenate((label, data.events[:, 2]))
+        idx = np.concatenate((idx, range(epoch_len)))
+        if len(result) == 0:
+            result = data.get_data()
+        else:
+            result = np.concatenate((result, data.get_data()))
+    return result
+
+def measure(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+def main(n_files_list: list[int]) -> None:
+    print(f'{"files":>6} {"concatenate":>12} {"two-pass":>10} {"float32":>10}')
+    for n_files in n_files_list:
+        data_list = create_data_list(n_files)
+        concat_time = '-'
+        if n_files <= MAX_CONCATENATE_FILES:
+            concat_time = f'{measure(concatenate_epochs, data_list):.3f}s'
+        two_pass_time = measure(Epochs, data_list)
+        float_time = measure(Epochs, data_list, dtype=np.float32)
+        print(
+            f'{n_files:>6} {concat_time:>12} {two_pass_time:>9.3f}s '
+            f'{float_time:>9.3f}s'
+        )
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10, 100, 1000])
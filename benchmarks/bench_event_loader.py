@@ -0,0 +1,74 @@
+"""Benchmark of :class:`XBrainLab.load_data.EventLoader` event ingest.
+
+Compares reading label files and creating event arrays against the previous
+implementation, which parsed each token and built events in Python.
+
+Usage:
+    python benchmarks/bench_event_loader.py [n_events ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import mne
+import numpy as np
+
+from XBrainLab.load_data import EventLoader, Raw
+
+N_CLASSES = 4
+
+
+def create_label_file(directory: str, n_events: int) -> tuple[str, np.ndarray]:
+    label_list = np.random.default_rng(0).integers(1, N_CLASSES + 1, n_events)
+    filepath = os.path.join(directory, f'label_{n_events}.txt')
+    np.savetxt(filepath, label_list, fmt='%d')
+    return filepath, label_list
+
+def read_txt(selected_file: str) -> list:
+    """Previous implementation, parsing each token in Python"""
+    label_list = []
+    with open(selected_file, encoding='utf-8') as fp:
+        for line in fp.readlines():
+            label_list += [int(segment.rstrip()) for segment in line.split(' ')]
+    return label_list
+
+def create_events(label_list: list) -> np.ndarray:
+    """Previous implementation, filling event array from Python sequences"""
+    label_list = np.array(label_list)
+    events = np.zeros((len(label_list), 3))
+    events[:, 0] = range(len(label_list))
+    events[:, -1] = label_list
+    return events
+
+def measure(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+def main(n_events_list: list[int]) -> None:
+    raw = Raw('bench.fif', mne.io.RawArray(
+        np.zeros((1, 10)), mne.create_info(1, 10, 'eeg'), verbose=False
+    ))
+    event_name_map = {i: str(i) for i in range(1, N_CLASSES + 1)}
+    print(
+        f'{"events":>9} {"read (old)":>11} {"read":>8} '
+        f'{"create (old)":>13} {"create":>8} {"from_mat":>9}'
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for n_events in n_events_list:
+            filepath, label_list = create_label_file(directory, n_events)
+            event_loader = EventLoader(raw)
+            old_read_time = measure(read_txt, filepath)
+            read_time = measure(event_loader.read_txt, filepath)
+            old_create_time = measure(create_events, label_list.tolist())
+            create_time = measure(event_loader.create_event, event_name_map)
+            from_mat_time = measure(event_loader.from_mat, label_list[None])
+            print(
+                f'{n_events:>9} {old_read_time:>10.3f}s {read_time:>7.3f}s '
+                f'{old_create_time:>12.3f}s {create_time:>7.3f}s '
+                f'{from_mat_time:>8.3f}s'
+            )
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10 ** 4, 10 ** 5, 10 ** 6])
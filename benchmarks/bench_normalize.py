@@ -0,0 +1,74 @@
+"""Benchmark of :class:`XBrainLab.preprocessor.Normalize` on epoch data.
+
+Compares the in-place broadcast kernels against the previous implementation,
+which normalized each trial in a python loop.
+
+Usage:
+    python benchmarks/bench_normalize.py [n_trials ...]
+"""
+import sys
+import time
+
+import mne
+import numpy as np
+
+from XBrainLab.load_data import Raw
+from XBrainLab.preprocessor import Normalize
+
+N_CHANNELS = 16
+N_TIMES = 256
+SFREQ = 128
+CHUNK_SIZE = 1000
+
+
+def create_epochs(n_trials: int) -> Raw:
+    info = mne.create_info(N_CHANNELS, SFREQ, 'eeg')
+    data = np.random.default_rng(0).standard_normal((n_trials, N_CHANNELS, N_TIMES))
+    epochs = mne.EpochsArray(data, info, verbose=False)
+    return Raw('sub-01_ses-01.fif', epochs)
+
+def loop_normalize(data: np.ndarray, norm: str) -> np.ndarray:
+    """Previous implementation, normalizing trial by trial"""
+    result = data.copy()
+    for ep in range(data.shape[0]):
+        if norm == 'z score':
+            result[ep] = (
+                (data[ep] - data[ep].mean(axis=-1, keepdims=True))
+                / data[ep].std(axis=-1, keepdims=True)
+            )
+        else:
+            data_min = data[ep].min(axis=-1, keepdims=True)
+            data_max = data[ep].max(axis=-1, keepdims=True)
+            result[ep] = (data[ep] - data_min) / (data_max - data_min + 1e-12)
+    return result
+
+def measure(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+def main(n_trials_list: list[int]) -> None:
+    print(
+        f'{"trials":>7} {"norm":>8} {"loop":>9} {"vectorized":>11} '
+        f'{"float32":>9} {"chunked":>9}'
+    )
+    for n_trials in n_trials_list:
+        raw = create_epochs(n_trials)
+        data = raw.get_mne().get_data()
+        for norm in ['z score', 'minmax']:
+            loop_time = measure(loop_normalize, data, norm)
+            # the data are copied on construction, not included in the timing
+            times = []
+            for kwargs in [{}, {'dtype': 'float32'}, {'chunk_size': CHUNK_SIZE}]:
+                processor = Normalize([raw])
+                preprocessed_data = processor.get_preprocessed_data_list()[0]
+                times.append(measure(
+                    processor._data_preprocess, preprocessed_data, norm, **kwargs
+                ))
+            print(
+                f'{n_trials:>7} {norm:>8} {loop_time:>8.3f}s '
+                f'{times[0]:>10.3f}s {times[1]:>8.3f}s {times[2]:>8.3f}s'
+            )
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000])
@@ -0,0 +1,67 @@
+"""Benchmark of saliency map computation in evaluation.
+
+Compares :class:`XBrainLab.training.saliency.SaliencyEngine` against the
+previous implementation, which ran captum Saliency and a separate NoiseTunnel
+for each of SmoothGrad, SmoothGrad_Squared and VarGrad.
+
+Usage:
+    python benchmarks/bench_saliency.py [batch_size ...]
+"""
+import sys
+import time
+
+import torch
+from captum.attr import NoiseTunnel, Saliency
+
+from XBrainLab.model_base import EEGNet
+from XBrainLab.training.saliency import SaliencyEngine
+from XBrainLab.utils import zip_strict
+
+N_CLASSES = 4
+N_CHANNELS = 22
+N_TIMES = 256
+SFREQ = 128
+N_REPEATS = 3
+SALIENCY_PARAMS = {
+    method: {'nt_samples': 5, 'nt_samples_batch_size': None, 'stdevs': 1.0}
+    for method in ['SmoothGrad', 'SmoothGrad_Squared', 'VarGrad']
+}
+NT_TYPES = ['smoothgrad', 'smoothgrad_sq', 'vargrad']
+
+
+def captum_attribute(model, inputs, target):
+    """Previous implementation, drawing noise and backward for each method"""
+    saliency = Saliency(model)
+    noise_tunnel = NoiseTunnel(saliency)
+    inputs.requires_grad = True
+    saliency.attribute(inputs, target=target, abs=False)
+    for nt_type, params in zip_strict(NT_TYPES, SALIENCY_PARAMS.values()):
+        noise_tunnel.attribute(inputs, target=target, nt_type=nt_type, **params)
+
+def engine_attribute(model, inputs, target):
+    SaliencyEngine(model, SALIENCY_PARAMS).attribute(inputs, torch.tensor(target))
+
+def measure(func, *args) -> float:
+    best = float('inf')
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(batch_size_list: list[int]) -> None:
+    torch.manual_seed(0)
+    model = EEGNet(N_CLASSES, N_CHANNELS, N_TIMES, SFREQ).eval()
+    print(f'{"batch":>6} {"captum":>9} {"engine":>9} {"speedup":>8}')
+    for batch_size in batch_size_list:
+        inputs = torch.randn(batch_size, 1, N_CHANNELS, N_TIMES)
+        target = torch.randint(0, N_CLASSES, (batch_size,)).tolist()
+        captum_time = measure(captum_attribute, model, inputs.clone(), target)
+        engine_time = measure(engine_attribute, model, inputs.clone(), target)
+        print(
+            f'{batch_size:>6} {captum_time:>8.3f}s {engine_time:>8.3f}s '
+            f'{captum_time / engine_time:>7.2f}x'
+        )
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [16, 64, 128])